@@ -1,61 +1,87 @@
 import streamlit as st
-import PyPDF2
-import re
-import google.generativeai as genai
+import json
 import os
-import mysql.connector
 from dotenv import load_dotenv
+import db_pool
+from pdf_extract import extract_text
+from resume_parser import parse_resume
+from candidate_store import ensure_candidate_schema, link_skills, parse_retention
+from resume_dedup import ensure_dedup_schema, file_hash, text_hash, find_candidate
+from llm_gateway import get_llm_gateway
+from job_search import search_jobs
+from http_cache import jobs_version
+from tracing import configure_logging
 
 # Load environment variables
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+configure_logging()
 
-# Database Connection
+# Uploads whose extracted text and parsed fields are kept (per process, keyed by file hash)
+UPLOAD_CACHE_ENTRIES = int(os.getenv("STREAMLIT_UPLOAD_CACHE_ENTRIES", "64"))
+
+# Streamlit re-runs this script on every interaction. Long-lived objects come from
+# st.cache_resource (built once per process, shared by all sessions) and per-upload work from
+# st.cache_data, so a rerun neither reconnects, re-extracts the PDF nor calls Gemini again.
+@st.cache_resource
+def load_llm_gateway():
+    return get_llm_gateway()
+
+llm_gateway = load_llm_gateway()
+
+@st.cache_resource
+def get_pool(database):
+    return db_pool.get_pool(database)
+
+# Database Connection (pooled, close() returns the connection to the pool)
 def get_db_connection():
-    conn = mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST"),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database=os.getenv("MYSQL_DATABASE")
-    )
-    return conn
-
-# Initialize the database (Run this once)
+    return get_pool(os.getenv("MYSQL_DATABASE")).get_connection()
+
+# Initialize the database (run once per process, through ensure_schema)
 def initialize_database():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS candidates (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(255),
-            email VARCHAR(255),
-            skills TEXT,
-            experience_years INT,
-            retention_rate FLOAT
-        )
-    ''')
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-# Extract text from PDF
-def extract_text_from_pdf(uploaded_file):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # Same typed table as test1.py, plus skills / candidate_skills
+            ensure_candidate_schema(cursor)
+            ensure_dedup_schema(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+
+# Cached once it succeeds; exceptions are not cached, so a failed attempt is retried on the next upload
+@st.cache_resource(show_spinner=False)
+def ensure_schema():
+    initialize_database()
+    return True
+
+# Keyed by the file hash alone: the leading underscore stops Streamlit hashing the bytes again
+@st.cache_data(show_spinner=False, max_entries=UPLOAD_CACHE_ENTRIES)
+def extract_upload_text(digest, _pdf_bytes):
+    return extract_text(_pdf_bytes)
+
+# Extract text from PDF (an extraction error is reported, not cached)
+def extract_text_from_pdf(pdf_bytes, digest=None):
     try:
-        text = ""
-        pdf = PyPDF2.PdfReader(uploaded_file)
-        for page in pdf.pages:
-            text += page.extract_text() or ""
-        return text
+        return extract_upload_text(digest or file_hash(pdf_bytes), pdf_bytes)
     except Exception as e:
         st.error(f"Error extracting text: {e}")
         return ""
 
-def get_gemini_response(input_prompt):
-    model = genai.GenerativeModel('gemini-pro')
-    response = model.generate_content(input_prompt)
-    return response.text
+RESUME_SCHEMA = {
+    "name": ("string", "the person's name"),
+    "email": ("string", "the person's email"),
+    "skills": ("array", "key skills"),
+    "work_experience": ("string", "relevant work experience"),
+    "retention_rate": ("number", "estimated retention rate in years, based on the average length of previous jobs"),
+}
 
+# Local parse first (resume_parser); Gemini is only called for the fields it could not resolve
 def extract_resume_data(resume_text):
+    data, missing = parse_resume(resume_text)
+    data["work_experience"] = ", ".join(data["work_experience"]) or "Not found"
+    if not missing:
+        return data, "Extracted locally (no LLM call)."
+
     input_prompt = f"""
     Please extract key information from the following resume. The required details include the person's name, email, key skills, relevant work experience, and an estimated retention rate based on the average length of previous jobs. 
     Note that the resume format might not explicitly label these details.
@@ -63,51 +89,51 @@ def extract_resume_data(resume_text):
     Resume:
     {resume_text}
     """
-   
-    response = get_gemini_response(input_prompt)
-
-    # Extract data using regex
-    name_match = re.search(r"Name: (.*)", response)
-    email_match = re.search(r"Email: (.*)", response)
-    skills_match = re.search(r"Skills: (.*)", response)
-    work_experience_match = re.search(r"Work Experience: (.*)", response)
-    retention_rate_match = re.search(r"Retention Rate: (.*)", response)
-
-    data = {
-        "name": name_match.group(1).strip() if name_match else "Not found",
-        "email": email_match.group(1).strip() if email_match else "Not found",
-        "skills": [skill.strip() for skill in skills_match.group(1).strip().split(",")] if skills_match else [],
-        "work_experience": work_experience_match.group(1).strip() if work_experience_match else "Not found",
-        "retention_rate": float(retention_rate_match.group(1).strip()) if retention_rate_match else 0.0
-    }
-
-    return data, response  # Return both data and response
+    schema = {field: RESUME_SCHEMA[field] for field in missing}
+    # Per-document personal data: kept out of the shared LLM cache
+    llm_data = llm_gateway.generate_json(input_prompt, schema, cache=False)
+
+    # Only the unresolved fields are taken from the LLM
+    for field, value in llm_data.items():
+        if value in (None, "", []):
+            continue
+        if field == "retention_rate":
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+        data[field] = value
+
+    return data, json.dumps(llm_data)  # Return both data and response
+
+# Parsed fields (and the Gemini call, when one is needed) once per uploaded file
+@st.cache_data(show_spinner="Analyzing resume...", max_entries=UPLOAD_CACHE_ENTRIES)
+def analyze_resume(digest, _resume_text):
+    return extract_resume_data(_resume_text)
+
+# Re-queried only when a job is inserted (jobs_version) or the role changes
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_job_details(job_role, version):
+    return get_unique_job_details(job_role)
+
 def get_unique_job_details(job_role):
-    conn = get_db_connection()
-    jobs = []
-    try:
+    with get_db_connection() as conn:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-        SELECT DISTINCT company_name, job_title, job_description
-        FROM job_details
-        WHERE job_title LIKE %s;
-        """, (f"%{job_role}%",))
-        jobs = cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
-    return jobs
+        try:
+            return search_jobs(cursor, job_role, columns="id, company_name, job_title, job_description")
+        finally:
+            cursor.close()
 
 # Streamlit app setup
 st.title("Job Search Portal")
 
 role = st.text_input("Please mention job position", key="job_position")
 if st.button("Find Jobs", key="find_jobs_button"):
-    jobs = get_unique_job_details(job_role=role)
+    jobs = cached_job_details(role, jobs_version())
     if jobs:
         for job in jobs:
-            with st.expander(f"{job['title']} at {job['company']}"):
-                st.text(job['description'])
+            with st.expander(f"{job['job_title']} at {job['company_name']}"):
+                st.text(job['job_description'])
     else:
         st.error("No jobs found for the specified role.")
 # Optionally you can upload and process resumes here
@@ -118,28 +144,61 @@ if st.button("Find Jobs", key="find_jobs_button"):
 
     
 def insert_resume(data):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # INSERT IGNORE: a resume with the same file/text hash is already stored
+            cursor.execute('''
+                INSERT IGNORE INTO candidates (name, email, skills, experience_years, retention_rate, file_hash, text_hash)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ''', (
+                data["name"],
+                data["email"],
+                ', '.join(data["skills"]),
+                data["work_experience"],
+                parse_retention(data.get("retention_rate")),
+                data.get("file_hash"),
+                data.get("text_hash")
+            ))
+            if cursor.lastrowid:
+                link_skills(cursor, [(cursor.lastrowid, data["skills"])])
+            conn.commit()
+        finally:
+            cursor.close()
+
+def lookup_candidate(file_hash=None, text_hash=None):
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO candidates (name, email, skills, experience_years, retention_rate)
-        VALUES (%s, %s, %s, %s, %s)
-    ''', (
-        data["name"],
-        data["email"],
-        ', '.join(data["skills"]),
-        data.get("experience_years", 0),
-        data.get("retention_rate", 0.0)
-    ))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return find_candidate(cursor, file_hash=file_hash, text_hash=text_hash)
+    finally:
+        cursor.close()
+        conn.close()
 
 uploaded_file = st.file_uploader("Upload a PDF resume", type="pdf")
 
 if uploaded_file:
-    resume_text = extract_text_from_pdf(uploaded_file)
+    # A resume stored before (same bytes, or same text) is shown from the database
+    # without parsing the PDF again or calling Gemini
+    ensure_schema()
+    pdf_bytes = uploaded_file.getvalue()
+    hashes = {"file_hash": file_hash(pdf_bytes)}
+    existing = lookup_candidate(file_hash=hashes["file_hash"])
+    if existing is None:
+        resume_text = extract_text_from_pdf(pdf_bytes, hashes["file_hash"])
+        if resume_text:
+            hashes["text_hash"] = text_hash(resume_text)
+            existing = lookup_candidate(text_hash=hashes["text_hash"])
     if st.button("Analyze Resume"):
-        data, response = extract_resume_data(resume_text)  # Capture both data and response
+        if existing is not None:
+            st.info("This resume is already in the database.")
+            st.write(f"**Name:** {existing['name']}")
+            st.write(f"**Email:** {existing['email']}")
+            st.write(f"**Skills:** {existing['skills']}")
+            st.write(f"**Estimated Retention Rate:** {existing['retention_rate']} years")
+            st.stop()
+        data, response = analyze_resume(hashes["file_hash"], resume_text)  # Capture both data and response
+        data.update(hashes)
         insert_resume(data)
         st.write(resume_text)
         st.write(f"**Name:** {data['name']}")
@@ -0,0 +1,100 @@
+# Recall and latency of candidate_index retrieval on synthetic candidate tables
+#
+#   python benchmarks/bench_candidate_retrieval.py                  # 1k, 10k and 100k candidates
+#   python benchmarks/bench_candidate_retrieval.py --sizes 1000 --queries 50
+#
+# Each query job asks for 4 skills and 10 candidates per query are planted with all of them.
+# A candidate is relevant when it has all 4 skills (planted or by chance); recall@k is
+# |top k & relevant| / min(k, |relevant|).
+import argparse
+import os
+import random
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from candidate_index import CandidateIndex, candidate_text
+
+SKILLS = [
+    "Python", "Java", "C++", "C#", "JavaScript", "TypeScript", "React", "Angular", "Vue", "Node.js",
+    "Django", "Flask", "Spring", "SQL", "MySQL", "PostgreSQL", "MongoDB", "Redis", "Kafka", "Spark",
+    "Hadoop", "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "Linux", "Git", "Jenkins",
+    "TensorFlow", "PyTorch", "Pandas", "NumPy", "Scikit-learn", "NLP", "Computer Vision", "Tableau",
+    "Power BI", "Excel", "Salesforce", "SAP", "Figma", "Photoshop", "Accounting", "Recruiting",
+    "Marketing", "SEO", "Sales", "Project Management", "Scrum", "Go", "Rust", "Scala", "Swift",
+    "Kotlin", "Android", "iOS", "GraphQL", "REST",
+]
+TITLES = ["Engineer", "Developer", "Analyst", "Manager", "Consultant", "Scientist", "Designer"]
+
+
+def synthetic_candidate(rng, skills=None):
+    skills = list(dict.fromkeys(list(skills or []) + rng.sample(SKILLS, rng.randint(3, 8))))
+    rng.shuffle(skills)
+    jobs = ", ".join(f"{rng.choice(TITLES)}, Company{rng.randint(1, 500)} ({2010 + i} - {2012 + i})"
+                     for i in range(rng.randint(1, 4)))
+    return set(skills), candidate_text(", ".join(skills), jobs)
+
+
+def run(size, queries, k, seed):
+    rng = random.Random(seed)
+    jobs = [rng.sample(SKILLS, 4) for _ in range(queries)]
+    skill_sets = {}
+    items = []
+    next_id = 1
+    for skills in jobs:
+        for _ in range(10):
+            skill_sets[next_id], text = synthetic_candidate(rng, skills)
+            items.append((next_id, text))
+            next_id += 1
+    while next_id <= size:
+        skill_sets[next_id], text = synthetic_candidate(rng)
+        items.append((next_id, text))
+        next_id += 1
+
+    index = CandidateIndex(path=None)
+    start = time.perf_counter()
+    for batch in range(0, len(items), 5000):
+        index.add_many(items[batch:batch + 5000])
+    build = time.perf_counter() - start
+
+    latencies = []
+    recalls = []
+    for skills in jobs:
+        relevant = {candidate_id for candidate_id, have in skill_sets.items() if have.issuperset(skills)}
+        description = f"We are hiring a {rng.choice(TITLES)} with experience in {', '.join(skills)}."
+        start = time.perf_counter()
+        hits = index.search(description, k=k)
+        latencies.append(time.perf_counter() - start)
+        found = {candidate_id for candidate_id, _ in hits}
+        recalls.append(len(found & relevant) / min(k, len(relevant)))
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "candidates": len(items),
+        "build_s": build,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "recall": float(np.mean(recalls)),
+        "postings": sum(len(rows) for rows, _ in index._postings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'candidates':>10}{'build (s)':>12}{'p50 (ms)':>10}{'p95 (ms)':>10}"
+          f"{'recall@' + str(args.k):>11}{'postings':>10}")
+    for size in args.sizes:
+        r = run(size, args.queries, args.k, args.seed)
+        print(f"{r['candidates']:>10}{r['build_s']:>12.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{r['recall']:>11.2f}{r['postings']:>10}")
+
+
+if __name__ == "__main__":
+    main()
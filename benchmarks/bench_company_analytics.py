@@ -0,0 +1,62 @@
+# Company analytics queries: a pandas pass per request vs the precomputed company_analytics structures
+#
+#   python benchmarks/bench_company_analytics.py                # REVIEWS.csv as shipped
+#   python benchmarks/bench_company_analytics.py --scale 100    # REVIEWS.csv repeated 100x
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reviews_loader import load_reviews
+from company_analytics import CompanyAnalytics
+
+
+def per_query(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default="REVIEWS.csv")
+    parser.add_argument("--scale", type=int, default=1, help="repeat the rows this many times")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--industry", default="Accounting & Tax")
+    args = parser.parse_args()
+
+    data = load_reviews(args.csv)
+    if args.scale > 1:
+        data = pd.concat([data] * args.scale, ignore_index=True)
+    start = time.perf_counter()
+    analytics = CompanyAnalytics(data)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = {
+        "top 20 in industry by rating": (
+            lambda: data[data["Industry"] == args.industry].nlargest(20, "Rating"),
+            lambda: analytics.top("rating", 20, {"industry": args.industry}),
+        ),
+        "median salaries by size": (
+            lambda: data.groupby("Company_Size", observed=True)["Salaries"].median(),
+            lambda: analytics.group_by("size", "salaries", "median"),
+        ),
+        "rating between 4 and 4.5": (
+            lambda: data[data["Rating"].between(4, 4.5)].sort_values("Rating").head(50),
+            lambda: analytics.between("rating", 4, 4.5, limit=50),
+        ),
+    }
+
+    print(f"{len(data)} companies, precomputed in {build_ms:.1f} ms")
+    print(f"{'query':<32}{'pandas ms':>12}{'precomputed ms':>16}{'speedup':>10}")
+    for name, (pandas_query, precomputed_query) in queries.items():
+        pandas_ms = per_query(pandas_query, args.repeat)
+        precomputed_ms = per_query(precomputed_query, args.repeat)
+        print(f"{name:<32}{pandas_ms:>12.3f}{precomputed_ms:>16.4f}{pandas_ms / precomputed_ms:>9.0f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# Cold-start cost of the entry points: wall time of `import <module>` in a fresh interpreter
+# and, from `python -X importtime`, the self time spent in each top-level package.
+#
+#   python benchmarks/bench_import_time.py                          # test, test1, main, app
+#   python benchmarks/bench_import_time.py test --rev HEAD~1        # before (a git revision) vs after
+#   python benchmarks/bench_import_time.py test --top 15 --repeat 7
+#
+# --rev checks the revision out into a temporary git worktree (copying .env) and runs the same
+# measurement there. An import that fails (a missing package, MySQL refusing the connection the
+# old modules opened at import) is reported with its error and the time it took to fail.
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["test", "test1", "main", "app"]
+
+
+# {top-level package: self microseconds} from -X importtime's stderr
+def parse_importtime(stderr):
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, _, name = line[len("import time:"):].split("|", 2)
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0) + int(self_us)
+        except ValueError:
+            continue
+    return packages
+
+
+def run_import(module, cwd, timeout):
+    env = dict(os.environ, PYTHONPATH=cwd)
+    started = time.perf_counter()
+    try:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=cwd, env=env,
+                                capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return time.perf_counter() - started, {}, f"timed out after {timeout}s"
+    elapsed = time.perf_counter() - started
+    error = None
+    if result.returncode != 0:
+        lines = [line for line in result.stderr.splitlines() if line and not line.startswith("import time:")]
+        error = lines[-1] if lines else f"exit status {result.returncode}"
+    return elapsed, parse_importtime(result.stderr), error
+
+
+def measure(module, cwd, repeat, timeout):
+    # The first run also writes .pyc files; it is not counted
+    run_import(module, cwd, timeout)
+    runs = [run_import(module, cwd, timeout) for _ in range(repeat)]
+    walls = [wall for wall, _, _ in runs]
+    median = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    return {"wall": statistics.median(walls), "packages": median[1], "error": median[2]}
+
+
+def checkout(rev):
+    path = tempfile.mkdtemp(prefix="bench-import-")
+    subprocess.run(["git", "worktree", "add", "--detach", path, rev], cwd=ROOT, check=True, capture_output=True)
+    if os.path.exists(os.path.join(ROOT, ".env")):
+        shutil.copy(os.path.join(ROOT, ".env"), path)
+    return path
+
+
+def remove_checkout(path):
+    subprocess.run(["git", "worktree", "remove", "--force", path], cwd=ROOT, capture_output=True)
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def report(module, results, top):
+    labels = list(results)
+    print(f"\n== import {module}")
+    for label, result in results.items():
+        total = sum(result["packages"].values()) / 1000
+        status = f"FAILED: {result['error']}" if result["error"] else "ok"
+        print(f"  {label:>8}: {result['wall'] * 1000:8.1f} ms wall, {total:8.1f} ms in imports  ({status})")
+
+    packages = set()
+    for result in results.values():
+        packages.update(result["packages"])
+    ranked = sorted(packages, key=lambda name: -max(result["packages"].get(name, 0) for result in results.values()))
+    print(f"  {'package':<28}" + "".join(f"{label:>12}" for label in labels))
+    for name in ranked[:top]:
+        cells = "".join(f"{results[label]['packages'].get(name, 0) / 1000:>9.1f} ms" for label in labels)
+        print(f"  {name:<28}{cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-package import cost of the app entry points.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--rev", help="git revision to compare against (e.g. HEAD~1)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages shown per module")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds before an import is abandoned")
+    args = parser.parse_args()
+
+    trees = {}
+    if args.rev:
+        trees["before"] = checkout(args.rev)
+    trees["after" if args.rev else "current"] = ROOT
+    try:
+        for module in args.modules:
+            results = {label: measure(module, path, args.repeat, args.timeout) for label, path in trees.items()}
+            report(module, results, args.top)
+    finally:
+        if args.rev:
+            remove_checkout(trees["before"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
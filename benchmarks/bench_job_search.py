@@ -0,0 +1,108 @@
+# LIKE '%role%' vs FULLTEXT search on a synthetic copy of job_details (needs a MySQL server,
+# configured through the same MYSQL_* variables as the apps)
+#
+#   python benchmarks/bench_job_search.py --rows 100000
+#
+# The rows go into a scratch table (job_details_bench by default), dropped afterwards unless --keep.
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import db_pool
+import job_search
+
+TITLES = ["Software Engineer", "Data Scientist", "Data Analyst", "Product Manager", "DevOps Engineer",
+          "AI Engineer", "Machine Learning Engineer", "Frontend Developer", "Backend Developer",
+          "Accountant", "HR Manager", "Sales Associate", "Nurse", "Teacher", "Graphic Designer"]
+LEVELS = ["Junior", "Senior", "Lead", "Principal", "Staff", ""]
+WORDS = ("python java sql cloud aws azure kubernetes docker react angular excel marketing finance "
+         "healthcare design communication leadership agile scrum analytics reporting customer "
+         "pipelines testing security networking mobile ios android payroll recruiting").split()
+QUERIES = ["engineer", "data scientist", "manager", "developer", "nurse", "AI", "accountant"]
+
+
+def synthetic_job(rng):
+    title = f"{rng.choice(LEVELS)} {rng.choice(TITLES)}".strip()
+    description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 200)))
+    return (f"Company {rng.randint(1, 5000)}", title, description, "Positive")
+
+
+def time_query(cursor, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--database", default="job_database")
+    parser.add_argument("--table", default="job_details_bench")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    conn = db_pool.get_connection(args.database)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {args.table}")
+        cursor.execute(f"""
+            CREATE TABLE {args.table} (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                company_name VARCHAR(255),
+                job_title VARCHAR(255),
+                job_description TEXT,
+                sentiment_analysis TEXT
+            )
+        """)
+        start = time.perf_counter()
+        for _ in range(0, args.rows, 5000):
+            cursor.executemany(
+                f"INSERT INTO {args.table} (company_name, job_title, job_description, sentiment_analysis) "
+                "VALUES (%s, %s, %s, %s)",
+                [synthetic_job(rng) for _ in range(5000)]
+            )
+            conn.commit()
+        print(f"inserted {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        like_sql = f"""
+            SELECT DISTINCT id, company_name, job_title, job_description, sentiment_analysis
+            FROM {args.table} WHERE job_title LIKE %s
+        """
+        like_times = {q: time_query(cursor, like_sql, (f"%{q}%",), args.repeat) for q in QUERIES}
+
+        start = time.perf_counter()
+        job_search.ensure_job_search_indexes(cursor, table=args.table)
+        print(f"built search indexes in {time.perf_counter() - start:.1f}s")
+        dict_cursor = conn.cursor(dictionary=True)
+        search_times = {}
+        for q in QUERIES:
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                job_search.search_jobs(dict_cursor, q, limit=20, table=args.table)
+                samples.append((time.perf_counter() - started) * 1000)
+            search_times[q] = statistics.median(samples)
+        dict_cursor.close()
+
+        print(f"{'query':<16}{'LIKE %q% all rows (ms)':>24}{'search_jobs page (ms)':>24}")
+        for q in QUERIES:
+            print(f"{q:<16}{like_times[q]:>24.1f}{search_times[q]:>24.1f}")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP TABLE IF EXISTS {args.table}")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
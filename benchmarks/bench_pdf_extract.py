@@ -0,0 +1,73 @@
+# PDF text extraction: the old PyPDF2 `text += page.extract_text()` loop vs pdf_extract
+#
+#   python benchmarks/bench_pdf_extract.py path/to/pdfs/          # your own corpus
+#   python benchmarks/bench_pdf_extract.py --synthetic 1 2 5 40   # generated resumes of 1, 2, 5 and 40 pages
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import PyPDF2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pdf_extract
+from synthetic_pdfs import synthetic_resume_pdf
+
+
+def baseline(data):
+    import io
+    text = ""
+    pdf = PyPDF2.PdfReader(io.BytesIO(data))
+    for page in pdf.pages:
+        text += page.extract_text() or ""
+    return text
+
+
+def measure(fn, data, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", nargs="?", help="directory of PDFs")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[1, 2, 5, 40],
+                        help="page counts of generated resumes (used when no corpus is given)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.corpus:
+        documents = []
+        for path in sorted(glob.glob(os.path.join(args.corpus, "**", "*.pdf"), recursive=True)):
+            with open(path, "rb") as pdf_file:
+                documents.append((os.path.basename(path), pdf_file.read()))
+    else:
+        documents = [(f"synthetic-{pages}p", synthetic_resume_pdf(seed=pages, pages=pages))
+                     for pages in args.synthetic]
+
+    budgets = {"max_pages": 1000, "time_budget": 600}
+    variants = [
+        ("baseline", baseline),
+        ("pypdf2", lambda d: pdf_extract.extract_text(d, backend="pypdf2", parallel=False, **budgets)),
+        ("pdfplumber", lambda d: pdf_extract.extract_text(d, backend="pdfplumber", parallel=False, **budgets)),
+        ("pypdf2 par.", lambda d: pdf_extract.extract_text(d, backend="pypdf2", parallel=True, **budgets)),
+    ]
+    # Start the worker processes before timing anything
+    pdf_extract.extract_text(documents[0][1], backend="pypdf2", parallel=True, **budgets)
+
+    print(f"{'document':<24}{'KiB':>8}" + "".join(f"{name + ' (ms)':>18}" for name, _ in variants))
+    for name, data in documents:
+        row = f"{name:<24}{len(data) / 1024:>8.1f}"
+        for _, fn in variants:
+            row += f"{measure(fn, data, args.repeat):>18.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Map-reduce candidate ranking (candidate_ranking.py) against a fake LLM with a fixed latency per
+# call: wall-clock time, LLM calls and the largest prompt for growing candidate pools. The single
+# prompt the shortlist mode would need for the whole pool is shown for comparison.
+#
+#   python benchmarks/bench_rank_shards.py --latency 1.5 --parallelism 16
+#   python benchmarks/bench_rank_shards.py --sizes 1000,20000 --shard-tokens 3000
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_pdfs import synthetic_resume_lines
+from llm_gateway import LLMGateway, FakeBackend
+from candidate_ranking import MapReduceRanker, encode_candidate, estimate_tokens, shard_prompt
+
+JOB = "Backend Developer for production services. Required skills: Python, SQL, Docker, AWS."
+WANTED = {"python", "sql", "docker", "aws"}
+_LINE = re.compile(r"^(\d+)\|([^|]*)\|", re.M)
+
+
+# Picks the lines with the most wanted skills, as a model would, so shortlists are meaningful
+def responder(model, prompt, schema, count):
+    scored = []
+    for number, skills in _LINE.findall(prompt):
+        overlap = len(WANTED & {skill.strip().lower() for skill in skills.split(",")})
+        scored.append((-overlap, int(number)))
+    return json.dumps({"numbers": [number for _, number in sorted(scored)[:5]]})
+
+
+def candidates(count, seed):
+    rng = random.Random(seed)
+    pool = []
+    for number in range(count):
+        lines = synthetic_resume_lines(rng)
+        pool.append({"id": number + 1, "name": lines[0], "skills": lines[5],
+                     "experience_years": ", ".join(line for line in lines[8:] if "(" in line),
+                     "retention_rate": round(rng.uniform(0.5, 5), 1)})
+    return pool
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,5000,20000", help="candidate pool sizes")
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per fake LLM call")
+    parser.add_argument("--parallelism", type=int, default=16, help="shards in flight (RANK_PARALLELISM)")
+    parser.add_argument("--shard-tokens", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'candidates':>10}{'one-prompt tokens':>19}{'calls':>7}{'max prompt':>12}{'wall s':>9}{'in latencies':>14}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        pool = candidates(size, args.seed)
+        single = estimate_tokens(shard_prompt(JOB, [encode_candidate(n, c) for n, c in enumerate(pool, 1)], 5))
+        prompts = []
+
+        def record(model, prompt, schema, count):
+            prompts.append(estimate_tokens(prompt))
+            return responder(model, prompt, schema, count)
+
+        # The gateway keeps its default LLM_MAX_CONCURRENCY; the ranker brings its own limit
+        gateway = LLMGateway(backend=FakeBackend(latency=args.latency, responder=record),
+                             timeout=max(30.0, args.latency * 4))
+        ranker = MapReduceRanker(gateway, shard_tokens=args.shard_tokens, parallelism=args.parallelism)
+        start = time.perf_counter()
+        finalists = ranker.reduce(JOB, pool)
+        elapsed = time.perf_counter() - start
+        best = max(len(WANTED & {s.strip().lower() for s in c["skills"].split(",")}) for c in finalists)
+        print(f"{size:>10}{single:>19}{len(prompts):>7}{max(prompts, default=0):>12}{elapsed:>9.2f}"
+              f"{elapsed / args.latency:>14.1f}   ({len(finalists)} finalists, best matches {best}/4 skills)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# Resume field extraction: today's always-call-Gemini path vs the resume_parser fast path
+#
+#   python benchmarks/bench_resume_parser.py --resumes 2000 --llm-ms 2500
+#   python benchmarks/bench_resume_parser.py --corpus path/to/texts/   # .txt files of extracted resumes
+#
+# The LLM is not called; its latency is taken from --llm-ms (measure yours with a few real calls).
+# --messy is the share of generated resumes with an unlabelled layout (no email, no date ranges)
+# that the local parser cannot fully resolve.
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from resume_parser import parse_resume
+from synthetic_pdfs import synthetic_resume_lines
+
+
+def messy(lines, rng):
+    # Drop the email line and write years without a range
+    lines = [line for line in lines if "@" not in line]
+    return [line.replace(" - ", rng.choice([" / ", " and "])) for line in lines]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of .txt resume texts")
+    parser.add_argument("--resumes", type=int, default=2000)
+    parser.add_argument("--messy", type=float, default=0.2)
+    parser.add_argument("--llm-ms", type=float, default=2500.0, help="assumed Gemini latency per call")
+    args = parser.parse_args()
+
+    if args.corpus:
+        texts = []
+        for path in sorted(glob.glob(os.path.join(args.corpus, "**", "*.txt"), recursive=True)):
+            with open(path, encoding="utf-8", errors="replace") as text_file:
+                texts.append(text_file.read())
+    else:
+        rng = random.Random(0)
+        texts = []
+        for _ in range(args.resumes):
+            lines = synthetic_resume_lines(rng)
+            texts.append("\n".join(messy(lines, rng) if rng.random() < args.messy else lines))
+
+    samples = []
+    llm_calls = 0
+    missing_counts = {}
+    for text in texts:
+        start = time.perf_counter()
+        _, missing = parse_resume(text)
+        samples.append((time.perf_counter() - start) * 1000)
+        if missing:
+            llm_calls += 1
+        for field in missing:
+            missing_counts[field] = missing_counts.get(field, 0) + 1
+
+    samples.sort()
+    local_ms = statistics.mean(samples)
+    call_rate = llm_calls / len(texts)
+    print(f"resumes: {len(texts)}")
+    print(f"local parse: mean {local_ms:.3f} ms, p50 {samples[len(samples) // 2]:.3f} ms, "
+          f"p99 {samples[int(len(samples) * 0.99)]:.3f} ms")
+    print(f"unresolved fields: {missing_counts or 'none'}")
+    print(f"{'path':<14}{'LLM calls/resume':>18}{'est. ms/resume':>18}")
+    print(f"{'today':<14}{1.0:>18.2f}{args.llm_ms:>18.1f}")
+    print(f"{'fast path':<14}{call_rate:>18.2f}{local_ms + call_rate * args.llm_ms:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Load time and memory of the plain pd.read_csv loader vs reviews_loader.load_reviews
+#
+#   python benchmarks/bench_reviews_loader.py                # REVIEWS.csv as shipped
+#   python benchmarks/bench_reviews_loader.py --scale 200    # REVIEWS.csv repeated 200x
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import reviews_loader
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default="REVIEWS.csv")
+    parser.add_argument("--scale", type=int, default=1, help="repeat the CSV rows this many times")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_reviews_")
+    reviews_loader.CACHE_DIR = os.path.join(workdir, "cache")
+    try:
+        csv_path = os.path.join(workdir, "REVIEWS.csv")
+        raw = pd.read_csv(args.csv)
+        pd.concat([raw] * args.scale, ignore_index=True).to_csv(csv_path, index=False)
+
+        def cold():
+            shutil.rmtree(reviews_loader.CACHE_DIR, ignore_errors=True)
+            return reviews_loader.load_reviews(csv_path)
+
+        results = [
+            ("pd.read_csv (current)",) + timed(lambda: pd.read_csv(csv_path), args.repeat),
+            ("load_reviews, cold",) + timed(cold, args.repeat),
+            ("load_reviews, warm",) + timed(lambda: reviews_loader.load_reviews(csv_path), args.repeat),
+        ]
+
+        print(f"rows: {len(raw) * args.scale}")
+        print(f"{'loader':<24}{'best time (ms)':>16}{'memory (KiB)':>16}")
+        for name, seconds, frame in results:
+            memory = frame.memory_usage(deep=True).sum() / 1024
+            print(f"{name:<24}{seconds * 1000:>16.2f}{memory:>16.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# Storage backends side by side: the same timed queries (the apps' own SQL through db_pool,
+# job_search, candidate_store and resume_dedup) against each DB_BACKEND. Every backend runs in
+# its own process, configured only through the environment.
+#
+#   python benchmarks/bench_storage.py                          # SQLite in a temp dir
+#   python benchmarks/bench_storage.py --backends sqlite,mysql  # MySQL from .env
+#
+# Each worker first runs the apps' schema setup (the same DDL on every backend). Rows written
+# against MySQL are deleted at the end. The behaviour the backends must share is checked by
+# tests/test_storage.py (python -m pytest tests).
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_pdfs import synthetic_resume_lines, SKILLS, TITLES, COMPANIES
+
+INSERT_JOB = """
+    INSERT INTO job_details (company_name, job_title, job_description, sentiment_analysis)
+    VALUES (%s, %s, %s, %s)
+"""
+INSERT_CANDIDATE = """
+    INSERT IGNORE INTO candidates (name, email, skills, experience_years, retention_rate, file_hash, text_hash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+class Bench:
+    def __init__(self, tag):
+        import db_pool
+        self.db_pool = db_pool
+        self.tag = tag
+        self.job_ids = []
+        self.candidate_ids = []
+
+    # One pooled connection per operation, as the request handlers do
+    def run(self, database, fn, dictionary=True):
+        conn = self.db_pool.get_connection(database)
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            return fn(conn, cursor)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def insert_job(self, title, description):
+        def insert(conn, cursor):
+            cursor.execute(INSERT_JOB, (f"{self.tag} {random.choice(COMPANIES)}", title, description, "bench"))
+            conn.commit()
+            return cursor.lastrowid
+        job_id = self.run("job_database", insert, dictionary=False)
+        self.job_ids.append(job_id)
+        return job_id
+
+    def insert_candidate(self, skills, file_hash):
+        from candidate_store import link_skills
+
+        def insert(conn, cursor):
+            cursor.execute(INSERT_CANDIDATE, (f"{self.tag} candidate", "bench@example.com", ", ".join(skills),
+                                              "Software Engineer, Bench (2019 - 2024)", 2.5, file_hash, None))
+            candidate_id = cursor.lastrowid if cursor.rowcount else None
+            if candidate_id:
+                link_skills(cursor, [(candidate_id, skills)])
+            conn.commit()
+            return candidate_id
+        candidate_id = self.run("resume_db", insert, dictionary=False)
+        if candidate_id:
+            self.candidate_ids.append(candidate_id)
+        return candidate_id
+
+    def get_job(self, job_id):
+        def select(conn, cursor):
+            cursor.execute("SELECT * FROM job_details WHERE id = %s", (job_id,))
+            return cursor.fetchone()
+        return self.run("job_database", select)
+
+    def search(self, query, limit=20, after=None):
+        from job_search import search_jobs_page
+
+        def select(conn, cursor):
+            page = search_jobs_page(cursor, query, limit=limit, after=after)
+            return page.rows(), page.next_cursor
+        return self.run("job_database", select)
+
+    def lookup(self, file_hash):
+        from resume_dedup import find_candidate
+        return self.run("resume_db", lambda conn, cursor: find_candidate(cursor, file_hash=file_hash))
+
+    def find(self, skills):
+        from candidate_store import find_candidates
+        return self.run("resume_db", lambda conn, cursor: find_candidates(cursor, skills, limit=50))
+
+    # The schema setup initialize_database runs in test.py and test1.py
+    def prepare(self):
+        from job_search import ensure_job_details_schema
+        from candidate_store import ensure_candidate_schema
+        from resume_dedup import ensure_dedup_schema
+        from match_scores import ensure_match_score_schema
+
+        def setup(*steps):
+            def run(conn, cursor):
+                for step in steps:
+                    step(cursor)
+                conn.commit()
+            return run
+        self.run("job_database", setup(ensure_job_details_schema), dictionary=False)
+        self.run("resume_db", setup(ensure_candidate_schema, ensure_dedup_schema, ensure_match_score_schema),
+                 dictionary=False)
+
+    def seed(self, jobs, candidates, rng):
+        for _ in range(jobs):
+            skills = ", ".join(rng.sample(SKILLS, 4))
+            self.insert_job(rng.choice(TITLES), f"{self.tag} role building services. Required skills: {skills}.")
+        for _ in range(candidates):
+            self.insert_candidate(synthetic_resume_lines(rng)[5].split(", "), uuid.uuid4().hex)
+
+    def timings(self, repeat, rng):
+        job_ids = list(self.job_ids)
+        hashes = []
+
+        def insert_candidate():
+            hashes.append(uuid.uuid4().hex)
+            self.insert_candidate(rng.sample(SKILLS, 5), hashes[-1])
+
+        operations = {
+            "insert_job": lambda: self.insert_job(rng.choice(TITLES), f"{self.tag} timed insert."),
+            "get_job_by_id": lambda: self.get_job(rng.choice(job_ids)),
+            "search_ranked": lambda: self.search(f"{rng.choice(TITLES)} {rng.choice(SKILLS)}"),
+            "search_prefix": lambda: self.search("AI"),
+            "insert_resume": insert_candidate,
+            "lookup_candidate": lambda: self.lookup(rng.choice(hashes) if hashes else "none"),
+            "find_candidates": lambda: self.find(rng.sample(SKILLS, 2)),
+        }
+        results = {}
+        for name, operation in operations.items():
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                operation()
+                samples.append(time.perf_counter() - start)
+            samples.sort()
+            results[name] = {"p50_us": samples[len(samples) // 2] * 1e6,
+                             "p95_us": samples[int(len(samples) * 0.95) - 1] * 1e6}
+        return results
+
+    def cleanup(self):
+        def delete(ids, table):
+            def run(conn, cursor):
+                for offset in range(0, len(ids), 500):
+                    chunk = ids[offset:offset + 500]
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    if table == "candidates":
+                        cursor.execute(f"DELETE FROM candidate_skills WHERE candidate_id IN ({placeholders})", chunk)
+                    cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", chunk)
+                conn.commit()
+            return run
+        self.run("job_database", delete(self.job_ids, "job_details"), dictionary=False)
+        self.run("resume_db", delete(self.candidate_ids, "candidates"), dictionary=False)
+
+
+def worker(args):
+    rng = random.Random(args.seed)
+    bench = Bench(tag=f"bench{uuid.uuid4().hex[:6]}")
+    try:
+        bench.prepare()
+        bench.seed(args.jobs, args.candidates, rng)
+        results = bench.timings(args.repeat, rng)
+    finally:
+        if os.getenv("DB_BACKEND") == "mysql":
+            bench.cleanup()
+    print(json.dumps({"timings": results}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="sqlite", help="comma-separated DB_BACKEND values")
+    parser.add_argument("--jobs", type=int, default=2000, help="jobs stored before timing")
+    parser.add_argument("--candidates", type=int, default=2000, help="candidates stored before timing")
+    parser.add_argument("--repeat", type=int, default=300, help="timed runs per query")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return worker(args)
+
+    reports = {}
+    for backend in args.backends.split(","):
+        env = dict(os.environ, DB_BACKEND=backend, LOG_LEVEL="WARNING")
+        if backend == "sqlite":
+            env["SQLITE_DIR"] = tempfile.mkdtemp(prefix="bench_storage_")
+        command = [sys.executable, os.path.abspath(__file__), "--worker", "--jobs", str(args.jobs),
+                   "--candidates", str(args.candidates), "--repeat", str(args.repeat), "--seed", str(args.seed)]
+        completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+        if completed.returncode:
+            print(f"{backend}: worker failed\n{completed.stderr}", file=sys.stderr)
+            return 1
+        reports[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    print(f"{'query':<20}" + "".join(f"{backend + ' p50/p95 us':>26}" for backend in reports))
+    for name in next(iter(reports.values()))["timings"]:
+        cells = "".join(f"{report['timings'][name]['p50_us']:>16.0f} / {report['timings'][name]['p95_us']:<7.0f}"
+                        for report in reports.values())
+        print(f"{name:<20}{cells}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
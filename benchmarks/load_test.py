@@ -0,0 +1,347 @@
+# End-to-end load test of the Flask apps, fully offline: the LLM gateway runs its FakeBackend
+# (LLM_BACKEND=fake, fixed latency, deterministic answers), MySQL is replaced by SQLite through
+# db_pool.set_connector (sqlite_store.py, in a temp dir) and resumes are synthetic PDFs. Requests go
+# through Flask test clients from concurrent threads, so no server or network is involved.
+#
+#   python benchmarks/load_test.py --duration 30 --concurrency 8 --llm-latency 0.5
+#   python benchmarks/load_test.py --mix find_jobs=8,submit=1 --output results/after.json \
+#       --compare results/before.json
+#
+# Reports requests/s and p50/p95/p99 latency per route; /upload and /apply are answered once the
+# resume is queued, so the queue's own time-to-done is reported as "resume_job (async)".
+# --output saves everything as JSON and --compare prints the change against an earlier run.
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_pdfs import synthetic_resume_pdf, synthetic_resume_lines, SKILLS, TITLES
+
+ROUTES = ("submit", "fetch_candidates", "find_jobs", "upload", "apply")
+DEFAULT_MIX = "submit=1,fetch_candidates=2,find_jobs=6,upload=1,apply=1"
+STATUS_URL = re.compile(r"/resume_jobs/([\w-]+)")
+
+
+# Must run before the apps are imported: they read their configuration at import time
+def configure_environment(workdir, args):
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "LLM_FAKE_LATENCY": str(args.llm_latency),
+        "MYSQL_POOL_SIZE": str(args.pool_size),
+        "RESUME_WORKERS": str(args.resume_workers),
+        "RESUME_QUEUE_PATH": os.path.join(workdir, "resume_jobs.sqlite3"),
+        "RESUME_SPOOL_DIR": os.path.join(workdir, "resume_spool"),
+        "CANDIDATE_INDEX_PATH": os.path.join(workdir, "candidate_index.jsonl"),
+        "JOBS_VERSION_PATH": os.path.join(workdir, "jobs.version"),
+        "REVIEWS_CACHE_DIR": os.path.join(workdir, "reviews_cache"),
+        "WRITE_SPILL_DIR": os.path.join(workdir, "write_spill"),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    })
+    if args.no_http_cache:
+        os.environ["HTTP_CACHE_MAX_ENTRIES"] = "0"
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        route, _, weight = part.partition("=")
+        if route.strip() not in ROUTES:
+            raise SystemExit(f"Unknown route '{route}' in --mix, expected one of {', '.join(ROUTES)}")
+        weights[route.strip()] = float(weight or 1)
+    return weights
+
+
+def job_description(rng):
+    skills = ", ".join(rng.sample(SKILLS, rng.randint(3, 6)))
+    return f"We are hiring to build and run production services. Required skills: {skills}."
+
+
+# Jobs and candidates inserted through the apps' own code paths (and so also scored and indexed)
+def seed(employer, rng, jobs, candidates):
+    from resume_ingest import insert_resumes
+    for _ in range(jobs):
+        job_id = employer.save_job_details(rng.choice(COMPANIES), rng.choice(TITLES), job_description(rng),
+                                           "Seeded for the load test.")
+        if job_id is None:
+            raise SystemExit("Seeding jobs failed, see the log above")
+    batch = []
+    for number in range(candidates):
+        lines = synthetic_resume_lines(rng)
+        batch.append({
+            "name": lines[0], "email": lines[1], "skills": lines[5].split(", "),
+            "work_experience": [line for line in lines[8:] if "(" in line],
+            "retention_rate": round(rng.uniform(0.5, 5), 1),
+            "file_hash": f"seed-file-{number}", "text_hash": f"seed-text-{number}",
+        })
+        if len(batch) == 500:
+            insert_resumes(batch)
+            batch = []
+    if batch:
+        insert_resumes(batch)
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {route: [] for route in ROUTES}
+        self.statuses = {route: {} for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+        self.resume_jobs = []
+
+    def add(self, route, seconds, status, resume_job_id=None):
+        with self._lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][str(status)] = self.statuses[route].get(str(status), 0) + 1
+            if status >= 500:
+                self.errors[route] += 1
+            if resume_job_id:
+                self.resume_jobs.append(resume_job_id)
+
+
+class Traffic:
+    def __init__(self, args, employer, employee, apps, job_ids):
+        self.employer = employer
+        self.employee = employee
+        self.apps = apps
+        self.job_ids = job_ids
+        self.rerank = args.rerank
+        self.pdfs = [synthetic_resume_pdf(seed=args.seed * 100000 + number, pages=args.pdf_pages)
+                     for number in range(args.pdfs)]
+        self._next_pdf = 0
+        self._lock = threading.Lock()
+
+    # Distinct resumes first; once all have been sent, repeats exercise the duplicate paths
+    def pdf(self):
+        with self._lock:
+            pdf = self.pdfs[self._next_pdf % len(self.pdfs)]
+            self._next_pdf += 1
+        return pdf
+
+    def request(self, route, rng, clients):
+        if route == "submit":
+            return clients["employer"].post("/submit", data={
+                "company_name": rng.choice(COMPANIES), "job_title": rng.choice(TITLES),
+                "job_description": job_description(rng),
+            })
+        if route == "fetch_candidates":
+            data = {"job_id": str(rng.choice(self.job_ids))}
+            if rng.random() < self.rerank:
+                data["rerank"] = "1"
+            return clients["employer"].post("/fetch_candidates", data=data)
+        if route == "find_jobs":
+            query = rng.choice(TITLES + SKILLS).split()[0]
+            return clients["employee"].get("/find_jobs", query_string={"job_title": query})
+        path = "/upload" if route == "upload" else f"/apply/{rng.choice(self.job_ids)}"
+        return clients["employee"].post(path, data={"resume": (io.BytesIO(self.pdf()), "resume.pdf")},
+                                        content_type="multipart/form-data")
+
+
+def run_worker(index, args, traffic, weights, recorder, deadline):
+    rng = random.Random(args.seed * 1000 + index)
+    clients = {name: app.test_client() for name, app in traffic.apps.items()}
+    routes, route_weights = list(weights), list(weights.values())
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, route_weights)[0]
+        start = time.perf_counter()
+        try:
+            response = traffic.request(route, rng, clients)
+            body = response.get_data(as_text=True)
+            status = response.status_code
+        except Exception as e:
+            print(f"{route} raised {type(e).__name__}: {e}", file=sys.stderr)
+            body, status = "", 599
+        elapsed = time.perf_counter() - start
+        match = STATUS_URL.search(body) if route in ("upload", "apply") else None
+        recorder.add(route, elapsed, status, match.group(1) if match else None)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def summarize(latencies, elapsed):
+    if not latencies:
+        return {"requests": 0}
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+# Time from enqueue to done for every resume queued during the run
+def drain_resume_jobs(queue, resume_job_ids, timeout):
+    deadline = time.time() + timeout
+    pending = set(resume_job_ids)
+    finished = {}
+    while pending and time.time() < deadline:
+        for resume_job_id in list(pending):
+            status = queue.status(resume_job_id)
+            if status and status["status"] in ("done", "failed"):
+                finished[resume_job_id] = status
+                pending.discard(resume_job_id)
+        if pending:
+            time.sleep(0.2)
+    done = [status for status in finished.values() if status["status"] == "done"]
+    durations = [status["updated_at"] - status["created_at"] for status in done]
+    span = (max(s["updated_at"] for s in done) - min(s["created_at"] for s in done)) if done else 0
+    summary = summarize(durations, span or 1.0)
+    summary.update({"failed": len(finished) - len(done), "unfinished": len(pending)})
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results):
+    print(f"\n{'route':<24}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, stats in results["routes"].items():
+        if not stats["requests"]:
+            continue
+        print(f"{route:<24}{stats['requests']:>10}{stats.get('errors', stats.get('failed', 0)):>8}"
+              f"{stats['rps']:>9.1f}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+
+
+def print_comparison(results, previous, threshold):
+    print(f"\nAgainst {previous['meta'].get('git_commit')} ({previous['meta'].get('timestamp')}):")
+    print(f"{'route':<24}{'req/s':>18}{'p95 ms':>22}")
+    for route, stats in results["routes"].items():
+        before = previous["routes"].get(route)
+        if not before or not before.get("requests") or not stats["requests"]:
+            continue
+        rps_change = (stats["rps"] - before["rps"]) / before["rps"] * 100
+        p95_change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        flag = "  REGRESSION" if rps_change < -threshold or p95_change > threshold else ""
+        print(f"{route:<24}{before['rps']:>8.1f} -> {stats['rps']:<7.1f}"
+              f"{before['p95_ms']:>10.1f} -> {stats['p95_ms']:<9.1f}{flag}")
+
+
+def load_companies(path, limit=200):
+    with open(path, newline="", encoding="utf-8") as reviews:
+        return [row["Company"] for _, row in zip(range(limit), csv.DictReader(reviews))]
+
+
+COMPANIES = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of test.py and test1.py.")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route weights, e.g. find_jobs=6,submit=1")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument("--rerank", type=float, default=0.2, help="share of /fetch_candidates asking for the LLM re-rank")
+    parser.add_argument("--jobs", type=int, default=200, help="jobs seeded before the run")
+    parser.add_argument("--candidates", type=int, default=2000, help="candidates seeded before the run")
+    parser.add_argument("--pdfs", type=int, default=200, help="distinct synthetic resumes (then repeats)")
+    parser.add_argument("--pdf-pages", type=int, default=1)
+    parser.add_argument("--pool-size", type=int, default=8, help="MYSQL_POOL_SIZE per database")
+    parser.add_argument("--resume-workers", type=int, default=2)
+    parser.add_argument("--no-http-cache", action="store_true", help="disable the rendered-page cache")
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="seconds to wait for queued resumes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="%% change flagged as a regression")
+    parser.add_argument("--workdir", help="keep the SQLite files and queue here (default: a temp dir)")
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="load_test_")
+    configure_environment(workdir, args)
+    os.chdir(ROOT)
+    COMPANIES.extend(load_companies("REVIEWS.csv"))
+
+    import db_pool
+    from sqlite_store import SQLiteDatabases
+    db_pool.set_connector(SQLiteDatabases(os.path.join(workdir, "db")).connect)
+    import test as employer
+    import test1 as employee
+    from llm_gateway import get_llm_gateway
+
+    # Starts the write-behind buffers and the resume workers, as a WSGI server would
+    apps = {"employer": employer.create_app(), "employee": employee.create_app()}
+
+    rng = random.Random(args.seed)
+    print(f"Seeding {args.jobs} jobs and {args.candidates} candidates in {workdir}")
+    started = time.perf_counter()
+    employer.ensure_schema()
+    employee.ensure_schema()
+    seed(employer, rng, args.jobs, args.candidates)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+    traffic = Traffic(args, employer, employee, apps, list(range(1, args.jobs + 1)))
+
+    # One untimed request per route: first-use work (company index, templates) is not measured
+    clients = {name: app.test_client() for name, app in apps.items()}
+    for route in weights:
+        traffic.request(route, rng, clients)
+
+    recorder = Recorder()
+    print(f"Running {args.concurrency} clients for {args.duration:.0f}s (mix {args.mix})")
+    started = time.perf_counter()
+    deadline = started + args.duration
+    workers = [threading.Thread(target=run_worker, args=(index, args, traffic, weights, recorder, deadline))
+               for index in range(args.concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route in weights:
+        routes[route] = summarize(recorder.latencies[route], elapsed)
+        routes[route].update({"errors": recorder.errors[route], "statuses": recorder.statuses[route]})
+    if recorder.resume_jobs:
+        print(f"Waiting for {len(recorder.resume_jobs)} queued resumes")
+        routes["resume_job (async)"] = drain_resume_jobs(employee.get_resume_queue(), recorder.resume_jobs,
+                                                         args.drain_timeout)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "args": vars(args),
+            "elapsed": elapsed,
+        },
+        "routes": routes,
+        "llm": get_llm_gateway().stats(),
+        "pools": db_pool.pool_stats(),
+        "resume_queue": employee.get_resume_queue().stats(),
+    }
+    print_report(results)
+    if args.compare:
+        with open(args.compare) as previous_file:
+            print_comparison(results, json.load(previous_file), args.threshold)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2, default=str)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# Minimal text-only PDF writer for benchmarks (no reportlab needed) plus synthetic resumes
+import random
+
+FIRST_NAMES = ["Ayesha", "Ali", "Sara", "Omar", "Fatima", "John", "Maria", "Wei", "Priya", "Lucas"]
+LAST_NAMES = ["Khan", "Ahmed", "Smith", "Garcia", "Chen", "Patel", "Silva", "Malik", "Brown", "Lee"]
+SKILLS = ["Python", "Java", "SQL", "Flask", "Django", "React", "AWS", "Docker", "Kubernetes",
+          "TensorFlow", "PyTorch", "Pandas", "Excel", "Tableau", "Power BI", "Git", "Linux",
+          "Machine Learning", "NLP", "Project Management", "Scrum", "Salesforce", "Marketing"]
+TITLES = ["Software Engineer", "Data Scientist", "Data Analyst", "AI Engineer", "Product Manager",
+          "DevOps Engineer", "Backend Developer", "Business Analyst"]
+COMPANIES = ["Amazon", "Deloitte", "Systems Limited", "Netsol", "Accenture", "IBM", "Google", "Careem"]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+# pages: list of pages, each a list of text lines
+def build_pdf(pages):
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        stream = stream.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_refs))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def synthetic_resume_lines(rng):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [name, f"{name.lower().replace(' ', '.')}{rng.randint(1, 999)}@example.com",
+             f"+92 3{rng.randint(0, 4)}{rng.randint(0, 9)} {rng.randint(1000000, 9999999)}", "",
+             "Skills", ", ".join(rng.sample(SKILLS, rng.randint(4, 9))), "", "Work Experience"]
+    year = 2024
+    for _ in range(rng.randint(1, 4)):
+        start = year - rng.randint(1, 4)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start} - {year if year < 2024 else 'Present'})")
+        lines.append("Built and maintained services, collaborated with cross-functional teams.")
+        year = start
+    return lines
+
+
+# A resume padded to the requested page count with filler text
+def synthetic_resume_pdf(seed=0, pages=1):
+    rng = random.Random(seed)
+    first = synthetic_resume_lines(rng)
+    filler = [f"Project {i}: delivered features using {', '.join(rng.sample(SKILLS, 3))}." for i in range(50)]
+    return build_pdf([first] + [filler] * (pages - 1))
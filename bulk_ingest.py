@@ -0,0 +1,220 @@
+# Bulk resume ingestion: PDF text extraction across a process pool, rate-limited concurrent
+# Gemini extraction, and batched executemany inserts into resume_db.candidates.
+#
+#   python bulk_ingest.py resumes/ --processes 8 --llm-concurrency 4 --rate 2 --llm-batch 5 --batch-size 100
+#
+# Finished files are appended to the checkpoint file after their batch commits, so an interrupted
+# run can simply be started again and skips everything already stored.
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pdf_extract import extract_text
+from resume_dedup import existing_hashes, file_hash, text_hash
+
+DEFAULT_CHECKPOINT = ".cache/bulk_ingest.checkpoint"
+
+
+# Runs in the worker processes, so it only needs pdf_extract (not the Flask app).
+# parallel=False: the documents are already spread over the process pool.
+def extract_pdf_text(path):
+    try:
+        return extract_text(path, parallel=False)
+    except Exception as e:
+        print(f"Error extracting text from {path}: {e}")
+        return None
+
+
+class StageTimer:
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.failed = 0
+        self.first = None
+        self.last = None
+
+    def record(self, ok=True):
+        now = time.monotonic()
+        self.first = self.first or now
+        self.last = now
+        if ok:
+            self.count += 1
+        else:
+            self.failed += 1
+
+    def start(self):
+        self.first = self.first or time.monotonic()
+
+    def report(self):
+        elapsed = (self.last - self.first) if self.first and self.last else 0.0
+        rate = self.count / elapsed if elapsed else 0.0
+        return f"{self.name:<10}{self.count:>8}{self.failed:>8}{elapsed:>12.1f}{rate:>12.2f}"
+
+
+def find_pdfs(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(".pdf"):
+                        yield os.path.abspath(os.path.join(root, name))
+        elif path.lower().endswith(".pdf"):
+            yield os.path.abspath(path)
+
+
+def hash_file(path):
+    with open(path, "rb") as pdf_file:
+        return file_hash(pdf_file.read())
+
+
+# Subset of `hashes` already stored on a candidate row (file or text hash)
+def stored_hashes(get_connection, hashes, chunk=500):
+    hashes = list(hashes)
+    found = set()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for offset in range(0, len(hashes), chunk):
+            found.update(existing_hashes(cursor, hashes[offset:offset + chunk]))
+    finally:
+        cursor.close()
+        conn.close()
+    return found
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as checkpoint:
+        return {line.rstrip("\n") for line in checkpoint if line.strip()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest PDF resumes into the candidates table.")
+    parser.add_argument("paths", nargs="+", help="PDF files or directories to scan recursively")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="PDF extraction processes")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="concurrent Gemini calls")
+    parser.add_argument("--rate", type=float, default=2.0, help="max Gemini calls started per second")
+    parser.add_argument("--llm-batch", type=int, default=5, help="resumes sent in one LLM request")
+    parser.add_argument("--batch-size", type=int, default=100, help="rows per insert transaction")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    args = parser.parse_args()
+
+    # Imported here so the extraction processes do not load the database pool and Gemini client
+    import db_pool
+    from llm_gateway import get_llm_gateway
+    from resume_ingest import extract_resumes_data, insert_resumes
+
+    def get_resume_db_connection():
+        return db_pool.get_connection("resume_db")
+
+    done = load_checkpoint(args.checkpoint)
+    pending = [path for path in dict.fromkeys(find_pdfs(args.paths)) if path not in done]
+    print(f"{len(pending)} PDFs to ingest ({len(done)} already in the checkpoint)")
+    if not pending:
+        return
+
+    os.makedirs(os.path.dirname(args.checkpoint) or ".", exist_ok=True)
+    # Every request the gateway sends (batches, per-document fallbacks and retries) waits its turn
+    gateway = get_llm_gateway().with_concurrency(args.llm_concurrency).with_rate_limit(args.rate)
+    extract_stage, llm_stage, insert_stage = StageTimer("extract"), StageTimer("llm"), StageTimer("insert")
+
+    # Files whose bytes are already stored (or repeat earlier files of this run) are never parsed
+    file_hashes = {}
+    for path in pending:
+        file_hashes.setdefault(hash_file(path), path)
+    known = stored_hashes(get_resume_db_connection, file_hashes)
+    duplicates = len(pending) - len(file_hashes) + len(known)
+    pending = [path for digest, path in file_hashes.items() if digest not in known]
+    path_hashes = {path: digest for digest, path in file_hashes.items()}
+    if duplicates:
+        print(f"Skipping {duplicates} PDFs already stored or repeated in this run")
+
+    # One LLM request covers up to --llm-batch resumes; texts already stored come back as None
+    # without an LLM call
+    def analyze(texts, hashes):
+        known = stored_hashes(get_resume_db_connection, hashes)
+        fresh = [i for i, digest in enumerate(hashes) if digest not in known]
+        results = [None] * len(texts)
+        if fresh:
+            fresh_texts = [texts[i] for i in fresh]
+            for i, data in zip(fresh, extract_resumes_data(fresh_texts, gateway, batch_size=args.llm_batch)):
+                results[i] = data
+        return results
+
+    batch = []
+
+    def flush(checkpoint):
+        if not batch:
+            return
+        insert_stage.start()
+        try:
+            insert_resumes([data for _, data in batch if data is not None])
+        except Exception as e:
+            print(f"Batch insert failed, {len(batch)} files will be retried next run: {e}")
+            for _ in batch:
+                insert_stage.record(ok=False)
+        else:
+            checkpoint.write("".join(f"{path}\n" for path, _ in batch))
+            checkpoint.flush()
+            for _ in batch:
+                insert_stage.record()
+        batch.clear()
+
+    with open(args.checkpoint, "a", encoding="utf-8") as checkpoint, \
+            ProcessPoolExecutor(max_workers=args.processes) as pdf_pool, \
+            ThreadPoolExecutor(max_workers=args.llm_concurrency) as llm_pool:
+        extract_stage.start()
+        text_futures = {pdf_pool.submit(extract_pdf_text, path): path for path in pending}
+        llm_futures = {}
+        extracted = []
+
+        def submit_llm():
+            if extracted:
+                llm_stage.start()
+                paths, texts = zip(*extracted)
+                hashes = [text_hash(text) for text in texts]
+                llm_futures[llm_pool.submit(analyze, list(texts), hashes)] = (paths, hashes)
+                extracted.clear()
+
+        # Texts go to the LLM threads as soon as a batch of them is extracted
+        for future in as_completed(text_futures):
+            path = text_futures[future]
+            text = future.result()
+            extract_stage.record(ok=bool(text))
+            if text:
+                extracted.append((path, text))
+                if len(extracted) >= args.llm_batch:
+                    submit_llm()
+        submit_llm()
+
+        for future in as_completed(llm_futures):
+            paths, hashes = llm_futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"LLM extraction failed for {len(paths)} files starting with {paths[0]}: {e}")
+                for _ in paths:
+                    llm_stage.record(ok=False)
+                continue
+            for path, digest, data in zip(paths, hashes, results):
+                if data is None:
+                    duplicates += 1
+                else:
+                    llm_stage.record()
+                    data.update(file_hash=path_hashes[path], text_hash=digest)
+                # Duplicates only go to the checkpoint
+                batch.append((path, data))
+            if len(batch) >= args.batch_size:
+                flush(checkpoint)
+        flush(checkpoint)
+
+    print(f"{'stage':<10}{'ok':>8}{'failed':>8}{'seconds':>12}{'files/s':>12}")
+    for stage in (extract_stage, llm_stage, insert_stage):
+        print(stage.report())
+    print(f"duplicates skipped: {duplicates}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
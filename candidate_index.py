@@ -0,0 +1,322 @@
+import contextlib
+import json
+import math
+import os
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, the in-process lock still applies
+    fcntl = None
+
+# Local index of candidate skills/experience used to shortlist candidates before the LLM
+CANDIDATE_INDEX_PATH = os.getenv("CANDIDATE_INDEX_PATH", ".cache/candidate_index.jsonl")
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "20"))
+# Seconds a missing candidate id is waited for before it is taken as never coming (see CandidateSync)
+SYNC_GAP_TIMEOUT = float(os.getenv("CANDIDATE_SYNC_GAP_TIMEOUT", "300"))
+
+# BM25 parameters. Candidate text is a skills list plus a job list, so repeated terms and
+# document length say little about relevance: saturate tf early and normalize length lightly.
+K1 = 0.5
+B = 0.3
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+def candidate_text(skills, experience):
+    return f"{skills or ''} {experience or ''}"
+
+
+# Sparse term-frequency vector of a candidate, computed once when the candidate is stored
+def term_counts(text):
+    counts = {}
+    for token in tokenize(text):
+        counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+# Sparse TF-IDF (BM25) vectors in an inverted index: a query only touches the postings of its
+# own terms. Vectors are appended as JSON lines to CANDIDATE_INDEX_PATH when insert_resume
+# stores a candidate, so the app that ranks candidates picks up rows written by the one storing them.
+class CandidateIndex:
+    def __init__(self, path=CANDIDATE_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+        with self._lock:
+            self._refresh()
+
+    def __len__(self):
+        return len(self._row_of)
+
+    # The ids, of those given, that have no vector yet
+    def unindexed(self, candidate_ids):
+        with self._lock:
+            self._refresh()
+            return [candidate_id for candidate_id in candidate_ids if candidate_id not in self._row_of]
+
+    def _reset(self):
+        self._vocab = {}
+        self._postings = []
+        self._doc_freq = []
+        self._row_terms = []
+        self._ids = []
+        self._lengths = []
+        self._alive = []
+        self._row_of = {}
+        self._total_length = 0
+        self._arrays = {}
+        self._row_arrays = None
+        self._file_key = None
+        self._offset = 0
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _apply(self, candidate_id, counts):
+        old_row = self._row_of.get(candidate_id)
+        if old_row is not None:
+            self._alive[old_row] = False
+            self._total_length -= self._lengths[old_row]
+            for term in self._row_terms[old_row]:
+                self._doc_freq[term] -= 1
+            self._row_terms[old_row] = ()
+        row = len(self._ids)
+        self._ids.append(candidate_id)
+        self._alive.append(True)
+        length = sum(counts.values())
+        self._lengths.append(length)
+        self._total_length += length
+        self._row_of[candidate_id] = row
+        terms = []
+        for token, count in counts.items():
+            term = self._vocab.get(token)
+            if term is None:
+                term = self._vocab[token] = len(self._postings)
+                self._postings.append(([], []))
+                self._doc_freq.append(0)
+            rows, tfs = self._postings[term]
+            rows.append(row)
+            tfs.append(count)
+            self._doc_freq[term] += 1
+            self._arrays.pop(term, None)
+            terms.append(term)
+        self._row_terms.append(terms)
+        self._row_arrays = None
+
+    # Pick up lines appended since the last refresh; a rewritten (compacted) file is re-read whole
+    def _refresh(self):
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        if (stat.st_dev, stat.st_ino) != self._file_key or stat.st_size < self._offset:
+            self._reset()
+            self._file_key = (stat.st_dev, stat.st_ino)
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, "rb") as index_file:
+            index_file.seek(self._offset)
+            data = index_file.read()
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                self._apply(entry["id"], entry["terms"])
+        self._offset += complete
+
+    def _compact(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as index_file:
+            for entry in self._live_vectors():
+                index_file.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.path)
+        self._reset()
+        self._refresh()
+
+    def _live_vectors(self):
+        terms_by_row = {}
+        for token, term in self._vocab.items():
+            rows, tfs = self._postings[term]
+            for row, count in zip(rows, tfs):
+                if self._alive[row]:
+                    terms_by_row.setdefault(row, {})[token] = count
+        for row in sorted(terms_by_row):
+            yield {"id": self._ids[row], "terms": terms_by_row[row]}
+
+    # items: iterable of (candidate_id, text); re-adding an id replaces its vector
+    def add_many(self, items):
+        lines = [json.dumps({"id": int(candidate_id), "terms": term_counts(text)}) for candidate_id, text in items]
+        if not lines:
+            return
+        with self._lock:
+            if not self.path:
+                for line in lines:
+                    entry = json.loads(line)
+                    self._apply(entry["id"], entry["terms"])
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._file_lock():
+                with open(self.path, "a", encoding="utf-8") as index_file:
+                    index_file.write("\n".join(lines) + "\n")
+                self._refresh()
+                # Rewrite the file once replaced vectors make up most of it
+                dead = len(self._ids) - len(self._row_of)
+                if dead > 1000 and dead > len(self._row_of):
+                    self._compact()
+
+    def add(self, candidate_id, text):
+        self.add_many([(candidate_id, text)])
+
+    def _term_arrays(self, term):
+        import numpy as np
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            rows, tfs = self._postings[term]
+            arrays = self._arrays[term] = (np.array(rows, dtype=np.int64), np.array(tfs, dtype=np.float32))
+        return arrays
+
+    # Top-k candidates for a job description, best first, as (id, score) pairs. numpy is only
+    # imported here, so importing tokenize (match_scores, the entry points) stays cheap.
+    def search(self, text, k=RAG_TOP_K):
+        import numpy as np
+        with self._lock:
+            self._refresh()
+            if not self._row_of or k <= 0:
+                return []
+            if self._row_arrays is None:
+                self._row_arrays = (np.array(self._lengths, dtype=np.float32), np.array(self._alive))
+            lengths, alive = self._row_arrays
+            live = len(self._row_of)
+            average_length = self._total_length / live or 1.0
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for token in set(tokenize(text)):
+                term = self._vocab.get(token)
+                if term is None:
+                    continue
+                rows, tfs = self._term_arrays(term)
+                doc_freq = self._doc_freq[term]
+                if not doc_freq:
+                    continue
+                idf = math.log(1.0 + (live - doc_freq + 0.5) / (doc_freq + 0.5))
+                norm = K1 * (1.0 - B + B * lengths[rows] / average_length)
+                scores[rows] += idf * tfs * (K1 + 1.0) / (tfs + norm)
+            scores[~alive] = 0.0
+            ids = self._ids
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+# Indexes candidates stored without going through insert_resume (app.py, bulk_ingest.py).
+# Auto-increment ids do not commit in order: a lower id's transaction can finish after a higher
+# id was indexed, and ids are skipped for good by INSERT IGNORE, rollbacks and deletes. So every
+# sync re-scans the ids above `floor`, the lowest id not seen yet, and an id still missing after
+# SYNC_GAP_TIMEOUT seconds (longer than any insert transaction) is given up on.
+# The floor and the gaps are saved next to the index file (<index path>.sync): otherwise every
+# restart would find the table's old gaps again and re-scan from the first of them for
+# SYNC_GAP_TIMEOUT seconds.
+class CandidateSync:
+    def __init__(self, index, gap_timeout=SYNC_GAP_TIMEOUT):
+        self.index = index
+        self.gap_timeout = gap_timeout
+        self.path = f"{index.path}.sync" if index.path else None
+        # Every id <= floor is indexed or known never to arrive
+        self.floor = 0
+        self._max_seen = 0
+        # missing id -> when it was first found missing
+        self._gaps = {}
+        self._saved = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as state_file:
+                state = json.load(state_file)
+        except (OSError, ValueError):
+            return
+        # An index rebuilt from scratch (its file deleted) no longer has the rows below the floor
+        if len(self.index) < state["indexed"]:
+            return
+        # Gap times are saved as wall-clock times, the timeout runs on the monotonic clock
+        offset = time.monotonic() - time.time()
+        self.floor, self._max_seen = state["floor"], state["max_seen"]
+        self._gaps = {int(candidate_id): since + offset for candidate_id, since in state["gaps"].items()}
+        self._saved = (self.floor, self._max_seen, sorted(self._gaps))
+
+    # Written only when the floor or the gaps changed, not on every sync
+    def _save(self):
+        current = (self.floor, self._max_seen, sorted(self._gaps))
+        if not self.path or current == self._saved:
+            return
+        offset = time.time() - time.monotonic()
+        state = {"floor": self.floor, "max_seen": self._max_seen, "indexed": len(self.index),
+                 "gaps": {str(candidate_id): since + offset for candidate_id, since in self._gaps.items()}}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as state_file:
+                json.dump(state, state_file)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            return
+        self._saved = current
+
+    # cursor: a dictionary cursor on resume_db
+    def sync(self, cursor):
+        with self._lock:
+            cursor.execute("SELECT id FROM candidates WHERE id > %s", (self.floor,))
+            present = {row["id"] for row in cursor.fetchall()}
+            missing = self.index.unindexed(sorted(present))
+            for offset in range(0, len(missing), 1000):
+                chunk = missing[offset:offset + 1000]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f"SELECT id, skills, experience_years FROM candidates WHERE id IN ({placeholders})",
+                               chunk)
+                self.index.add_many((row["id"], candidate_text(row["skills"], row["experience_years"]))
+                                    for row in cursor.fetchall())
+
+            now = time.monotonic()
+            top = max(present, default=self._max_seen)
+            for candidate_id in range(max(self._max_seen, self.floor) + 1, top + 1):
+                if candidate_id not in present:
+                    self._gaps[candidate_id] = now
+            self._max_seen = max(self._max_seen, top)
+            self._gaps = {candidate_id: since for candidate_id, since in self._gaps.items()
+                          if candidate_id not in present and now - since < self.gap_timeout}
+            self.floor = min(self._gaps) - 1 if self._gaps else self._max_seen
+            self._save()
+            return len(missing)
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_candidate_index():
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = CandidateIndex()
+        return _default_index
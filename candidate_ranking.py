@@ -0,0 +1,169 @@
+# Map-reduce ranking of a large candidate pool with the LLM, for when the pool does not fit one
+# prompt (llama3-8b-8192 has an 8192-token context).
+#
+#   map:    candidates are packed, in retrieval order, into shards that fit RANK_SHARD_TOKENS
+#           using a compact one-line encoding; every shard asks the LLM for its best
+#           RANK_SHARD_SHORTLIST candidates. Shards run concurrently, at most RANK_PARALLELISM
+#           at a time per ranker, on a limit of their own rather than LLM_MAX_CONCURRENCY. Keep
+#           one ranker per process (test.get_ranker), so concurrent rankings share that limit.
+#   reduce: the shortlists are merged; while more than RANK_FINALISTS remain, the survivors go
+#           through another map round. The finalists are then ranked in one final call
+#           (test.rank_candidates_with_llm), which writes the top-5 summary.
+#
+# Each round takes about one shard's latency when RANK_PARALLELISM covers its shards, and every
+# round shrinks the pool by shard size / shortlist size.
+import concurrent.futures
+import contextvars
+import datetime
+import logging
+import os
+import re
+import tracing
+from llm_gateway import GROQ_MODEL
+
+logger = logging.getLogger(__name__)
+
+RANK_MODE = os.getenv("RANK_MODE", "shortlist")  # "shortlist" (RAG_TOP_K to one call) or "map_reduce"
+RANK_MAX_CANDIDATES = int(os.getenv("RANK_MAX_CANDIDATES", "20000"))
+RANK_CONTEXT_TOKENS = int(os.getenv("RANK_CONTEXT_TOKENS", "8192"))
+RANK_SHARD_TOKENS = int(os.getenv("RANK_SHARD_TOKENS", "5000"))
+RANK_SHARD_SHORTLIST = int(os.getenv("RANK_SHARD_SHORTLIST", "5"))
+RANK_FINALISTS = int(os.getenv("RANK_FINALISTS", "20"))
+RANK_PARALLELISM = int(os.getenv("RANK_PARALLELISM", "16"))
+# Room left in the context for the reply (a short JSON list)
+RANK_OUTPUT_TOKENS = 256
+# Characters of the latest role kept per candidate in the compact encoding
+ROLE_CHARS = 40
+JOB_DESCRIPTION_CHARS = 2000
+
+SHARD_INSTRUCTION = """You are a recruitment assistant screening candidates for this job:
+
+{job_description}
+
+Candidates, one per line as number|skills|years of experience and latest role|retention rate (years per employer):
+{candidates}
+
+Pick the {shortlist} candidates that fit the job best, considering skills first, then
+experience and retention rate. Leave out candidates that do not fit at all."""
+
+SHARD_SCHEMA = {"numbers": ("array", "line numbers of the chosen candidates, best first")}
+
+
+# Conservative for llama3's tokenizer on comma-separated skill lists (about 3 characters a token)
+def estimate_tokens(text):
+    return len(text) // 3 + 1
+
+
+def _clip(text, limit):
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+_YEAR = re.compile(r"\b(19[5-9]\d|20\d\d)\b")
+_ONGOING = re.compile(r"\b(present|current|now)\b", re.I)
+
+
+# "Data Scientist, Careem (2021 - Present), Data Analyst, IBM (2018 - 2021)" -> "6y Data Scientist, Careem"
+def summarize_experience(text):
+    text = " ".join(str(text or "").split())
+    years = [int(year) for year in _YEAR.findall(text)]
+    if years and _ONGOING.search(text):
+        years.append(datetime.date.today().year)
+    span = f"{max(years) - min(years)}y " if len(years) > 1 else ""
+    return span + _clip(text.split("(")[0].strip(" ,"), ROLE_CHARS)
+
+
+# number|skills|experience|retention: skills deduplicated, work history summarized, no labels
+def encode_candidate(number, candidate):
+    skills = ",".join(dict.fromkeys(skill.strip() for skill in str(candidate.get("skills") or "").split(",")
+                                    if skill.strip()))
+    experience = summarize_experience(candidate.get("experience_years")).replace("|", "/")
+    retention = candidate.get("retention_rate")
+    return f"{number}|{skills.replace('|', '/')}|{experience}|{'' if retention is None else retention}"
+
+
+def shard_prompt(job_description, lines, shortlist):
+    return SHARD_INSTRUCTION.format(job_description=_clip(job_description, JOB_DESCRIPTION_CHARS),
+                                    candidates="\n".join(lines), shortlist=shortlist)
+
+
+# Consecutive runs of candidates whose encoded lines fit the token budget left by the prompt
+def pack_shards(job_description, candidates, shard_tokens=RANK_SHARD_TOKENS,
+                context_tokens=RANK_CONTEXT_TOKENS, shortlist=RANK_SHARD_SHORTLIST):
+    overhead = estimate_tokens(shard_prompt(job_description, [], shortlist)) + RANK_OUTPUT_TOKENS + 64
+    budget = max(1, min(shard_tokens, context_tokens - overhead))
+    shards, shard, used = [], [], 0
+    for candidate in candidates:
+        tokens = estimate_tokens(encode_candidate(len(shard) + 1, candidate)) + 1
+        if shard and used + tokens > budget:
+            shards.append(shard)
+            shard, used = [], 0
+        shard.append(candidate)
+        used += tokens
+    if shard:
+        shards.append(shard)
+    return shards
+
+
+class MapReduceRanker:
+    def __init__(self, gateway, model=GROQ_MODEL, shard_tokens=RANK_SHARD_TOKENS,
+                 context_tokens=RANK_CONTEXT_TOKENS, shortlist=RANK_SHARD_SHORTLIST,
+                 finalists=RANK_FINALISTS, parallelism=RANK_PARALLELISM):
+        self.parallelism = max(1, parallelism)
+        self.gateway = gateway.with_concurrency(self.parallelism)
+        self.model = model
+        self.shard_tokens = shard_tokens
+        self.context_tokens = context_tokens
+        self.shortlist = shortlist
+        self.finalists = finalists
+
+    # The shard's picks, best first. A failed call or an unusable reply keeps the shard's first
+    # candidates in retrieval order, so one bad shard never fails the whole ranking. Not cached:
+    # a shard prompt is specific to one job and one slice of the pool.
+    def _rank_shard(self, job_description, shard):
+        lines = [encode_candidate(number, candidate) for number, candidate in enumerate(shard, start=1)]
+        try:
+            result = self.gateway.generate_json(shard_prompt(job_description, lines, self.shortlist),
+                                                SHARD_SCHEMA, model=self.model, cache=False)
+            picks = []
+            for number in result.get("numbers") or []:
+                try:
+                    index = int(number) - 1
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= index < len(shard) and index not in picks:
+                    picks.append(index)
+            if picks:
+                return [shard[index] for index in picks[:self.shortlist]]
+            logger.warning("Shard ranking picked nobody, keeping retrieval order",
+                           extra=tracing.fields(candidates=len(shard)))
+        except Exception as e:
+            logger.warning("Shard ranking failed, keeping retrieval order",
+                           extra=tracing.fields(candidates=len(shard), error=str(e)))
+        return shard[:self.shortlist]
+
+    def _map(self, job_description, shards, executor):
+        # Each shard call runs in the request's context, so its llm.call span joins the request trace
+        futures = [executor.submit(contextvars.copy_context().run, self._rank_shard, job_description, shard)
+                   for shard in shards]
+        return [future.result() for future in futures]
+
+    # Candidate dicts (id, name, skills, experience_years, retention_rate) in retrieval order ->
+    # at most `finalists` of them, for the final ranking call
+    def reduce(self, job_description, candidates):
+        pool = list(candidates)
+        rounds = 0
+        with concurrent.futures.ThreadPoolExecutor(self.parallelism, thread_name_prefix="rank-shard") as executor:
+            while len(pool) > self.finalists:
+                shards = pack_shards(job_description, pool, self.shard_tokens, self.context_tokens, self.shortlist)
+                rounds += 1
+                with tracing.span("rank.round", round=rounds, candidates=len(pool), shards=len(shards)):
+                    shortlists = self._map(job_description, shards, executor)
+                # Interleave the shortlists (every shard's best first) so trimming to `finalists`
+                # keeps each shard's top picks rather than the first shards' whole lists
+                merged = [shortlist[rank] for rank in range(self.shortlist)
+                          for shortlist in shortlists if rank < len(shortlist)]
+                if len(merged) >= len(pool):
+                    break
+                pool = merged
+        return pool[:self.finalists]
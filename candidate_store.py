@@ -0,0 +1,290 @@
+# Typed candidate schema shared by test1.py and app.py, with a skills dictionary and a
+# candidate_skills junction table so skill filters are index lookups instead of string scans.
+#
+#   python candidate_store.py --database resume_db --batch-size 1000   # migrate and backfill
+import argparse
+import re
+import sys
+import threading
+import time
+from resume_parser import SKILLS
+
+MIGRATION_BATCH_SIZE = 1000
+CANDIDATE_PAGE_SIZE = 50
+
+# Columns returned for a candidate (find_candidates here, resume_dedup.find_candidate)
+CANDIDATE_COLUMNS = "id, name, email, skills, experience_years, retention_rate"
+
+# skills keeps the comma-joined display string (candidate index, match scores, templates);
+# experience_years holds the work-experience lines and retention_rate the average tenure in years
+CANDIDATES_DDL = '''
+    CREATE TABLE IF NOT EXISTS candidates (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(255),
+        email VARCHAR(255),
+        skills TEXT,
+        experience_years TEXT,
+        retention_rate FLOAT NULL,
+        KEY idx_candidates_retention (retention_rate)
+    )
+'''
+
+SKILLS_DDL = '''
+    CREATE TABLE IF NOT EXISTS skills (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        normalized VARCHAR(100) NOT NULL,
+        UNIQUE KEY uq_skills_normalized (normalized)
+    )
+'''
+
+# (skill_id, candidate_id) serves "who has skill X"; the candidate_id key serves "skills of candidate"
+CANDIDATE_SKILLS_DDL = '''
+    CREATE TABLE IF NOT EXISTS candidate_skills (
+        candidate_id INT NOT NULL,
+        skill_id INT NOT NULL,
+        PRIMARY KEY (skill_id, candidate_id),
+        KEY idx_candidate_skills_candidate (candidate_id)
+    )
+'''
+
+# Seconds find_candidates trusts its last look at the retention_rate column type
+SCHEMA_CHECK_INTERVAL = 60.0
+
+NUMERIC_TYPES = {"float", "double", "decimal", "int", "bigint", "smallint", "tinyint", "mediumint"}
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_CANONICAL_SKILLS = {skill.lower(): skill for skill in SKILLS}
+
+
+def normalize_skill(name):
+    return _WHITESPACE.sub(" ", str(name)).strip(" .,;:-\t\n\"'").lower()[:100]
+
+
+# Display name: the resume_parser spelling for known skills, otherwise as written
+def skill_display_name(name):
+    normalized = normalize_skill(name)
+    return _CANONICAL_SKILLS.get(normalized, _WHITESPACE.sub(" ", str(name)).strip(" .,;:-\t\n\"'")[:100])
+
+
+# Skills as stored in candidates.skills (", "-joined)
+def split_skills(skills):
+    if isinstance(skills, (list, tuple)):
+        return [skill for skill in skills if normalize_skill(skill)]
+    return [skill for skill in str(skills or "").split(",") if normalize_skill(skill)]
+
+
+# "3.5", "3.5 years", 3.5 -> 3.5; anything without a number -> None
+def parse_retention(value):
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None else float(value)
+    match = _NUMBER.search(str(value))
+    return float(match.group(0)) if match else None
+
+
+def _columns(cursor, table):
+    cursor.execute("""
+        SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return {name: data_type.lower() for name, data_type in cursor.fetchall()}
+
+
+def _indexes(cursor, table):
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+# Called from initialize_database: creates the tables, and brings a table created by the
+# old DDLs (TEXT or INT columns) to the typed layout. Existing rows are converted in batches
+# by migrate().
+def ensure_candidate_schema(cursor):
+    cursor.execute(CANDIDATES_DDL)
+    cursor.execute(SKILLS_DDL)
+    cursor.execute(CANDIDATE_SKILLS_DDL)
+    columns = _columns(cursor, "candidates")
+    # app.py used to create experience_years as INT; it holds work-experience text
+    if columns.get("experience_years") in NUMERIC_TYPES:
+        cursor.execute("ALTER TABLE candidates MODIFY experience_years TEXT")
+    if columns.get("retention_rate") not in NUMERIC_TYPES and "retention_rate_num" not in columns:
+        cursor.execute("ALTER TABLE candidates ADD COLUMN retention_rate_num FLOAT NULL")
+
+
+# Thread-safe normalized name -> id cache; the skills dictionary only grows
+_skill_ids = {}
+_skill_ids_lock = threading.Lock()
+
+
+# remember=False for skills inserted by the current, not yet committed transaction
+def _lookup_skill_ids(cursor, normalized, remember=True):
+    found = {name: _skill_ids[name] for name in normalized if name in _skill_ids}
+    missing = [name for name in normalized if name not in found]
+    if missing:
+        placeholders = ", ".join(["%s"] * len(missing))
+        cursor.execute(f"SELECT normalized, id FROM skills WHERE normalized IN ({placeholders})", missing)
+        rows = [(row["normalized"], row["id"]) if isinstance(row, dict) else tuple(row) for row in cursor.fetchall()]
+        found.update(rows)
+        if remember:
+            with _skill_ids_lock:
+                _skill_ids.update(rows)
+    return found
+
+
+# {normalized name: skill id}, adding unknown skills to the dictionary
+def skill_ids(cursor, names):
+    display = {}
+    for name in names:
+        normalized = normalize_skill(name)
+        if normalized:
+            display.setdefault(normalized, skill_display_name(name))
+    if not display:
+        return {}
+    ids = _lookup_skill_ids(cursor, list(display))
+    new = [(display[name], name) for name in display if name not in ids]
+    if new:
+        cursor.executemany("INSERT IGNORE INTO skills (name, normalized) VALUES (%s, %s)", new)
+        ids.update(_lookup_skill_ids(cursor, [name for _, name in new], remember=False))
+    return ids
+
+
+# links: iterable of (candidate_id, skills) with skills as a list or the stored string
+def link_skills(cursor, links):
+    links = [(candidate_id, split_skills(skills)) for candidate_id, skills in links]
+    ids = skill_ids(cursor, [skill for _, skills in links for skill in skills])
+    rows = {(candidate_id, ids[normalize_skill(skill)])
+            for candidate_id, skills in links for skill in skills if normalize_skill(skill) in ids}
+    if rows:
+        cursor.executemany("INSERT IGNORE INTO candidate_skills (candidate_id, skill_id) VALUES (%s, %s)",
+                           sorted(rows))
+
+
+# Converts existing rows batch by batch (each batch is its own transaction, so the table is
+# never locked for the whole run and an interrupted migration just resumes):
+#   - parses the TEXT retention_rate into retention_rate_num, then swaps the columns
+#   - fills candidate_skills from the comma-joined skills column
+def migrate(conn, batch_size=MIGRATION_BATCH_SIZE, log=print):
+    cursor = conn.cursor()
+    try:
+        ensure_candidate_schema(cursor)
+        conn.commit()
+        columns = _columns(cursor, "candidates")
+        convert_retention = "retention_rate_num" in columns
+
+        last_id, migrated = 0, 0
+        while True:
+            cursor.execute(
+                "SELECT id, skills, retention_rate FROM candidates WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            link_skills(cursor, [(candidate_id, skills) for candidate_id, skills, _ in rows])
+            if convert_retention:
+                cursor.executemany(
+                    "UPDATE candidates SET retention_rate_num = %s WHERE id = %s",
+                    [(parse_retention(retention), candidate_id) for candidate_id, _, retention in rows]
+                )
+            conn.commit()
+            last_id = rows[-1][0]
+            migrated += len(rows)
+            log(f"Migrated {migrated} candidates (up to id {last_id})")
+
+        if convert_retention:
+            # Rows inserted during the run still carry their value in the TEXT column
+            cursor.execute("SELECT id, retention_rate FROM candidates WHERE id > %s", (last_id,))
+            late = cursor.fetchall()
+            if late:
+                cursor.executemany("UPDATE candidates SET retention_rate_num = %s WHERE id = %s",
+                                   [(parse_retention(retention), candidate_id) for candidate_id, retention in late])
+            cursor.execute("ALTER TABLE candidates DROP COLUMN retention_rate")
+            # CHANGE COLUMN rather than RENAME COLUMN, which needs MySQL 8.0
+            cursor.execute("ALTER TABLE candidates CHANGE COLUMN retention_rate_num retention_rate FLOAT NULL")
+        if "idx_candidates_retention" not in _indexes(cursor, "candidates"):
+            cursor.execute("CREATE INDEX idx_candidates_retention ON candidates (retention_rate)")
+        conn.commit()
+        return migrated
+    finally:
+        cursor.close()
+
+
+_retention_check = {"expression": None, "checked_at": 0.0}
+
+
+# Until migrate() has swapped the columns, retention_rate is the legacy TEXT column, where
+# '10' < '2': filter and sort on its numeric value then (without idx_candidates_retention)
+def _retention_expression(cursor):
+    now = time.monotonic()
+    if _retention_check["expression"] is None or now - _retention_check["checked_at"] > SCHEMA_CHECK_INTERVAL:
+        legacy = _columns(cursor, "candidates").get("retention_rate") not in NUMERIC_TYPES
+        _retention_check["expression"] = "CAST(c.retention_rate AS DECIMAL(10, 2))" if legacy else "c.retention_rate"
+        _retention_check["checked_at"] = now
+    return _retention_check["expression"]
+
+
+# Candidates having every skill in `skills` and retention_rate >= min_retention, highest
+# retention first (dictionary cursor). The skill filter reads only the (skill_id, candidate_id)
+# primary key; the retention filter and order use idx_candidates_retention.
+def find_candidates(cursor, skills=(), min_retention=None, limit=CANDIDATE_PAGE_SIZE, offset=0,
+                    columns=CANDIDATE_COLUMNS):
+    normalized = list(dict.fromkeys(normalize_skill(skill) for skill in skills if normalize_skill(skill)))
+    columns = ", ".join(f"c.{column.strip()}" for column in columns.split(","))
+    retention = _retention_expression(cursor)
+    conditions, params = [], []
+    if min_retention is not None:
+        conditions.append(f"{retention} >= %s")
+        params.append(float(min_retention))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    if not normalized:
+        cursor.execute(f"""
+            SELECT {columns} FROM candidates c {where}
+            ORDER BY {retention} DESC, c.id DESC
+            LIMIT %s OFFSET %s
+        """, (*params, limit, offset))
+        return cursor.fetchall()
+
+    ids = _lookup_skill_ids(cursor, normalized)
+    if len(ids) < len(normalized):
+        # A skill nobody has: no candidate can have all of them
+        return []
+    placeholders = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"""
+        SELECT {columns}
+        FROM (
+            SELECT candidate_id FROM candidate_skills
+            WHERE skill_id IN ({placeholders})
+            GROUP BY candidate_id
+            HAVING COUNT(*) = %s
+        ) matched
+        JOIN candidates c ON c.id = matched.candidate_id
+        {where}
+        ORDER BY {retention} DESC, c.id DESC
+        LIMIT %s OFFSET %s
+    """, (*ids.values(), len(ids), *params, limit, offset))
+    return cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate candidates to the typed, skill-indexed schema.")
+    parser.add_argument("--database", default="resume_db")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    import db_pool
+    load_dotenv()
+    conn = db_pool.get_connection(args.database)
+    try:
+        migrated = migrate(conn, args.batch_size)
+    finally:
+        conn.close()
+    print(f"Done: {migrated} candidates migrated")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
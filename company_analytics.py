@@ -0,0 +1,192 @@
+# Precomputed analytics over REVIEWS.csv for the employer API (test.py /analytics/*).
+#
+# Everything a query needs is built once per load of the reviews DataFrame:
+#   - one JSON-ready record per company
+#   - per metric (rating, reviews, salaries, jobs), the companies sorted by value, overall and
+#     within every industry and size bucket -> top-N is a slice, a value range is two bisects
+#   - per group (industry, size), count / mean / median / min / max of every metric
+# so a request does dictionary lookups and list slicing, never a DataFrame pass.
+import bisect
+import threading
+
+# API name -> REVIEWS.csv column (Reviews / Salaries / Jobs are the parsed "158.8K"-style counts)
+METRICS = {"rating": "Rating", "reviews": "Reviews", "salaries": "Salaries", "jobs": "Jobs"}
+GROUPS = {"industry": "Industry", "size": "Company_Size"}
+STATS = ("count", "mean", "median", "min", "max")
+ANALYTICS_MAX_LIMIT = 200
+ANALYTICS_DEFAULT_LIMIT = 20
+
+
+def _group_key(value):
+    return str(value).strip().lower()
+
+
+def _number(value, digits):
+    if value is None or value != value:
+        return None
+    return round(float(value), digits) if digits else int(value)
+
+
+def _record(row):
+    record = {
+        "company": row["Company"],
+        "rating": _number(row["Rating"], 2),
+        "reviews": _number(row["Reviews"], 0),
+        "salaries": _number(row["Salaries"], 0),
+        "jobs": _number(row["Jobs"], 0),
+        "size": None if row["Company_Size"] != row["Company_Size"] else str(row["Company_Size"]),
+        "industry": None if row["Industry"] != row["Industry"] else str(row["Industry"]),
+    }
+    if "Sentiment" in row:
+        record["sentiment"] = str(row["Sentiment"])
+    return record
+
+
+# (values ascending, row numbers in the same order); companies without a value are left out
+class SortedColumn:
+    __slots__ = ("values", "rows")
+
+    def __init__(self, pairs):
+        pairs = sorted(pairs)
+        self.values = [value for value, _ in pairs]
+        self.rows = [row for _, row in pairs]
+
+    def top(self, limit, ascending=False):
+        if ascending:
+            return self.rows[:limit]
+        return self.rows[:-limit - 1:-1] if limit else []
+
+    # rows[start:stop] have low <= value <= high (either bound optional)
+    def bounds(self, low=None, high=None):
+        start = 0 if low is None else bisect.bisect_left(self.values, low)
+        stop = len(self.values) if high is None else bisect.bisect_right(self.values, high)
+        return start, max(start, stop)
+
+
+# data: the typed frame from reviews_loader.load_reviews (optionally with the Sentiment column)
+class CompanyAnalytics:
+    def __init__(self, data):
+        self.records = [_record(row) for row in data.to_dict("records")]
+        # Sorted on the rounded record values: the float32 columns widened to float would put
+        # 4.4 at 4.4000001 and a range query for exactly 4.4 would miss it
+        metric_columns = {metric: [record[metric] for record in self.records] for metric in METRICS}
+
+        self._columns = {}
+        for metric, values in metric_columns.items():
+            self._columns[(metric, None, None)] = SortedColumn(
+                (value, row) for row, value in enumerate(values) if value is not None
+            )
+
+        self._aggregates = {}
+        for group, column in GROUPS.items():
+            members = {}
+            for row, value in enumerate(data[column].astype(object)):
+                if value is None or value != value:
+                    continue
+                members.setdefault(_group_key(value), []).append(row)
+            for key, rows in members.items():
+                for metric, values in metric_columns.items():
+                    self._columns[(metric, group, key)] = SortedColumn(
+                        (values[row], row) for row in rows if values[row] is not None
+                    )
+            self._aggregates[group] = self._aggregate(data, group, column)
+
+    @staticmethod
+    def _aggregate(data, group, column):
+        columns = list(METRICS.values())
+        grouped = data.groupby(column, observed=True, sort=True)[columns]
+        stats = {name: getattr(grouped, name)() for name in STATS}
+        sizes = grouped.size()
+        rows = []
+        for value in stats["count"].index:
+            row = {group: str(value), "companies": int(sizes[value])}
+            for metric, metric_column in METRICS.items():
+                digits = 2 if metric == "rating" else 1
+                row[metric] = {name: _number(stats[name].at[value, metric_column], 0 if name == "count" else digits)
+                               for name in STATS}
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def _check(metric=None, group=None):
+        if metric is not None and metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {', '.join(METRICS)}")
+        if group is not None and group not in GROUPS:
+            raise ValueError(f"Unknown group '{group}', expected one of {', '.join(GROUPS)}")
+
+    def _column(self, metric, filters):
+        self._check(metric)
+        filters = [(group, _group_key(value)) for group, value in (filters or {}).items() if value]
+        for group, _ in filters:
+            self._check(group=group)
+        if not filters:
+            return self._column_for(metric, None, None), None
+        # The first filter picks the presorted column, any further one is checked per row
+        (group, key), rest = filters[0], filters[1:]
+        keep = None
+        if rest:
+            wanted = {(other, other_key) for other, other_key in rest}
+
+            def keep(row):
+                record = self.records[row]
+                return all(_group_key(record[other]) == other_key for other, other_key in wanted)
+        return self._column_for(metric, group, key), keep
+
+    def _column_for(self, metric, group, key):
+        return self._columns.get((metric, group, key)) or SortedColumn([])
+
+    # Best (or worst, ascending=True) companies by metric, optionally within an industry / size bucket
+    def top(self, metric, limit=ANALYTICS_DEFAULT_LIMIT, filters=None, ascending=False):
+        column, keep = self._column(metric, filters)
+        if keep is None:
+            rows = column.top(limit, ascending)
+        else:
+            ordered = column.rows if ascending else reversed(column.rows)
+            rows = []
+            for row in ordered:
+                if keep(row):
+                    rows.append(row)
+                    if len(rows) == limit:
+                        break
+        return [self.records[row] for row in rows]
+
+    # Companies with low <= metric <= high, ascending; returns (total matches, one page)
+    def between(self, metric, low=None, high=None, limit=ANALYTICS_DEFAULT_LIMIT, offset=0, filters=None):
+        column, keep = self._column(metric, filters)
+        start, stop = column.bounds(low, high)
+        if keep is None:
+            rows = column.rows[min(start + offset, stop):min(start + offset + limit, stop)]
+            return stop - start, [self.records[row] for row in rows]
+        rows = [row for row in column.rows[start:stop] if keep(row)]
+        return len(rows), [self.records[row] for row in rows[offset:offset + limit]]
+
+    # Per industry / size bucket aggregates, optionally ordered by one metric's statistic
+    def group_by(self, group, metric=None, stat="mean", descending=True):
+        self._check(metric, group)
+        rows = self._aggregates[group]
+        if metric is None:
+            return rows
+        if stat not in STATS:
+            raise ValueError(f"Unknown statistic '{stat}', expected one of {', '.join(STATS)}")
+        present = [row for row in rows if row[metric][stat] is not None]
+        missing = [row for row in rows if row[metric][stat] is None]
+        return sorted(present, key=lambda row: row[metric][stat], reverse=descending) + missing
+
+
+# Analytics for whatever a CompanyIndex currently holds: rebuilt (once) after the index reloads
+# REVIEWS.csv, so both always describe the same data
+class IndexedAnalytics:
+    def __init__(self, company_index):
+        self.company_index = company_index
+        self._lock = threading.Lock()
+        self._data = None
+        self._analytics = None
+
+    def current(self):
+        data = self.company_index.snapshot()
+        if data is not self._data:
+            with self._lock:
+                if data is not self._data:
+                    self._analytics = CompanyAnalytics(data)
+                    self._data = data
+        return self._analytics
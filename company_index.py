@@ -0,0 +1,151 @@
+import bisect
+import collections
+import difflib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# How often (seconds) the index checks whether the CSV changed on disk
+RELOAD_CHECK_INTERVAL = float(os.getenv("COMPANY_INDEX_RELOAD_INTERVAL", "5"))
+FUZZY_CUTOFF = 0.8
+# Match quality reported by CompanyIndex.find
+EXACT = "exact"
+FUZZY = "fuzzy"
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+# "McDonald's" / "Mcdonalds" / "MCDONALDS" -> "mcdonalds", "L'Oréal" -> "loreal"
+def normalize_company_name(name):
+    name = unicodedata.normalize("NFKD", str(name))
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = name.lower().replace("&", "and")
+    return _NON_ALNUM.sub("", name)
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Everything one build of the index produced; replaced as a whole on reload, never mutated
+_IndexState = collections.namedtuple("_IndexState", "data exact sorted_keys grams empty mtime")
+
+
+class CompanyIndex:
+    def __init__(self, filepath, loader=None):
+        self.filepath = filepath
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._state = self._build()
+
+    def _build(self):
+        mtime = os.path.getmtime(self.filepath)
+        if self.loader is None:
+            import pandas as pd
+            self.loader = pd.read_csv
+        data = self.loader(self.filepath)
+
+        exact = {}
+        grams = {}
+        for row, name in enumerate(data["Company"].astype(str)):
+            key = normalize_company_name(name)
+            if not key or key in exact:
+                continue
+            exact[key] = row
+            for gram in _trigrams(key):
+                grams.setdefault(gram, []).append(key)
+        return _IndexState(data, exact, sorted(exact), grams, data.iloc[0:0], mtime)
+
+    # Rebuild when REVIEWS.csv changes (checked at most every RELOAD_CHECK_INTERVAL seconds).
+    # Returns the state to answer from: every lookup reads self._state once, so a reload running
+    # alongside never pairs row positions of one build with the DataFrame of another.
+    def _current(self):
+        now = time.monotonic()
+        if now - self._last_check >= RELOAD_CHECK_INTERVAL:
+            with self._lock:
+                if now - self._last_check >= RELOAD_CHECK_INTERVAL:
+                    self._last_check = now
+                    try:
+                        changed = os.path.getmtime(self.filepath) != self._state.mtime
+                    except OSError:
+                        changed = False
+                    if changed:
+                        try:
+                            self._state = self._build()
+                        except Exception as e:
+                            logger.error("Error reloading %s: %s", self.filepath, e)
+        return self._state
+
+    @property
+    def data(self):
+        return self._state.data
+
+    # The current DataFrame, reloaded first if REVIEWS.csv changed (a new object after each reload)
+    def snapshot(self):
+        return self._current().data
+
+    @staticmethod
+    def _rows(state, keys):
+        if not keys:
+            return state.empty
+        return state.data.iloc[[state.exact[key] for key in keys]]
+
+    # O(1) lookup on the normalized name
+    def exact(self, company_name):
+        state = self._current()
+        key = normalize_company_name(company_name)
+        return self._rows(state, [key] if key in state.exact else [])
+
+    # O(log n + limit) lookup of every company whose normalized name starts with the prefix
+    def prefix(self, company_name, limit=10):
+        state = self._current()
+        key = normalize_company_name(company_name)
+        if not key:
+            return state.empty
+        keys = state.sorted_keys
+        start = bisect.bisect_left(keys, key)
+        matches = []
+        for candidate in keys[start:start + limit]:
+            if not candidate.startswith(key):
+                break
+            matches.append(candidate)
+        return self._rows(state, matches)
+
+    # Closest names by similarity; only names sharing trigrams with the query are compared
+    def fuzzy(self, company_name, limit=5, cutoff=FUZZY_CUTOFF):
+        return self._fuzzy(self._current(), company_name, limit, cutoff)
+
+    def _fuzzy(self, state, company_name, limit=5, cutoff=FUZZY_CUTOFF):
+        key = normalize_company_name(company_name)
+        if not key:
+            return state.empty
+        shared = {}
+        for gram in _trigrams(key):
+            for candidate in state.grams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        shortlist = sorted(shared, key=shared.get, reverse=True)[:50]
+        scored = []
+        for candidate in shortlist:
+            score = difflib.SequenceMatcher(None, key, candidate).ratio()
+            if score >= cutoff:
+                scored.append((score, candidate))
+        scored.sort(reverse=True)
+        return self._rows(state, [candidate for _, candidate in scored[:limit]])
+
+    # (rows, match): the exact match (match "exact"), else the single best fuzzy match ("fuzzy"),
+    # else no rows (None). Callers that store data under the company decide whether a fuzzy
+    # match is good enough.
+    def find(self, company_name):
+        state = self._current()
+        key = normalize_company_name(company_name)
+        if key in state.exact:
+            return self._rows(state, [key]), EXACT
+        company_data = self._fuzzy(state, company_name, limit=1)
+        return company_data, (None if company_data.empty else FUZZY)
@@ -0,0 +1,303 @@
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+import mysql.connector
+from dotenv import load_dotenv
+import tracing
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Storage backend: "mysql" (MYSQL_HOST / MYSQL_USER / MYSQL_PASSWORD) or "sqlite" (embedded,
+# files in SQLITE_DIR, see sqlite_store.py)
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+
+# Pool configuration (override through the environment / .env)
+POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "10"))
+# Idle connections older than this are pinged before being handed out
+HEALTH_CHECK_INTERVAL = float(os.getenv("MYSQL_POOL_HEALTH_CHECK", "30"))
+
+
+class PoolExhausted(mysql.connector.Error):
+    pass
+
+
+# Errors that go away by themselves (server down or restarting, pool busy): worth retrying later
+RETRYABLE_ERRORS = (mysql.connector.OperationalError, mysql.connector.InterfaceError, PoolExhausted)
+
+
+# A PooledConnection dropped without close() (an exception before the caller's close, say):
+# its connection goes back to the pool when the wrapper is garbage collected
+def _reclaim(pool, conn):
+    logger.warning("Connection not closed, returned to the pool by the garbage collector",
+                   extra=tracing.fields(database=pool.database))
+    pool._release(conn)
+
+
+# Wraps a raw connection so that close() (or leaving a `with` block) hands it back to its pool
+class PooledConnection:
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._finalizer = weakref.finalize(self, _reclaim, pool, conn)
+        # At exit the pools go away with the process; nothing to hand back
+        self._finalizer.atexit = False
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise mysql.connector.InterfaceError("Connection already returned to the pool.")
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        if self._conn is None:
+            raise mysql.connector.InterfaceError("Connection already returned to the pool.")
+        cursor = self._conn.cursor(*args, **kwargs)
+        return TracedCursor(cursor) if tracing.TRACING else cursor
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._finalizer.detach()
+            self._pool._release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Times execute/executemany as "db.query" spans labelled with the statement keyword
+class TracedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        with tracing.span("db.query", op=operation.lstrip().split(None, 1)[0].upper()):
+            return self._cursor.execute(operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        with tracing.span("db.query", op=operation.lstrip().split(None, 1)[0].upper(), many=True):
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+
+
+class ConnectionPool:
+    def __init__(self, database, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 health_check_interval=HEALTH_CHECK_INTERVAL):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._last_used = {}
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "reconnects": 0,
+            "discarded": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _connect(self):
+        return (_connector or connect_backend)(self.database)
+
+    # Make sure a connection that sat idle is still alive, reconnecting if the server dropped it
+    def _check_health(self, conn):
+        idle_for = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle_for < self.health_check_interval:
+            return conn
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return conn
+        except mysql.connector.Error:
+            with self._lock:
+                self._stats["reconnects"] += 1
+            self._discard(conn)
+            return self._connect()
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+
+    # Pool wait, health check and (for a new connection) the connect itself
+    def get_connection(self):
+        with tracing.span("db.connect", database=self.database):
+            return self._checkout()
+
+    def _checkout(self):
+        start = time.monotonic()
+        fresh = False
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                    fresh = True
+                except mysql.connector.Error:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._stats["timeouts"] += 1
+                    raise PoolExhausted(
+                        f"No free connection for '{self.database}' after {self.timeout}s "
+                        f"(pool size {self.size})."
+                    )
+
+        if not fresh:
+            try:
+                conn = self._check_health(conn)
+            except mysql.connector.Error:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return PooledConnection(self, conn)
+
+    def _release(self, conn):
+        with self._lock:
+            self._in_use -= 1
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+            self._last_used[id(conn)] = time.monotonic()
+            self._idle.put(conn)
+            return
+        except mysql.connector.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+            self._stats["discarded"] += 1
+        self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "database": self.database,
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+            })
+        checkouts = stats["checkouts"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts if checkouts else 0.0
+        return stats
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            self._discard(conn)
+
+
+def connect_mysql(database):
+    return mysql.connector.connect(
+        host=os.getenv("MYSQL_HOST"),
+        user=os.getenv("MYSQL_USER"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        database=database
+    )
+
+
+def connect_sqlite(database):
+    import sqlite_store
+    return sqlite_store.get_databases().connect(database)
+
+
+BACKENDS = {"mysql": connect_mysql, "sqlite": connect_sqlite}
+
+
+def connect_backend(database):
+    if DB_BACKEND not in BACKENDS:
+        raise ValueError(f"Unknown DB_BACKEND '{DB_BACKEND}', expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[DB_BACKEND](database)
+
+
+# Replaces the DB_BACKEND connector for connections opened from now on: connect(database) must
+# return a DB-API connection with the mysql.connector surface the apps use (cursor(dictionary=),
+# ping, in_transaction), as sqlite_store's connections do.
+_connector = None
+
+
+def set_connector(connect):
+    global _connector
+    _connector = connect
+
+
+# One pool per database (job_database, resume_db, ...)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database):
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None:
+            pool = ConnectionPool(database)
+            _pools[database] = pool
+        return pool
+
+
+def get_connection(database):
+    return get_pool(database).get_connection()
+
+
+# Closes the idle connections and forgets every pool, so the next checkout connects through the
+# current connector (tests switch backends with set_connector)
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.database: pool.stats() for pool in pools}
@@ -0,0 +1,20 @@
+# Errors worth retrying, shared by the LLM gateway (retries within a call) and the resume queue
+# (retries of a whole job)
+
+# google.api_core / groq / requests errors that are worth retrying, matched by class name so
+# callers do not have to import every client library
+TRANSIENT_ERRORS = {
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError",
+    "TooManyRequests", "RateLimitError", "APITimeoutError", "APIConnectionError",
+    "ConnectTimeout", "ReadTimeout",
+}
+
+
+class RetryableError(Exception):
+    pass
+
+
+def is_transient(error):
+    if isinstance(error, (RetryableError, TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
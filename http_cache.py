@@ -0,0 +1,161 @@
+import functools
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import formatdate
+
+# Response cache configuration (override through the environment / .env)
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "512"))
+HTTP_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", "300"))
+# Rewritten whenever a job is inserted; every process compares its contents with the version its
+# cached pages were rendered at, so an insert in test.py or main.py invalidates test1.py's pages
+JOBS_VERSION_PATH = os.getenv("JOBS_VERSION_PATH", ".cache/jobs.version")
+
+
+# Called after a job is committed. The version is (time in ns, random token): the token tells
+# apart two bumps the clock (or the file system's mtime) cannot, and the file is replaced
+# atomically so a reader never sees half of it.
+def bump_version(path=JOBS_VERSION_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temporary, "w") as version_file:
+        version_file.write(f"{time.time_ns()} {uuid.uuid4().hex}")
+    os.replace(temporary, path)
+
+
+def _read_version(path):
+    try:
+        with open(path) as version_file:
+            stamp, token = version_file.read().split()
+        return int(stamp), token
+    except (OSError, ValueError):
+        return 0, ""
+
+
+# Changes whenever bump_version() runs; usable as a cache key by code outside Flask (app.py)
+def jobs_version(path=JOBS_VERSION_PATH):
+    return _read_version(path)
+
+
+# In-process LRU + TTL cache of rendered responses for read-only routes, keyed on endpoint,
+# path and request arguments. ETag and Last-Modified come from the data version alone, so a
+# conditional GET is answered 304 before the view (and MySQL) is touched.
+class ResponseCache:
+    def __init__(self, max_entries=HTTP_CACHE_MAX_ENTRIES, ttl=HTTP_CACHE_TTL, version_path=JOBS_VERSION_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_path = version_path
+        # Also replaces a version file in the older mtime-only format
+        if _read_version(version_path) == (0, ""):
+            bump_version(version_path)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = _read_version(version_path)
+        self._stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0, "invalidations": 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    # Drops every entry once another process (or this one) has bumped the version
+    def version(self):
+        version = _read_version(self.version_path)
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._entries.clear()
+                self._stats["invalidations"] += 1
+        return version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _key(request):
+        args = tuple(sorted(request.values.items(multi=True)))
+        return (request.endpoint, request.path, args)
+
+    @staticmethod
+    def _etag(key, version):
+        digest = hashlib.sha1(repr((key, version)).encode("utf-8")).hexdigest()[:20]
+        return f'"{digest}"'
+
+    def _not_modified(self, request, etag, last_modified):
+        if request.method not in ("GET", "HEAD"):
+            return False
+        if request.if_none_match:
+            return request.if_none_match.contains(etag.strip('"'))
+        since = request.if_modified_since
+        return since is not None and since.timestamp() >= int(last_modified)
+
+    def _get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["version"] != version or time.time() - entry["created_at"] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    # flask is imported here, not at module level: main.py only needs bump_version()
+    def cached(self, view):
+        from flask import request, make_response
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            version = self.version()
+            key = self._key(request)
+            etag = self._etag(key, version)
+            last_modified = version[0] / 1e9
+            headers = {
+                "ETag": etag,
+                "Last-Modified": formatdate(last_modified, usegmt=True),
+                # Browsers keep the page but revalidate it, which costs a 304 at most
+                "Cache-Control": "no-cache",
+            }
+            if self._not_modified(request, etag, last_modified):
+                self._count("not_modified")
+                return make_response("", 304, headers)
+
+            entry = self._get(key, version)
+            if entry is not None:
+                self._count("hits")
+                response = make_response(entry["body"], entry["status"])
+                response.mimetype = entry["mimetype"]
+            else:
+                self._count("misses")
+                # A view that fails raises (see test1.get_unique_job_details), so nothing is kept
+                response = make_response(view(*args, **kwargs))
+                # Streamed bodies cannot be replayed; errors are not worth keeping
+                if response.status_code == 200 and not response.is_streamed:
+                    self._set(key, {"body": response.get_data(), "status": 200, "mimetype": response.mimetype,
+                                    "version": version, "created_at": time.time()})
+                else:
+                    return response
+            response.headers.update(headers)
+            return response
+        return wrapper
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        return stats
@@ -0,0 +1,268 @@
+import base64
+import json
+import os
+import re
+
+JOB_SEARCH_PAGE_SIZE = int(os.getenv("JOB_SEARCH_PAGE_SIZE", "20"))
+JOB_SEARCH_MAX_PAGE_SIZE = 100
+
+TITLE_INDEX = "ft_job_title"
+TITLE_DESCRIPTION_INDEX = "ft_job_title_description"
+TITLE_PREFIX_INDEX = "idx_job_title"
+
+# InnoDB ignores words shorter than innodb_ft_min_token_size (3 by default)
+MIN_TOKEN_LENGTH = 3
+_WORD = re.compile(r"\w+")
+# Decimal places kept of a relevance score (see _ranked_sql)
+RELEVANCE_PRECISION = 6
+
+JOB_COLUMNS = "id, company_name, job_title, job_description, sentiment_analysis"
+
+
+# write_key: the key a write-behind row carries (test.py), so a replayed row is not stored twice
+JOB_DETAILS_DDL = '''
+    CREATE TABLE IF NOT EXISTS job_details(
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        company_name VARCHAR(255),
+        job_title VARCHAR(255),
+        job_description TEXT,
+        sentiment_analysis TEXT,
+        write_key CHAR(32) NULL,
+        UNIQUE KEY uq_job_details_write_key (write_key)
+    )
+'''
+
+
+# Called from initialize_database: the job_details table, brought up to date when it was created
+# by an older DDL, with its search indexes
+def ensure_job_details_schema(cursor):
+    cursor.execute(JOB_DETAILS_DDL)
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, ("job_details",))
+    if "write_key" not in {row[0] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE job_details ADD COLUMN write_key CHAR(32) NULL, "
+                       "ADD UNIQUE KEY uq_job_details_write_key (write_key)")
+    ensure_job_search_indexes(cursor)
+
+
+# FULLTEXT indexes for ranked search plus a B-tree index on
+# job_title for prefix matches of words too short for the FULLTEXT parser (e.g. "AI")
+def ensure_job_search_indexes(cursor, table="job_details"):
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    existing = {row[0] for row in cursor.fetchall()}
+    if TITLE_INDEX not in existing:
+        cursor.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {TITLE_INDEX} (job_title)")
+    if TITLE_DESCRIPTION_INDEX not in existing:
+        cursor.execute(
+            f"ALTER TABLE {table} ADD FULLTEXT INDEX {TITLE_DESCRIPTION_INDEX} (job_title, job_description)"
+        )
+    if TITLE_PREFIX_INDEX not in existing:
+        cursor.execute(f"CREATE INDEX {TITLE_PREFIX_INDEX} ON {table} (job_title)")
+
+
+def _terms(query):
+    return list(dict.fromkeys(word.lower() for word in _WORD.findall(query) if len(word) >= MIN_TOKEN_LENGTH))
+
+
+# "senior engineer" -> "senior* engineer*": BOOLEAN MODE without operators matches any of the
+# words, and as prefixes, so "engineer" still finds "Engineering" as the old LIKE '%x%' did
+def _boolean_query(query):
+    return " ".join(f"{word}*" for word in _terms(query))
+
+
+# SQLite (sqlite_store.py) searches its FTS5 table instead: any of the query words as prefixes,
+# ranked by bm25 with title matches weighing double, like the two MATCH terms below
+def _is_sqlite(cursor):
+    return getattr(cursor, "dialect", "mysql") == "sqlite"
+
+
+def _fts_query(query):
+    return " OR ".join(f'"{word}"*' for word in _terms(query))
+
+
+def _fts_matches(table):
+    return f"""JOIN (
+                SELECT rowid AS match_id, round(-bm25({table}_fts, 2.0, 1.0), {RELEVANCE_PRECISION}) AS relevance
+                FROM {table}_fts WHERE {table}_fts MATCH %s
+            ) matches ON matches.match_id = {table}.id"""
+
+
+# Ranked rows for `query`, best first, continuing after `position` (relevance, id) if given.
+# The relevance is rounded to RELEVANCE_PRECISION places, so a cursor holding it compares equal
+# to the value recomputed for the same row on the next page.
+def _ranked_sql(cursor, select, query, table, position=None):
+    if _is_sqlite(cursor):
+        sql = f"SELECT {select}, relevance FROM {table} {_fts_matches(table)}"
+        params = [_fts_query(query)]
+        keyset = "WHERE"
+    else:
+        sql = f"""SELECT {select},
+                ROUND(MATCH(job_title) AGAINST (%s IN BOOLEAN MODE) * 2
+                    + MATCH(job_title, job_description) AGAINST (%s IN BOOLEAN MODE), {RELEVANCE_PRECISION}) AS relevance
+            FROM {table}
+            WHERE MATCH(job_title, job_description) AGAINST (%s IN BOOLEAN MODE)"""
+        params = [_boolean_query(query)] * 3
+        keyset = "HAVING"
+    if position and position["r"] is not None:
+        sql += f" {keyset} relevance < %s OR (relevance = %s AND id < %s)"
+        params += [position["r"], position["r"], position["id"]]
+    return sql + " ORDER BY relevance DESC, id DESC", params
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# Unranked title matches, newest first: a sargable prefix match for words too short for the
+# FULLTEXT parser, or (substring=True) the old LIKE '%x%' scan, only run when the indexed
+# search finds nothing (a query of stopwords, a word inside a longer one)
+def _title_sql(select, query, table, substring=False, position=None):
+    conditions, params = [], []
+    if query:
+        escaped = _escape_like(query)
+        conditions.append("job_title LIKE %s")
+        params.append(f"%{escaped}%" if substring else f"{escaped}%")
+    if position:
+        conditions.append("id < %s")
+        params.append(position["id"])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {select} FROM {table} {where} ORDER BY id DESC", params
+
+
+def clamp_page_size(limit):
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return JOB_SEARCH_PAGE_SIZE
+    return max(1, min(limit, JOB_SEARCH_MAX_PAGE_SIZE))
+
+
+# Relevance-ranked search over title and description. Title matches count double.
+# cursor must be a dictionary cursor; returns one page of rows.
+def search_jobs(cursor, query, limit=JOB_SEARCH_PAGE_SIZE, offset=0, columns=JOB_COLUMNS, table="job_details"):
+    query = (query or "").strip()
+    limit = clamp_page_size(limit)
+    offset = max(0, int(offset or 0))
+    if not query:
+        cursor.execute(f"SELECT {columns} FROM {table} ORDER BY id DESC LIMIT %s OFFSET %s", (limit, offset))
+        return cursor.fetchall()
+
+    if _terms(query):
+        sql, params = _ranked_sql(cursor, columns, query, table)
+    else:
+        sql, params = _title_sql(columns, query, table)
+    cursor.execute(f"{sql} LIMIT %s OFFSET %s", (*params, limit, offset))
+    rows = cursor.fetchall()
+    if not rows:
+        # Past the last indexed match, or no indexed match at all: only the latter falls back
+        if offset:
+            cursor.execute(f"{sql} LIMIT 1", params)
+            if cursor.fetchall():
+                return rows
+        sql, params = _title_sql(columns, query, table, substring=True)
+        cursor.execute(f"{sql} LIMIT %s OFFSET %s", (*params, limit, offset))
+        rows = cursor.fetchall()
+    return rows
+
+
+# Listing pages carry only the start of each description
+JOB_SNIPPET_LENGTH = int(os.getenv("JOB_SNIPPET_LENGTH", "300"))
+LISTING_COLUMNS = "id, company_name, job_title"
+STREAM_CHUNK = 10
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+# {"id", "r": relevance of a ranked page or None, "m": "substring" for fallback pages or None}
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return {"id": int(position["id"]), "r": float(position["r"]) if "r" in position else None,
+                "m": position.get("m")}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def snippet(text, length=JOB_SNIPPET_LENGTH):
+    text = (text or "").strip()
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length)
+    return text[:cut if cut > length // 2 else length].rstrip(" ,.;:") + "…"
+
+
+# One page of a keyset-paginated search. Rows are read from the cursor in chunks as the page is
+# iterated (so a streamed response can flush the first ones early); next_cursor is set once the
+# rows have been read, and is None on the last page. `rows`: a first chunk already fetched.
+class JobPage:
+    def __init__(self, cursor, limit, ranked, mode=None, rows=None):
+        self._cursor = cursor
+        self.limit = limit
+        self.ranked = ranked
+        self.mode = mode
+        self._first = rows
+        self.next_cursor = None
+
+    def __iter__(self):
+        count, position = 0, None
+        while True:
+            rows, self._first = (self._first, None) if self._first else (self._cursor.fetchmany(STREAM_CHUNK), None)
+            if not rows:
+                return
+            for row in rows:
+                if count == self.limit:
+                    # The extra row fetched only says there is a next page
+                    self.next_cursor = encode_cursor(position)
+                    self._cursor.fetchall()
+                    return
+                count += 1
+                relevance = row.pop("relevance", None)
+                row["job_snippet"] = snippet(row.pop("job_snippet", ""))
+                position = {"id": row["id"], "r": relevance} if self.ranked else {"id": row["id"]}
+                if self.mode:
+                    position["m"] = self.mode
+                yield row
+
+    def rows(self):
+        return list(self)
+
+
+# Keyset-paginated variant of search_jobs: `after` is the next_cursor of the previous page.
+# Ranked results continue strictly after the (relevance, id) of the last row seen, unranked
+# ones after its id, so deep pages cost the same as the first one. A search whose indexed
+# query finds nothing pages through the substring fallback instead; its cursors say so, so
+# later pages stay on it.
+def search_jobs_page(cursor, query, limit=JOB_SEARCH_PAGE_SIZE, after=None, table="job_details",
+                     columns=LISTING_COLUMNS, snippet_length=JOB_SNIPPET_LENGTH):
+    query = (query or "").strip()
+    limit = clamp_page_size(limit)
+    position = decode_cursor(after)
+    # One character past the snippet so snippet() can tell a cut description from a short one
+    select = f"{columns}, LEFT(job_description, {int(snippet_length) + 1}) AS job_snippet"
+
+    ranked = bool(_terms(query))
+    if query and not (position and position["m"] == "substring"):
+        if ranked:
+            sql, params = _ranked_sql(cursor, select, query, table, position)
+        else:
+            sql, params = _title_sql(select, query, table, position=position)
+        cursor.execute(f"{sql} LIMIT %s", (*params, limit + 1))
+        if position:
+            return JobPage(cursor, limit, ranked=ranked)
+        rows = cursor.fetchmany(STREAM_CHUNK)
+        if rows:
+            return JobPage(cursor, limit, ranked=ranked, rows=rows)
+        cursor.fetchall()
+
+    sql, params = _title_sql(select, query, table, substring=bool(query), position=position)
+    cursor.execute(f"{sql} LIMIT %s", (*params, limit + 1))
+    return JobPage(cursor, limit, ranked=False, mode="substring" if query else None)
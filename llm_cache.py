@@ -0,0 +1,179 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Cache configuration (override through the environment / .env)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+# Set to a file path (e.g. .cache/llm_cache.sqlite3) to keep responses across restarts
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+# Prompts built from indented f-strings differ only in whitespace, so it is collapsed before hashing
+def normalize_prompt(prompt):
+    return _WHITESPACE.sub(" ", prompt).strip()
+
+
+def make_key(model, prompt):
+    digest = hashlib.sha256(f"{model}\0{normalize_prompt(prompt)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SQLiteBackend:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                value TEXT,
+                created_at REAL,
+                last_access REAL
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+        return row
+
+    def set(self, key, model, value, created_at, max_entries):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, value, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, model, value, created_at, created_at),
+            )
+            # Least recently used rows go first once the table is over its size bound
+            evicted = self._conn.execute('''
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            ''', (max_entries,)).rowcount
+            self._conn.commit()
+        return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+# LRU + TTL cache for LLM responses, keyed by model plus normalized prompt hash.
+# The in-memory LRU is always used; the optional SQLite backend sits behind it.
+class LLMCache:
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL, path=LLM_CACHE_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = SQLiteBackend(path) if path else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def _expired(self, created_at):
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _remember(self, key, value, created_at):
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (value, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def get(self, model, prompt):
+        key = make_key(model, prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+        if entry is None and self.backend:
+            entry = self.backend.get(key)
+            if entry:
+                self._remember(key, *entry)
+        if entry is None:
+            self._count("misses")
+            return None
+
+        value, created_at = entry
+        if self._expired(created_at):
+            with self._lock:
+                self._entries.pop(key, None)
+            if self.backend:
+                self.backend.delete(key)
+            self._count("expired")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return value
+
+    def set(self, model, prompt, value):
+        key = make_key(model, prompt)
+        created_at = time.time()
+        evicted = self._remember(key, value, created_at)
+        # With a backend the memory LRU is only a front for it, so count what the backend drops
+        if self.backend:
+            evicted = self.backend.set(key, model, value, created_at, self.max_entries)
+        self._count("evictions", evicted)
+
+    def get_or_generate(self, model, prompt, generate):
+        value = self.get(model, prompt)
+        if value is None:
+            value = generate()
+            self.set(model, prompt, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        stats["backend"] = "sqlite" if self.backend else "memory"
+        return stats
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+# Process-wide cache shared by test.py and main.py
+def get_llm_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
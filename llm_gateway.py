@@ -0,0 +1,331 @@
+import copy
+import json
+import logging
+import os
+import re
+import threading
+import time
+from llm_cache import LLMCache, get_llm_cache
+from errors import is_transient
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Gateway configuration (override through the environment / .env)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "live")  # "live" or "fake" (offline load tests)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "1"))
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "5"))
+# Simulated seconds per call for the fake backend
+LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", "0"))
+
+GEMINI_MODEL = "gemini-pro"
+GROQ_MODEL = "llama3-8b-8192"
+# Gemini 1.0 models reject response_mime_type, they only get the JSON instruction in the prompt
+GEMINI_NO_JSON_MODE = ("gemini-pro", "gemini-1.0")
+
+
+class LLMTimeout(TimeoutError):
+    pass
+
+
+class LLMOutputError(ValueError):
+    pass
+
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+# Tolerates code fences and text around the JSON value
+def parse_json(text):
+    text = _FENCE.sub("", text.strip())
+    try:
+        return json.loads(text)
+    except ValueError:
+        start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+        end = max(text.rfind("}"), text.rfind("]"))
+        if start >= 0 and end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except ValueError:
+                pass
+    raise LLMOutputError(f"LLM response is not valid JSON: {text[:200]!r}")
+
+
+# schema: {field: (json type, description)}; count asks for {"results": [one object per document]}
+# (an object at the top level, since Groq's JSON mode does not allow a bare array)
+def json_instruction(schema, count=None):
+    fields = "\n".join(f'- "{field}" ({kind}): {description}' for field, (kind, description) in schema.items())
+    if count is None:
+        shape = "a single JSON object"
+    else:
+        shape = (f'a JSON object {{"results": [...]}} whose "results" array holds {count} objects, '
+                 f"one per document in the same order, each")
+    return f"Respond with only {shape} with exactly these keys and no other text:\n{fields}"
+
+
+def _conform(data, schema):
+    if not isinstance(data, dict):
+        raise LLMOutputError(f"Expected a JSON object, got {type(data).__name__}")
+    return {field: data.get(field) for field in schema}
+
+
+class GeminiBackend:
+    name = "gemini"
+
+    def __init__(self):
+        import google.generativeai as genai
+        # Configured here rather than at import so entry points do not load the SDK up front
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        self._genai = genai
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model):
+        with self._lock:
+            if model not in self._models:
+                self._models[model] = self._genai.GenerativeModel(model)
+            return self._models[model]
+
+    def generate(self, model, prompt, timeout, schema=None, count=None):
+        kwargs = {"request_options": {"timeout": timeout}}
+        if schema and not model.startswith(GEMINI_NO_JSON_MODE):
+            kwargs["generation_config"] = {"response_mime_type": "application/json"}
+        response = self._model(model).generate_content(prompt, **kwargs)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            tracing.add_tokens(model, usage.prompt_token_count, usage.candidates_token_count)
+        return response.text
+
+
+class GroqBackend:
+    name = "groq"
+
+    def __init__(self):
+        from langchain_groq import ChatGroq
+        self._chat_class = ChatGroq
+        self._chats = {}
+        self._lock = threading.Lock()
+
+    # One client per (model, json mode, timeout); retries are done by the gateway
+    def _chat(self, model, json_output, timeout):
+        key = (model, json_output, timeout)
+        with self._lock:
+            if key not in self._chats:
+                chat = self._chat_class(model_name=model, timeout=timeout, max_retries=0)
+                if json_output:
+                    chat = chat.bind(response_format={"type": "json_object"})
+                self._chats[key] = chat
+            return self._chats[key]
+
+    def generate(self, model, prompt, timeout, schema=None, count=None):
+        message = self._chat(model, schema is not None, timeout).invoke(prompt)
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            tracing.add_tokens(model, usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+        return message.content
+
+
+# Offline stand-in: sleeps for `latency` seconds and answers with schema-shaped placeholders,
+# or with responder(model, prompt, schema, count) when one is given
+class FakeBackend:
+    name = "fake"
+    PLACEHOLDERS = {"string": "Fake", "number": 0.0, "array": [], "object": {}}
+
+    def __init__(self, latency=LLM_FAKE_LATENCY, responder=None):
+        self.latency = latency
+        self.responder = responder
+
+    def generate(self, model, prompt, timeout, schema=None, count=None):
+        if self.latency > timeout:
+            time.sleep(timeout)
+            raise LLMTimeout(f"Fake {model} call exceeded {timeout}s")
+        time.sleep(self.latency)
+        if self.responder:
+            text = self.responder(model, prompt, schema, count)
+        elif schema is None:
+            text = f"Fake {model} response to a {len(prompt)}-character prompt."
+        else:
+            item = {field: self.PLACEHOLDERS.get(kind, None) for field, (kind, _) in schema.items()}
+            text = json.dumps(item if count is None else {"results": [item] * count})
+        # Rough token counts (4 characters a token) so load tests exercise the token metrics
+        tracing.add_tokens(model, len(prompt) // 4, len(text) // 4)
+        return text
+
+
+LIVE_BACKENDS = {"gemini": GeminiBackend, "groq": GroqBackend}
+
+
+# Spaces calls so no more than `rate` start per second across all threads
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+# Single entry point for Gemini and Groq calls: clients are built once and reused, every call
+# gets a timeout and a slot from a process-wide semaphore, transient errors are retried with
+# backoff, and plain-text responses go through the LLM cache.
+class LLMGateway:
+    def __init__(self, backend=None, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT,
+                 max_retries=LLM_MAX_RETRIES, backoff=LLM_RETRY_BACKOFF, cache=None, rate_limiter=None):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # Waited on before every backend request, retries included (see with_rate_limit)
+        self.rate_limiter = rate_limiter
+        # Fake responses must never land in the shared (possibly persistent) cache
+        self.cache = cache or (LLMCache(path=None) if backend else get_llm_cache())
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._backends = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "errors": 0, "retries": 0, "timeouts": 0, "in_flight": 0, "latency_total": 0.0}
+
+    def _backend_for(self, model):
+        if self.backend:
+            return self.backend
+        provider = "gemini" if model.startswith("gemini") else "groq"
+        with self._lock:
+            if provider not in self._backends:
+                self._backends[provider] = LIVE_BACKENDS[provider]()
+            return self._backends[provider]
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _call(self, model, prompt, timeout=None, schema=None, count=None):
+        with tracing.span("llm.call", model=model, documents=count or 1) as span:
+            return self._attempts(span, model, prompt, timeout, schema, count)
+
+    def _attempts(self, span, model, prompt, timeout, schema, count):
+        timeout = timeout or self.timeout
+        backend = self._backend_for(model)
+        for attempt in range(self.max_retries + 1):
+            span.set(attempts=attempt + 1)
+            if self.rate_limiter:
+                self.rate_limiter.wait()
+            if not self._semaphore.acquire(timeout=timeout):
+                self._count("timeouts")
+                raise LLMTimeout(f"No free LLM slot within {timeout}s ({self.max_concurrency} in flight)")
+            self._count("in_flight")
+            start = time.monotonic()
+            try:
+                text = backend.generate(model, prompt, timeout, schema=schema, count=count)
+            except Exception as e:
+                self._count("errors")
+                if isinstance(e, TimeoutError) or type(e).__name__ in ("DeadlineExceeded", "APITimeoutError"):
+                    self._count("timeouts")
+                if attempt == self.max_retries or not is_transient(e):
+                    raise
+                self._count("retries")
+            else:
+                self._count("calls")
+                self._count("latency_total", time.monotonic() - start)
+                return text
+            finally:
+                self._count("in_flight", -1)
+                self._semaphore.release()
+            time.sleep(self.backoff * 2 ** attempt)
+
+    # The response is only cached once `parse` accepts it
+    def _cached(self, model, prompt, parse, cache, **kwargs):
+        if cache:
+            text = self.cache.get(model, prompt)
+            if text is not None:
+                return parse(text)
+        text = self._call(model, prompt, **kwargs)
+        result = parse(text)
+        if cache:
+            self.cache.set(model, prompt, text)
+        return result
+
+    def generate(self, prompt, model=GEMINI_MODEL, timeout=None, cache=True):
+        return self._cached(model, prompt, lambda text: text, cache, timeout=timeout)
+
+    # Returns {field: value} for every field of the schema (None when the model left it out)
+    def generate_json(self, prompt, schema, model=GEMINI_MODEL, timeout=None, cache=True):
+        prompt = f"{prompt}\n\n{json_instruction(schema)}"
+        return self._cached(model, prompt, lambda text: _conform(parse_json(text), schema), cache,
+                            timeout=timeout, schema=schema)
+
+    # Sends `batch_size` documents per request and returns one result per document, in order.
+    # A batch whose reply cannot be matched up is retried one document at a time.
+    def generate_batch(self, instruction, documents, schema, model=GEMINI_MODEL, timeout=None,
+                       batch_size=LLM_BATCH_SIZE, cache=True):
+        results = []
+        for offset in range(0, len(documents), batch_size):
+            chunk = documents[offset:offset + batch_size]
+            if len(chunk) == 1:
+                results.append(self.generate_json(f"{instruction}\n\n{chunk[0]}", schema, model, timeout, cache))
+                continue
+            body = "\n\n".join(f"Document {number}:\n{document}" for number, document in enumerate(chunk, start=1))
+            prompt = f"{instruction}\n\n{body}\n\n{json_instruction(schema, count=len(chunk))}"
+
+            def parse(text, expected=len(chunk)):
+                data = parse_json(text)
+                items = data.get("results") if isinstance(data, dict) else data
+                if not isinstance(items, list) or len(items) != expected:
+                    raise LLMOutputError(f"Expected {expected} results in the batch response")
+                return [_conform(item, schema) for item in items]
+
+            try:
+                results.extend(self._cached(model, prompt, parse, cache, timeout=timeout,
+                                            schema=schema, count=len(chunk)))
+            except LLMOutputError as e:
+                logger.warning("Batch response unusable, retrying documents one by one",
+                               extra=tracing.fields(error=str(e), documents=len(chunk)))
+                results.extend(self.generate_json(f"{instruction}\n\n{document}", schema, model, timeout, cache)
+                               for document in chunk)
+        return results
+
+    # Same clients, cache and stats with a limit of its own, for work that needs more calls in
+    # flight than LLM_MAX_CONCURRENCY allows the rest of the app (map-reduce ranking shards)
+    def with_concurrency(self, max_concurrency):
+        view = copy.copy(self)
+        view.max_concurrency = max_concurrency
+        view._semaphore = threading.BoundedSemaphore(max_concurrency)
+        return view
+
+    # Same gateway with every request spaced so no more than `rate` start per second
+    # (bulk_ingest.py --rate)
+    def with_rate_limit(self, rate):
+        view = copy.copy(self)
+        view.rate_limiter = RateLimiter(rate)
+        return view
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        latency_total = stats.pop("latency_total")
+        stats["mean_latency_ms"] = latency_total / stats["calls"] * 1000 if stats["calls"] else 0.0
+        stats["max_concurrency"] = self.max_concurrency
+        stats["timeout"] = self.timeout
+        stats["backend"] = self.backend.name if self.backend else "live"
+        return stats
+
+
+_default_gateway = None
+_default_lock = threading.Lock()
+
+
+# Process-wide gateway; LLM_BACKEND=fake swaps every LLM call for FakeBackend
+def get_llm_gateway():
+    global _default_gateway
+    with _default_lock:
+        if _default_gateway is None:
+            _default_gateway = LLMGateway(backend=FakeBackend() if LLM_BACKEND == "fake" else None)
+        return _default_gateway
@@ -1,54 +1,76 @@
-from langchain.chains.question_answering import load_qa_chain
-from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-import google.generativeai as genai
 import streamlit as st
-import pandas as pd
+import logging
 import mysql.connector
 from mysql.connector import Error 
-from flask import Flask, render_template, request, jsonify
-import os
 from dotenv import load_dotenv
+import db_pool
+from company_index import CompanyIndex, EXACT, FUZZY
+from job_search import ensure_job_search_indexes
+from llm_gateway import get_llm_gateway
+from http_cache import bump_version
+from match_scores import ensure_match_score_schema, score_job
+from tracing import configure_logging, fields
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+configure_logging()
+logger = logging.getLogger(__name__)
 
+# Streamlit re-runs this script on every interaction. The gateway, the pools, the schema check
+# and the company index come from st.cache_resource: built once per process and shared by every
+# session, so a rerun only re-renders the widgets.
 
+# Gemini client built by the gateway on its first call; responses are cached by model + prompt
+# (the sentiment prompt only has a handful of variants)
+@st.cache_resource
+def load_llm_gateway():
+    return get_llm_gateway()
 
+llm_gateway = load_llm_gateway()
+
+@st.cache_resource
+def get_pool(database):
+    return db_pool.get_pool(database)
 
 def get_db_connection():
-    conn = mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST"),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database="job_database"  # Specify your database name here
-    )
-    return conn
+    # Pooled connection, close() returns it to the pool
+    return get_pool("job_database").get_connection()
+
+def get_resume_db_connection():
+    return get_pool("resume_db").get_connection()
 
 def initialize_database():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS  job_details(
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            company_name VARCHAR(255),
-            job_title VARCHAR(255),
-            job_description TEXT, 
-            sentiment_analysis TEXT
-        )
-    ''')
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-initialize_database()
-
-
-# Ensure the environment variable is loaded correctly
-groq_api_key = os.getenv("GROQ_API_KEY")
-if not groq_api_key:
-    raise ValueError("GROQ API key is not set. Please check your environment variables.")
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS  job_details(
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    company_name VARCHAR(255),
+                    job_title VARCHAR(255),
+                    job_description TEXT, 
+                    sentiment_analysis TEXT
+                )
+            ''')
+            ensure_job_search_indexes(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+
+    with get_resume_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            ensure_match_score_schema(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+
+# Cached once it succeeds; exceptions are not cached, so a failed attempt is retried on the next save
+@st.cache_resource(show_spinner=False)
+def ensure_schema():
+    initialize_database()
+    return True
 
 def save_job_details(company_name, job_title, job_description, sentiment_analysis):
+    ensure_schema()
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
@@ -57,46 +79,52 @@ def save_job_details(company_name, job_title, job_description, sentiment_analysi
             VALUES (%s, %s, %s, %s)
         """, (company_name, job_title, job_description, sentiment_analysis))
         conn.commit()
+        job_id = cursor.lastrowid
     except mysql.connector.Error as e:
-        print(f"Error: {e}")
+        logger.error("Error saving job", extra=fields(company_name=company_name, error=str(e)))
+        return None
     finally:
         cursor.close()
         conn.close()
+    # Cached job pages of the Flask apps go stale now
+    bump_version()
+
+    # Score only the new job against the stored candidates (candidate_job_scores)
+    conn = get_resume_db_connection()
+    cursor = conn.cursor()
+    try:
+        score_job(cursor, job_id, job_title, job_description)
+        conn.commit()
+    except mysql.connector.Error as e:
+        logger.error("Error scoring job", extra=fields(job_id=job_id, error=str(e)))
+    finally:
+        cursor.close()
+        conn.close()
+    return job_id
 
 def load_data(filepath):
-    return pd.read_csv(filepath)
-data= load_data("REVIEWS.csv")
+    # Typed columns, warm starts read the parsed .npz cache
+    # Sentiment and summary are precomputed for every company at load time
+    from reviews_loader import load_reviews
+    from sentiment_table import add_sentiment_columns
+    return add_sentiment_columns(load_reviews(filepath))
+# Indexed on the first lookup, rebuilt automatically when REVIEWS.csv changes. The index holds the
+# DataFrame; cache_resource shares it as is, where st.cache_data would copy it on every rerun.
+@st.cache_resource(show_spinner="Loading company reviews...")
+def get_company_index():
+    return CompanyIndex("REVIEWS.csv", loader=load_data)
 
 # Set up the conversational chain
-def get_company_data(company_name, data):
-    company_data = data[data['Company'].str.lower() == company_name.lower()]
-    return company_data
+def get_company_data(company_name):
+    return get_company_index().find(company_name)
 
 def generate_response(company_data):
     if company_data.empty:
-        return "Company not found."
-
-    company_name = company_data['Company'].values[0]
-    rating = company_data['Rating'].values[0]
-    avg_salary = company_data['Salaries'].values[0]
-    total_employees = company_data['Company_Size'].values[0]
-
-
-    # Sentiment Analysis
-    if rating > 4:
-        sentiment = "Exeptional"
-    elif 3.5< rating <= 4:
-        sentiment = "Positive"
-    elif 3 <= rating <3.4:
-        sentiment = "Neutral"
-    else:
-        sentiment = "Negative"
-
-    # Structured Response
-    response = (f"**{company_name}** has a rating of {rating}, indicating a {sentiment} sentiment. "
-                f"The average salary at {company_name} is ${avg_salary}, "
-                f"and the company employs around {total_employees} individuals.")
+        return "Company not found.", None
 
+    # Structured Response (precomputed by add_sentiment_columns)
+    response = company_data['Summary'].values[0]
+    sentiment = company_data['Sentiment'].values[0]
     return response, sentiment
 st.title("Welcome to AI HR Solution")
 
@@ -108,16 +136,23 @@ submit = st.button("Submit")
 
 if submit:
     if company_name and job_title and job_description:
-        company_data = get_company_data(company_name, data)
+        company_data, match = get_company_data(company_name)
         response, sentiment = generate_response(company_data)
-        if response:
+        if match != EXACT:
+            suggestion = f" Did you mean {company_data['Company'].values[0]}?" if match == FUZZY else ""
+            st.error(f"Company '{company_name}' not found.{suggestion}")
+        elif response:
             # st.markdown(response)
             input_prompt = f"""You are supposed to be an analyzer of company reviews of thier employees. Your task is to generate responses on provided sentiments to show other applicants applying in this company.
             Dont't build up positive, negative and neutral sentiments just show what data told you!. I want you to also told applicant what data says. Your sentiment should be a one paragraph
             Response:
             {sentiment}
             """
-            response1 = genai.GenerativeModel('gemini-pro').generate_content(input_prompt).text
+            response1 = llm_gateway.generate(input_prompt)
             st.markdown(response1)
             save_job_details(company_name, job_title, job_description, response1)
             st.success("Job details saved successfully!")
+
+with st.sidebar.expander("LLM cache"):
+    st.json(llm_gateway.cache.stats())
+    st.json(llm_gateway.stats())
@@ -0,0 +1,236 @@
+# Precomputed candidate-job match scores (resume_db.candidate_job_scores).
+#
+# The score is the cosine similarity of the two sides' term sets. It depends only on the pair
+# itself, not on corpus statistics, so a new job or candidate is scored against the existing
+# other side once and no stored score ever has to be recomputed. Ranking candidates for a job is
+# then an indexed ORDER BY score DESC LIMIT query; the LLM only re-ranks the top few.
+#
+# A catch-up pass (test.py runs it every MATCH_CATCH_UP_INTERVAL seconds) scores the jobs and
+# candidates stored since the previous pass against the whole other side, so a pair is scored
+# even when both rows were stored at the same moment, when scoring a new row failed, or when the
+# row was stored without scoring (app.py).
+#
+#   python match_scores.py --rebuild    # backfill scores for rows stored before this table existed
+#   python match_scores.py --catch-up   # one catch-up pass (e.g. from cron)
+import argparse
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import tracing
+from candidate_index import tokenize, candidate_text
+
+logger = logging.getLogger(__name__)
+
+MATCH_SCORE_MIN = float(os.getenv("MATCH_SCORE_MIN", "0.05"))
+MATCH_RERANK_TOP = int(os.getenv("MATCH_RERANK_TOP", "5"))
+MATCH_PAGE_SIZE = 20
+# Seconds between catch-up passes in test.py; 0 disables them
+MATCH_CATCH_UP_INTERVAL = float(os.getenv("MATCH_CATCH_UP_INTERVAL", "300"))
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "of", "on", "or", "our", "the", "to", "we", "will", "with", "you", "your", "this", "that", "who",
+    "years", "year", "experience", "present", "current", "work", "working", "team", "role", "job",
+    "strong", "ability", "skills", "knowledge", "including", "etc", "e.g", "i.e",
+}
+
+# VALUES(col) rather than the row alias form (AS new ... score = new.score): the alias needs
+# MySQL 8.0.19, VALUES() works from 5.7 on and is only deprecated (a warning) from 8.0.20.
+# sqlite_store.translate maps VALUES(col) to excluded.col.
+UPSERT_SCORE = '''
+    INSERT INTO candidate_job_scores (job_id, candidate_id, score) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE score = VALUES(score)
+'''
+UPSERT_PROGRESS = '''
+    INSERT INTO match_score_progress (name, last_id) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE last_id = VALUES(last_id)
+'''
+
+
+def match_terms(text):
+    return {token for token in tokenize(text) if token not in STOPWORDS and not token.isdigit()}
+
+
+def job_terms(job_title, job_description):
+    return match_terms(f"{job_title or ''} {job_description or ''}")
+
+
+def match_score(candidate_terms, job_terms):
+    if not candidate_terms or not job_terms:
+        return 0.0
+    return len(candidate_terms & job_terms) / math.sqrt(len(candidate_terms) * len(job_terms))
+
+
+# Called from initialize_database on resume_db. The (job_id, score) index serves the
+# ORDER BY score DESC LIMIT ranking without a sort.
+def ensure_match_score_schema(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS candidate_job_scores (
+            job_id INT NOT NULL,
+            candidate_id INT NOT NULL,
+            score FLOAT NOT NULL,
+            PRIMARY KEY (job_id, candidate_id),
+            KEY idx_scores_job_score (job_id, score DESC),
+            KEY idx_scores_candidate (candidate_id)
+        )
+    ''')
+    # Highest job / candidate id the catch-up pass has scored
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS match_score_progress (
+            name VARCHAR(32) PRIMARY KEY,
+            last_id INT NOT NULL
+        )
+    ''')
+
+
+def _write_scores(cursor, rows, chunk=1000):
+    for offset in range(0, len(rows), chunk):
+        cursor.executemany(UPSERT_SCORE, rows[offset:offset + chunk])
+    return len(rows)
+
+
+# New jobs, as (job_id, job_title, job_description): score them against every stored
+# candidate in one pass. resume_cursor is a plain cursor on resume_db; the caller commits.
+# Returns the number of pairs stored.
+def score_jobs(resume_cursor, jobs):
+    jobs = [(job_id, job_terms(job_title, job_description)) for job_id, job_title, job_description in jobs]
+    if not jobs:
+        return 0
+    resume_cursor.execute("SELECT id, skills, experience_years FROM candidates")
+    rows = []
+    for candidate_id, skills, experience in resume_cursor.fetchall():
+        candidate_terms = match_terms(candidate_text(skills, experience))
+        for job_id, terms in jobs:
+            score = match_score(candidate_terms, terms)
+            if score >= MATCH_SCORE_MIN:
+                rows.append((job_id, candidate_id, score))
+    return _write_scores(resume_cursor, rows)
+
+
+def score_job(resume_cursor, job_id, job_title, job_description):
+    return score_jobs(resume_cursor, [(job_id, job_title, job_description)])
+
+
+# New candidates, as (candidate_id, skills, experience) with the same strings stored in the
+# candidates row: score them against every job. job_cursor is on job_database, resume_cursor
+# on resume_db; the caller commits resume_db.
+def score_candidates(job_cursor, resume_cursor, candidates):
+    candidates = [(candidate_id, match_terms(candidate_text(skills, experience)))
+                  for candidate_id, skills, experience in candidates]
+    if not candidates:
+        return 0
+    job_cursor.execute("SELECT id, job_title, job_description FROM job_details")
+    rows = []
+    for job_id, job_title, job_description in job_cursor.fetchall():
+        terms = job_terms(job_title, job_description)
+        for candidate_id, candidate_terms in candidates:
+            score = match_score(candidate_terms, terms)
+            if score >= MATCH_SCORE_MIN:
+                rows.append((job_id, candidate_id, score))
+    return _write_scores(resume_cursor, rows)
+
+
+# Best-scored candidates for a job (dictionary cursor on resume_db)
+def top_candidates(cursor, job_id, limit=MATCH_PAGE_SIZE):
+    cursor.execute('''
+        SELECT c.id, c.name, c.email, c.skills, c.experience_years, c.retention_rate, s.score
+        FROM candidate_job_scores s
+        JOIN candidates c ON c.id = s.candidate_id
+        WHERE s.job_id = %s
+        ORDER BY s.score DESC
+        LIMIT %s
+    ''', (job_id, limit))
+    return cursor.fetchall()
+
+
+def rebuild(get_job_connection, get_resume_connection):
+    job_conn, resume_conn = get_job_connection(), get_resume_connection()
+    job_cursor, resume_cursor = job_conn.cursor(), resume_conn.cursor()
+    try:
+        ensure_match_score_schema(resume_cursor)
+        resume_cursor.execute("SELECT id, skills, experience_years FROM candidates")
+        stored = score_candidates(job_cursor, resume_cursor, resume_cursor.fetchall())
+        resume_conn.commit()
+    finally:
+        job_cursor.close()
+        resume_cursor.close()
+        job_conn.close()
+        resume_conn.close()
+    return stored
+
+
+# Scores the jobs and candidates stored since the previous pass against the whole other side.
+# The first pass only records where the stored rows end (--rebuild backfills older rows). A row
+# whose id is below the mark but commits after the pass is scored by its own insert.
+def catch_up(get_job_connection, get_resume_connection):
+    job_conn, resume_conn = get_job_connection(), get_resume_connection()
+    job_cursor, resume_cursor = job_conn.cursor(), resume_conn.cursor()
+    try:
+        job_cursor.execute("SELECT COALESCE(MAX(id), 0) FROM job_details")
+        last_job = job_cursor.fetchone()[0]
+        resume_cursor.execute("SELECT COALESCE(MAX(id), 0) FROM candidates")
+        last_candidate = resume_cursor.fetchone()[0]
+        resume_cursor.execute("SELECT name, last_id FROM match_score_progress")
+        progress = dict(resume_cursor.fetchall())
+
+        stored = 0
+        if "jobs" in progress:
+            job_cursor.execute("SELECT id, job_title, job_description FROM job_details WHERE id > %s AND id <= %s",
+                               (progress["jobs"], last_job))
+            stored += score_jobs(resume_cursor, job_cursor.fetchall())
+        if "candidates" in progress:
+            resume_cursor.execute("SELECT id, skills, experience_years FROM candidates WHERE id > %s AND id <= %s",
+                                  (progress["candidates"], last_candidate))
+            stored += score_candidates(job_cursor, resume_cursor, resume_cursor.fetchall())
+        resume_cursor.executemany(UPSERT_PROGRESS, [("jobs", last_job), ("candidates", last_candidate)])
+        resume_conn.commit()
+    finally:
+        job_cursor.close()
+        resume_cursor.close()
+        job_conn.close()
+        resume_conn.close()
+    return stored
+
+
+# Background thread running catch_up every `interval` seconds, starting with a pass now
+def start_catch_up(get_job_connection, get_resume_connection, interval=MATCH_CATCH_UP_INTERVAL):
+    if interval <= 0:
+        return None
+
+    def run():
+        while True:
+            try:
+                stored = catch_up(get_job_connection, get_resume_connection)
+                if stored:
+                    logger.info("Match score catch-up", extra=tracing.fields(pairs=stored))
+            except Exception as e:
+                logger.error("Match score catch-up failed", extra=tracing.fields(error=str(e)))
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="match-score-catch-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the candidate_job_scores table.")
+    parser.add_argument("--rebuild", action="store_true", help="score every stored candidate against every job")
+    parser.add_argument("--catch-up", action="store_true", help="score the rows stored since the last catch-up")
+    args = parser.parse_args()
+    if not (args.rebuild or args.catch_up):
+        parser.print_help()
+        return 1
+
+    from dotenv import load_dotenv
+    import db_pool
+    load_dotenv()
+    connections = (lambda: db_pool.get_connection("job_database"), lambda: db_pool.get_connection("resume_db"))
+    stored = rebuild(*connections) if args.rebuild else catch_up(*connections)
+    print(f"Stored {stored} candidate-job scores")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Extraction budgets (override through the environment / .env)
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(10 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_TIME_BUDGET = float(os.getenv("PDF_TIME_BUDGET", "20"))
+# "pypdf2" or "pdfplumber". pdfplumber keeps layout better but was 50-75x slower per page on
+# benchmarks/bench_pdf_extract.py, so it is opt-in; it falls back to PyPDF2 if missing or failing.
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pypdf2")
+# Documents with at least this many pages are split across PDF_WORKERS processes
+PDF_PARALLEL_PAGES = int(os.getenv("PDF_PARALLEL_PAGES", "16"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Extra wait for a worker that stopped at the time budget to hand back the pages it has
+RESULT_GRACE = 1.0
+
+
+class PDFBudgetExceeded(Exception):
+    pass
+
+
+# Accepts a path, raw bytes, a binary file object or a Flask FileStorage
+def read_pdf_bytes(source, max_bytes=PDF_MAX_BYTES):
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    elif isinstance(source, (str, os.PathLike)):
+        if os.path.getsize(source) > max_bytes:
+            raise PDFBudgetExceeded(f"PDF is larger than {max_bytes} bytes.")
+        with open(source, "rb") as pdf_file:
+            data = pdf_file.read()
+    else:
+        stream = getattr(source, "stream", source)
+        data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise PDFBudgetExceeded(f"PDF is larger than {max_bytes} bytes.")
+    return data
+
+
+def _page_count(data, backend):
+    if backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            return len(pdf.pages)
+    import PyPDF2
+    return len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+
+
+def _iter_backend_pages(data, backend, start, stop):
+    if backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            for page in pdf.pages[start:stop]:
+                yield page.extract_text() or ""
+                page.close()
+        return
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    for page in reader.pages[start:stop]:
+        yield page.extract_text() or ""
+
+
+# Runs in a worker process for one slice of a large document
+def _extract_range(data, backend, start, stop):
+    return list(_iter_backend_pages(data, backend, start, stop))
+
+
+def _resolve_backend(data, backend):
+    if backend == "pdfplumber":
+        try:
+            return "pdfplumber", _page_count(data, "pdfplumber")
+        except Exception as e:
+            logger.warning("pdfplumber failed, falling back to PyPDF2", extra=tracing.fields(error=str(e)))
+    return "pypdf2", _page_count(data, "pypdf2")
+
+
+# Runs in a worker process: resolves the backend and page count and, unless the document has
+# parallel_pages pages or more, extracts its pages until max_pages or time_budget seconds.
+# Returns (backend, page count, texts or None when the pages are left to _iter_parallel).
+def _extract_document(data, backend, max_pages, parallel_pages, time_budget):
+    deadline = time.monotonic() + time_budget
+    backend, page_count = _resolve_backend(data, backend)
+    if parallel_pages is not None and min(page_count, max_pages) >= parallel_pages:
+        return backend, page_count, None
+    texts = []
+    for text in _iter_backend_pages(data, backend, 0, min(page_count, max_pages)):
+        texts.append(text)
+        if time.monotonic() > deadline:
+            break
+    return backend, page_count, texts
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Not fork: a forked worker would inherit locks (logging, the connection pools, the LLM
+# gateway) held by the app's other threads at that moment
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=_context())
+        return _pool
+
+
+# A worker stuck in the parser would keep its slot forever: the pool is replaced and its
+# processes killed (other extractions still running on it fail with BrokenProcessPool)
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+# The deadline bounds the wait even if a worker hangs inside the PDF parser; on timeout the
+# other `futures` of the document are cancelled
+def _result(pool, future, futures, deadline):
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        running = [other for other in futures if not other.cancel() and not other.done()]
+        if running:
+            _discard_pool(pool)
+        raise
+
+
+def _iter_parallel(data, backend, page_count, deadline):
+    chunk = max(1, -(-page_count // PDF_WORKERS))
+    pool = _get_pool()
+    futures = [pool.submit(_extract_range, data, backend, start, min(start + chunk, page_count))
+               for start in range(0, page_count, chunk)]
+    try:
+        for future in futures:
+            yield from _result(pool, future, futures, deadline)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+# In this process, for callers that already are a worker process (bulk_ingest.py): the budget
+# is checked between pages only
+def _iter_local(data, backend, max_pages, deadline, time_budget):
+    backend, page_count = _resolve_backend(data, backend)
+    if page_count > max_pages:
+        logger.info("PDF truncated to the page budget", extra=tracing.fields(pages=page_count, max_pages=max_pages))
+    for text in _iter_backend_pages(data, backend, 0, min(page_count, max_pages)):
+        yield text
+        if time.monotonic() > deadline:
+            logger.warning("PDF extraction stopped at the time budget", extra=tracing.fields(time_budget=time_budget))
+            return
+
+
+# Yields page texts in order, stopping at max_pages or when the time budget runs out.
+# Parsing runs in worker processes, so the budget also covers a document the parser never
+# finishes; large documents are extracted page-parallel. parallel=False extracts in this
+# process, parallel=True splits any document across the workers.
+def iter_pdf_pages(source, max_pages=PDF_MAX_PAGES, max_bytes=PDF_MAX_BYTES,
+                   time_budget=PDF_TIME_BUDGET, backend=PDF_BACKEND, parallel=None):
+    deadline = time.monotonic() + time_budget
+    data = read_pdf_bytes(source, max_bytes)
+    if parallel is False:
+        yield from _iter_local(data, backend, max_pages, deadline, time_budget)
+        return
+
+    if parallel:
+        parallel_pages = 0
+    else:
+        parallel_pages = PDF_PARALLEL_PAGES if PDF_WORKERS > 1 else None
+    try:
+        pool = _get_pool()
+        future = pool.submit(_extract_document, data, backend, max_pages, parallel_pages, time_budget)
+        backend, page_count, texts = _result(pool, future, [future], deadline + RESULT_GRACE)
+        if page_count > max_pages:
+            logger.info("PDF truncated to the page budget", extra=tracing.fields(pages=page_count, max_pages=max_pages))
+            page_count = max_pages
+        if texts is None:
+            yield from _iter_parallel(data, backend, page_count, deadline)
+            return
+        yield from texts
+        if len(texts) < page_count:
+            logger.warning("PDF extraction stopped at the time budget", extra=tracing.fields(time_budget=time_budget))
+    except FutureTimeout:
+        logger.warning("PDF extraction stopped at the time budget", extra=tracing.fields(time_budget=time_budget))
+
+
+def extract_text(source, **budgets):
+    with tracing.span("pdf.extract") as span:
+        pages = list(iter_pdf_pages(source, **budgets))
+        span.set(pages=len(pages))
+        return "\n".join(pages)
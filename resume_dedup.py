@@ -0,0 +1,98 @@
+import hashlib
+import re
+import unicodedata
+from candidate_store import CANDIDATE_COLUMNS
+
+# Content hashes stored on candidate rows so repeat uploads skip PDF parsing and the LLM.
+# file_hash covers the exact bytes; text_hash covers the normalized extracted text, which
+# also catches the same resume re-exported or re-saved as a different file.
+
+FILE_HASH_INDEX = "uq_candidates_file_hash"
+TEXT_HASH_INDEX = "uq_candidates_text_hash"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def file_hash(pdf_bytes):
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def normalize_text(text):
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+# Called from initialize_database: hash columns with unique indexes (NULL for rows stored
+# before hashing, which MySQL allows any number of) and the applications table
+def ensure_dedup_schema(cursor, table="candidates"):
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    columns = {row[0] for row in cursor.fetchall()}
+    for column in ("file_hash", "text_hash"):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} CHAR(64) NULL")
+
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    existing = {row[0] for row in cursor.fetchall()}
+    if FILE_HASH_INDEX not in existing:
+        cursor.execute(f"CREATE UNIQUE INDEX {FILE_HASH_INDEX} ON {table} (file_hash)")
+    if TEXT_HASH_INDEX not in existing:
+        cursor.execute(f"CREATE UNIQUE INDEX {TEXT_HASH_INDEX} ON {table} (text_hash)")
+
+    # One row per (job, candidate); candidates and job_details live in different databases,
+    # so there are no foreign keys
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS applications (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            job_id INT NOT NULL,
+            candidate_id INT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_applications_job_candidate (job_id, candidate_id),
+            KEY idx_applications_candidate (candidate_id)
+        )
+    ''')
+
+
+# Stored candidate matching either hash (dictionary cursor), or None
+def find_candidate(cursor, file_hash=None, text_hash=None, columns=CANDIDATE_COLUMNS, table="candidates"):
+    for column, value in (("file_hash", file_hash), ("text_hash", text_hash)):
+        if value:
+            cursor.execute(f"SELECT {columns} FROM {table} WHERE {column} = %s", (value,))
+            row = cursor.fetchone()
+            if row:
+                return row
+    return None
+
+
+# {hash: candidate_id} for every hash in `hashes` already stored in either column
+def existing_hashes(cursor, hashes, table="candidates"):
+    hashes = [value for value in set(hashes) if value]
+    if not hashes:
+        return {}
+    placeholders = ", ".join(["%s"] * len(hashes))
+    cursor.execute(f"""
+        SELECT id, file_hash, text_hash FROM {table}
+        WHERE file_hash IN ({placeholders}) OR text_hash IN ({placeholders})
+    """, (*hashes, *hashes))
+    found = {}
+    for candidate_id, stored_file_hash, stored_text_hash in cursor.fetchall():
+        for value in (stored_file_hash, stored_text_hash):
+            if value in hashes:
+                found[value] = candidate_id
+    return found
+
+
+# Idempotent: applying twice to the same job keeps a single row
+def attach_application(cursor, job_id, candidate_id):
+    cursor.execute(
+        "INSERT IGNORE INTO applications (job_id, candidate_id) VALUES (%s, %s)",
+        (job_id, candidate_id)
+    )
@@ -0,0 +1,141 @@
+# Resume extraction and candidate inserts shared by the employee app (test1.py) and
+# bulk_ingest.py. Importing this module builds no app, queue or write-behind buffer.
+import datetime
+import json
+import logging
+import db_pool
+import mysql.connector
+from candidate_index import get_candidate_index, candidate_text
+from candidate_store import link_skills, parse_retention
+from llm_gateway import get_llm_gateway, LLM_BATCH_SIZE
+from match_scores import score_candidates
+from resume_parser import parse_resume
+from tracing import fields
+
+logger = logging.getLogger(__name__)
+
+# Only the fields the local parser could not resolve are requested from the LLM
+RESUME_SCHEMA = {
+    "name": ("string", "full name in Title Case"),
+    "email": ("string", "valid email address"),
+    "skills": ("array", "list of skills, each starting with a capital letter"),
+    "work_experience": ("array", "recent positions as \"Position Title, Company Name (Year Started - Year Ended)\""),
+    "retention_rate": ("number", "average number of years per job (total years of experience divided by number of jobs), one decimal; ongoing positions end in {year}"),
+}
+RESUME_INSTRUCTION = "Given the resume text below, please extract the key information with high accuracy."
+
+INSERT_CANDIDATE = '''
+    INSERT INTO candidates (name, email, skills, experience_years, retention_rate, file_hash, text_hash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+'''
+
+
+def resume_schema(fields):
+    year = datetime.date.today().year
+    return {field: (kind, description.format(year=year)) for field, (kind, description) in RESUME_SCHEMA.items()
+            if field in fields}
+
+
+def merge_llm_fields(data, llm_data):
+    for field, value in llm_data.items():
+        if value in (None, "", []):
+            continue
+        if field in ("skills", "work_experience"):
+            value = [str(item).strip() for item in value] if isinstance(value, list) else [str(value).strip()]
+        elif field == "retention_rate":
+            try:
+                value = round(float(value), 1)
+            except (TypeError, ValueError):
+                continue
+        data[field] = value
+    return data
+
+
+# Local parse first (resume_parser); the LLM is only called for the fields it could not resolve.
+# Responses are per document and hold personal data, so they stay out of the shared LLM cache.
+def extract_resume_data(resume_text, gateway=None):
+    data, missing = parse_resume(resume_text)
+    if not missing:
+        return data, "Extracted locally (no LLM call)."
+    gateway = gateway or get_llm_gateway()
+    llm_data = gateway.generate_json(f"{RESUME_INSTRUCTION}\n\n{resume_text}", resume_schema(missing), cache=False)
+    return merge_llm_fields(data, llm_data), json.dumps(llm_data)
+
+
+# Batched variant for bulk ingestion: resumes missing the same fields share one LLM request of
+# up to `batch_size` documents
+def extract_resumes_data(resume_texts, gateway=None, batch_size=LLM_BATCH_SIZE):
+    gateway = gateway or get_llm_gateway()
+    parsed = [parse_resume(text) for text in resume_texts]
+    groups = {}
+    for position, (_, missing) in enumerate(parsed):
+        if missing:
+            groups.setdefault(tuple(missing), []).append(position)
+    for missing, positions in groups.items():
+        llm_results = gateway.generate_batch(
+            RESUME_INSTRUCTION, [resume_texts[position] for position in positions], resume_schema(missing),
+            batch_size=batch_size, cache=False
+        )
+        for position, llm_data in zip(positions, llm_results):
+            merge_llm_fields(parsed[position][0], llm_data)
+    return [data for data, _ in parsed]
+
+
+def candidate_row(data):
+    return (
+        data["name"],
+        data["email"],
+        ', '.join(data["skills"]),
+        ', '.join(data["work_experience"]),
+        parse_retention(data.get("retention_rate")),
+        data.get("file_hash"),
+        data.get("text_hash")
+    )
+
+
+# Score only the new candidates against the stored jobs (candidate_job_scores)
+def store_candidate_scores(candidates):
+    job_conn, resume_conn = db_pool.get_connection("job_database"), db_pool.get_connection("resume_db")
+    job_cursor, resume_cursor = job_conn.cursor(), resume_conn.cursor()
+    try:
+        score_candidates(job_cursor, resume_cursor, candidates)
+        resume_conn.commit()
+    except mysql.connector.Error as e:
+        logger.error("Error scoring candidates", extra=fields(error=str(e)))
+    finally:
+        job_cursor.close()
+        resume_cursor.close()
+        job_conn.close()
+        resume_conn.close()
+
+
+# Insert many resumes in one transaction (used by bulk_ingest.py); rows whose hashes are
+# already stored are skipped. Every row needs its file_hash, which is how the new ids are found.
+def insert_resumes(batch):
+    hashes = [data["file_hash"] for data in batch]
+    rows = []
+    with db_pool.get_connection("resume_db") as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                INSERT_CANDIDATE.replace("INSERT", "INSERT IGNORE", 1), [candidate_row(data) for data in batch]
+            )
+            # executemany only reports the first id of the multi-row insert (0 if every row was
+            # skipped). Rows of this batch are the ones with its file hashes from that id on;
+            # other writers' rows in the same id range have other hashes.
+            if cursor.lastrowid and hashes:
+                placeholders = ", ".join(["%s"] * len(hashes))
+                cursor.execute(
+                    f"SELECT id, skills, experience_years FROM candidates WHERE id >= %s AND file_hash IN ({placeholders})",
+                    (cursor.lastrowid, *hashes)
+                )
+                rows = cursor.fetchall()
+                link_skills(cursor, [(row[0], row[1]) for row in rows])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    get_candidate_index().add_many((row[0], candidate_text(row[1], row[2])) for row in rows)
+    store_candidate_scores(rows)
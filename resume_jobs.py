@@ -0,0 +1,221 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import tracing
+from errors import is_transient
+
+logger = logging.getLogger(__name__)
+
+# Background resume processing (queue configuration through the environment / .env)
+RESUME_QUEUE_PATH = os.getenv("RESUME_QUEUE_PATH", ".cache/resume_jobs.sqlite3")
+RESUME_SPOOL_DIR = os.getenv("RESUME_SPOOL_DIR", ".cache/resume_spool")
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", "2"))
+RESUME_MAX_ATTEMPTS = int(os.getenv("RESUME_MAX_ATTEMPTS", "4"))
+RESUME_RETRY_BACKOFF = float(os.getenv("RESUME_RETRY_BACKOFF", "2"))
+POLL_INTERVAL = 0.5
+# A 'running' job not updated for this long belongs to a worker process that died
+STALE_AFTER = float(os.getenv("RESUME_STALE_AFTER", "600"))
+# How often the workers look for such jobs
+STALE_CHECK_INTERVAL = 60.0
+
+
+# SQLite-backed job queue with a local pool of worker threads.
+# handler(job, progress) does the work for one job and returns a JSON-serializable result;
+# progress(stage) records which stage the job is in for the status endpoint.
+class ResumeJobQueue:
+    def __init__(self, handler, path=RESUME_QUEUE_PATH, spool_dir=RESUME_SPOOL_DIR,
+                 workers=RESUME_WORKERS, max_attempts=RESUME_MAX_ATTEMPTS, backoff=RESUME_RETRY_BACKOFF):
+        self.handler = handler
+        self.path = path
+        self.spool_dir = spool_dir
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._local = threading.local()
+        self._next_stale_check = 0.0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        os.makedirs(spool_dir, exist_ok=True)
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS resume_jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT,
+                job_id INTEGER,
+                filename TEXT,
+                pdf_path TEXT,
+                status TEXT,
+                stage TEXT,
+                attempts INTEGER DEFAULT 0,
+                next_run_at REAL,
+                result TEXT,
+                error TEXT,
+                created_at REAL,
+                updated_at REAL
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_resume_jobs_pending ON resume_jobs (status, next_run_at)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._conn().execute(f"UPDATE resume_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def enqueue(self, pdf_bytes, filename, kind="upload", job_id=None):
+        resume_job_id = uuid.uuid4().hex
+        pdf_path = os.path.join(self.spool_dir, f"{resume_job_id}.pdf")
+        with open(pdf_path, "wb") as spool_file:
+            spool_file.write(pdf_bytes)
+        now = time.time()
+        self._conn().execute('''
+            INSERT INTO resume_jobs (id, kind, job_id, filename, pdf_path, status, stage, attempts,
+                                     next_run_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, 'queued', 'queued', 0, ?, ?, ?)
+        ''', (resume_job_id, kind, job_id, filename, pdf_path, now, now, now))
+        self.start()
+        self._wakeup.set()
+        return resume_job_id
+
+    def status(self, resume_job_id):
+        row = self._conn().execute('''
+            SELECT id, kind, job_id, filename, status, stage, attempts, result, error, created_at, updated_at
+            FROM resume_jobs WHERE id = ?
+        ''', (resume_job_id,)).fetchone()
+        if row is None:
+            return None
+        status = dict(row)
+        status["result"] = json.loads(status["result"]) if status["result"] else None
+        return status
+
+    def stats(self):
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM resume_jobs GROUP BY status").fetchall()
+        counts = {status: count for status, count in rows}
+        counts["workers"] = self.workers
+        return counts
+
+    # Claim the oldest runnable job; BEGIN IMMEDIATE keeps two workers from taking the same one
+    def _claim(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute('''
+                SELECT * FROM resume_jobs
+                WHERE status = 'queued' AND next_run_at <= ?
+                ORDER BY next_run_at LIMIT 1
+            ''', (time.time(),)).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE resume_jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (time.time(), row["id"])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = dict(row)
+        job["attempts"] += 1
+        return job
+
+    # Each run is its own trace, so the spans of /upload and /apply work show up in one log line
+    def _run(self, job):
+        def progress(stage):
+            self._update(job["id"], stage=stage)
+
+        trace = tracing.begin_trace("resume_job", resume_job_id=job["id"], kind=job["kind"], attempt=job["attempts"])
+        status = "done"
+        try:
+            try:
+                result = self.handler(job, progress)
+            except Exception as e:
+                if is_transient(e) and job["attempts"] < self.max_attempts:
+                    delay = self.backoff * 2 ** (job["attempts"] - 1)
+                    logger.warning("Resume job failed, retrying", extra=tracing.fields(
+                        resume_job_id=job["id"], error=str(e), retry_in=delay))
+                    status = "retrying"
+                    self._update(job["id"], status="queued", stage="retrying", error=str(e),
+                                 next_run_at=time.time() + delay)
+                    return
+                logger.error("Resume job failed", extra=tracing.fields(resume_job_id=job["id"], error=str(e)))
+                status = "failed"
+                self._update(job["id"], status="failed", error=str(e))
+            else:
+                self._update(job["id"], status="done", stage="done", error=None,
+                             result=json.dumps(result, default=str))
+        except sqlite3.Error as e:
+            # The outcome could not be recorded (queue database locked, say). The worker lives
+            # on; the job stays 'running' with its PDF and _requeue_stale runs it again once it
+            # goes stale (a stored resume is then found by its hashes).
+            logger.error("Resume job status update failed", extra=tracing.fields(
+                resume_job_id=job["id"], outcome=status, error=str(e)))
+            status = "unrecorded"
+            return
+        finally:
+            tracing.end_trace(trace, status=status)
+        try:
+            os.remove(job["pdf_path"])
+        except OSError:
+            pass
+
+    # Jobs left 'running' by a process that died mid-job go back in the queue
+    def _requeue_stale(self):
+        requeued = self._conn().execute(
+            "UPDATE resume_jobs SET status = 'queued', stage = 'requeued' WHERE status = 'running' AND updated_at < ?",
+            (time.time() - STALE_AFTER,)
+        ).rowcount
+        if requeued:
+            logger.warning("Requeued stale resume jobs", extra=tracing.fields(jobs=requeued))
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                # Checked while running, not only at start, so a job orphaned shortly before a
+                # restart is picked up once it goes stale
+                if time.monotonic() >= self._next_stale_check:
+                    self._next_stale_check = time.monotonic() + STALE_CHECK_INTERVAL
+                    self._requeue_stale()
+                job = self._claim()
+            except sqlite3.Error as e:
+                logger.error("Resume queue error", extra=tracing.fields(error=str(e)))
+                job = None
+            if job is None:
+                self._wakeup.wait(POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def start(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"resume-worker-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
@@ -0,0 +1,222 @@
+import datetime
+import re
+from collections import deque
+
+# Deterministic resume field extraction; extract_resume_data only asks the LLM for what this misses
+
+EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE = re.compile(r"(?<![\w])(?:\+\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)[\s.-]?)?\d{3,4}[\s.-]?\d{3,4}(?:[\s.-]?\d{3,4})?(?![\w])")
+# A phone number has at least this many digits; "2016-2018" style year spans are never one
+MIN_PHONE_DIGITS = 7
+_YEAR_SPAN = re.compile(r"\(?(?:19|20)\d{2}\s*[-–]\s*(?:19|20)\d{2}\)?")
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:(?:{_MONTH})\s+|(?:0?[1-9]|1[0-2])[/.-])?(?:19|20)\d{{2}}"
+DATE_RANGE = re.compile(
+    rf"(?P<start>{_DATE})\s*(?:-|–|—|to|until)\s*(?P<end>{_DATE}|present|current|now|date|ongoing)",
+    re.IGNORECASE,
+)
+_YEAR = re.compile(r"(?:19|20)\d{2}")
+_MONTH_NAME = re.compile(_MONTH, re.IGNORECASE)
+_NUMERIC_MONTH = re.compile(r"^(0?[1-9]|1[0-2])[/.-]")
+_NAME_WORD = re.compile(r"^[A-Za-z][A-Za-z.'-]*$")
+HEADINGS = {"resume", "curriculum", "vitae", "cv", "skills", "experience", "education", "summary",
+            "profile", "contact", "objective", "work", "history", "references", "projects"}
+# Words of a job title line ("Senior Data Scientist"), which has the shape of a name
+TITLE_WORDS = {"senior", "junior", "lead", "principal", "staff", "chief", "head", "associate", "assistant",
+               "intern", "trainee", "engineer", "engineering", "developer", "programmer", "architect",
+               "scientist", "analyst", "manager", "director", "officer", "consultant", "specialist",
+               "administrator", "designer", "accountant", "executive", "coordinator", "technician",
+               "recruiter", "teacher", "nurse", "data", "software", "product", "project", "marketing",
+               "sales", "business", "full", "stack", "frontend", "backend", "devops", "qa", "hr"}
+NOT_A_NAME = HEADINGS | TITLE_WORDS
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+MIN_CONFIDENT_SKILLS = 3
+
+SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "C", "C++", "C#", "Go", "Golang", "Rust", "Ruby", "PHP",
+    "Kotlin", "Swift", "Scala", "R", "MATLAB", "Perl", "Bash", "Shell Scripting", "SQL", "NoSQL", "HTML",
+    "CSS", "Sass", "React", "React Native", "Angular", "Vue", "Next.js", "Node.js", "Express", "Django",
+    "Flask", "FastAPI", "Spring", "Spring Boot", ".NET", "ASP.NET", "Laravel", "Ruby on Rails", "jQuery",
+    "Bootstrap", "Tailwind", "GraphQL", "REST", "REST APIs", "gRPC", "Microservices", "MySQL", "PostgreSQL",
+    "SQLite", "Oracle", "SQL Server", "MongoDB", "Redis", "Cassandra", "Elasticsearch", "DynamoDB",
+    "Firebase", "Kafka", "RabbitMQ", "Spark", "Hadoop", "Airflow", "dbt", "Snowflake", "BigQuery",
+    "Databricks", "ETL", "Data Warehousing", "AWS", "Azure", "GCP", "Google Cloud", "Docker", "Kubernetes",
+    "Terraform", "Ansible", "Jenkins", "GitHub Actions", "CI/CD", "DevOps", "Linux", "Git", "Nginx",
+    "Machine Learning", "Deep Learning", "NLP", "Natural Language Processing", "Computer Vision",
+    "TensorFlow", "PyTorch", "Keras", "Scikit-learn", "Pandas", "NumPy", "SciPy", "OpenCV", "LangChain",
+    "LLM", "Generative AI", "Hugging Face", "Transformers", "Data Analysis", "Data Visualization",
+    "Statistics", "Tableau", "Power BI", "Excel", "Looker", "A/B Testing", "Android", "iOS", "Flutter",
+    "Unity", "Figma", "Photoshop", "Illustrator", "UI/UX", "Agile", "Scrum", "Kanban", "Jira",
+    "Project Management", "Product Management", "Salesforce", "SAP", "HubSpot", "SEO", "Digital Marketing",
+    "Content Writing", "Communication", "Leadership", "Team Management", "Accounting", "Bookkeeping",
+    "QuickBooks", "Financial Analysis", "Recruiting", "Payroll", "Customer Service", "Sales",
+    "Selenium", "Cypress", "Jest", "PyTest", "Unit Testing", "Cybersecurity", "Networking",
+]
+
+
+# Aho-Corasick automaton: every dictionary term is found in one pass over the text,
+# independent of how many terms there are
+class AhoCorasick:
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for term in terms:
+            state = 0
+            for ch in term:
+                if ch not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][ch] = len(self._goto) - 1
+                state = self._goto[state][ch]
+            self._output[state].append(term)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    # Yields (start, end, term) for every occurrence
+    def find(self, text):
+        state = 0
+        for end, ch in enumerate(text, start=1):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for term in self._output[state]:
+                yield end - len(term), end, term
+
+
+_CANONICAL_SKILLS = {skill.lower(): skill for skill in SKILLS}
+_SKILL_MATCHER = AhoCorasick(_CANONICAL_SKILLS)
+
+
+def find_skills(text):
+    lowered = text.lower()
+    found = {}
+    covered = 0
+    # Leftmost-longest, so "C++" does not also count as "C"
+    for start, end, term in sorted(_SKILL_MATCHER.find(lowered), key=lambda m: (m[0], -m[1])):
+        if start < covered:
+            continue
+        # Whole words only, so "Go" does not match inside "Google"
+        if start > 0 and lowered[start - 1].isalnum():
+            continue
+        if end < len(lowered) and lowered[end].isalnum():
+            continue
+        found.setdefault(_CANONICAL_SKILLS[term], start)
+        covered = end
+    return list(found)
+
+
+def _parse_date(text, today):
+    lowered = text.lower()
+    if lowered in ("present", "current", "now", "date", "ongoing"):
+        return today.year + (today.month - 1) / 12
+    year = int(_YEAR.search(text).group(0))
+    month = 1
+    month_name = _MONTH_NAME.match(lowered)
+    numeric_month = _NUMERIC_MONTH.match(lowered)
+    if month_name:
+        month = MONTHS.index(month_name.group(0)[:3]) + 1
+    elif numeric_month:
+        month = int(numeric_month.group(1))
+    return year + (month - 1) / 12
+
+
+# [(line, years)] for every line holding a date range
+def find_positions(text, today=None):
+    today = today or datetime.date.today()
+    positions = []
+    for line in text.splitlines():
+        for match in DATE_RANGE.finditer(line):
+            years = _parse_date(match.group("end"), today) - _parse_date(match.group("start"), today)
+            if years >= 0:
+                positions.append((line.strip(" -•\t"), years))
+    return positions
+
+
+def _name_from(line):
+    words = line.split()
+    if not 2 <= len(words) <= 4:
+        return None
+    if any(not _NAME_WORD.match(word) or word.lower() in NOT_A_NAME for word in words):
+        return None
+    # "Python Java SQL" has the shape of a name too (one skill-like word may be a name: "Ruby")
+    if len(find_skills(line)) > 1:
+        return None
+    return " ".join(word.capitalize() if word.isupper() or word.islower() else word for word in words)
+
+
+# Only where a name is expected: the top line (after a "Resume" / "Curriculum Vitae" heading) or
+# the lines next to the email address. None sends the field to the LLM.
+def find_name(text, email=None):
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    top = next((index for index, line in enumerate(lines)
+                if not all(word.lower().strip(":") in HEADINGS for word in line.split())), None)
+    candidates = [] if top is None else [top]
+    if email:
+        for index, line in enumerate(lines):
+            if email in line:
+                candidates.extend([index - 1, index + 1])
+                break
+    for index in candidates:
+        if 0 <= index < len(lines):
+            name = _name_from(lines[index])
+            if name:
+                return name
+    return None
+
+
+# First number with the shape of a phone number, or None
+def find_phone(text):
+    for match in PHONE.finditer(text):
+        candidate = match.group(0).strip()
+        if _YEAR_SPAN.fullmatch(candidate) or sum(ch.isdigit() for ch in candidate) < MIN_PHONE_DIGITS:
+            continue
+        return candidate
+    return None
+
+
+# Average years per position, the same "retention rate" the LLM prompt asks for
+def retention_rate(positions):
+    if not positions:
+        return None
+    return round(sum(years for _, years in positions) / len(positions), 1)
+
+
+# Returns (data, missing): data has the same keys as extract_resume_data,
+# missing lists the fields that could not be resolved with confidence
+def parse_resume(text, today=None):
+    email = EMAIL.search(text)
+    phone = find_phone(text)
+    name = find_name(text, email.group(0) if email else None)
+    skills = find_skills(text)
+    positions = find_positions(text, today)
+
+    data = {
+        "name": name or "Not found",
+        "email": email.group(0) if email else "Not found",
+        "phone": phone,
+        "skills": skills,
+        "work_experience": [line for line, _ in positions],
+        "retention_rate": retention_rate(positions) or 0.0,
+    }
+    missing = []
+    if not name:
+        missing.append("name")
+    if not email:
+        missing.append("email")
+    if len(skills) < MIN_CONFIDENT_SKILLS:
+        missing.append("skills")
+    if not positions:
+        missing.extend(["work_experience", "retention_rate"])
+    return data, missing
@@ -0,0 +1,147 @@
+import logging
+import os
+import re
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Parsed REVIEWS.csv is cached here as one .npz per source file (one array per column)
+CACHE_DIR = os.getenv("REVIEWS_CACHE_DIR", ".cache")
+CACHE_VERSION = 1
+
+COUNT_COLUMNS = ["Reviews", "Salaries", "Jobs"]
+CATEGORY_COLUMNS = ["Company_Size", "Industry"]
+
+# Company_Size buckets from smallest to largest, "Unknown" is kept as a missing value
+SIZE_BUCKETS = [
+    "1 to 50 Employees",
+    "51 to 200 Employees",
+    "201 to 500 Employees",
+    "501 to 1000 Employees",
+    "1001 to 5000 Employees",
+    "5001 to 10000 Employees",
+    "10000+ Employees",
+]
+
+_SUFFIXES = {"": 1, "K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+_SIZE_RANGE = re.compile(r"(\d+)\s+to\s+(\d+)")
+_SIZE_OPEN = re.compile(r"(\d+)\+")
+
+
+# "158.8K" -> 158800.0, "1.8k" -> 1800.0, "--" -> NaN
+# Only the distinct strings are parsed, the result is broadcast back through the factorized codes
+def parse_counts(column):
+    codes, uniques = pd.factorize(column.astype(str))
+    parts = pd.Series(uniques).str.strip().str.upper().str.extract(r"^([\d.]+)\s*([KMB]?)$")
+    numbers = pd.to_numeric(parts[0], errors="coerce") * parts[1].map(_SUFFIXES).astype(float)
+    parsed = np.append(numbers.to_numpy(dtype=float), np.nan)
+    return pd.Series(parsed[codes], index=column.index)
+
+
+# "5001 to 10000 Employees" -> (5001, 10000), "10000+ Employees" -> (10000, NaN)
+def parse_size_bucket(size):
+    size = str(size)
+    match = _SIZE_RANGE.search(size)
+    if match:
+        return float(match.group(1)), float(match.group(2))
+    match = _SIZE_OPEN.search(size)
+    if match:
+        return float(match.group(1)), np.nan
+    return np.nan, np.nan
+
+
+# 158800.0 -> "158.8K", the inverse of parse_counts for display
+def format_count(value):
+    if value is None or pd.isna(value):
+        return "N/A"
+    for suffix, factor in (("B", 1e9), ("M", 1e6), ("K", 1e3)):
+        if abs(value) >= factor:
+            return f"{value / factor:.1f}".rstrip("0").rstrip(".") + suffix
+    return f"{value:g}"
+
+
+def parse_reviews(raw):
+    data = pd.DataFrame({"Company": raw["Company"].astype(str)})
+    data["Rating"] = pd.to_numeric(raw["Rating"], errors="coerce").astype("float32")
+    for column in COUNT_COLUMNS:
+        data[column] = parse_counts(raw[column]).astype("float32")
+
+    sizes = pd.Categorical(raw["Company_Size"], categories=SIZE_BUCKETS, ordered=True)
+    data["Company_Size"] = sizes
+    # Bucket bounds looked up through the category codes (code -1 = Unknown -> NaN)
+    bounds = np.array([parse_size_bucket(bucket) for bucket in SIZE_BUCKETS] + [(np.nan, np.nan)],
+                      dtype="float32")
+    data["Company_Size_Min"] = bounds[sizes.codes, 0]
+    data["Company_Size_Max"] = bounds[sizes.codes, 1]
+    data["Industry"] = raw["Industry"].astype("category")
+    return data
+
+
+def _cache_path(filepath):
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    return os.path.join(CACHE_DIR, f"{name}.npz")
+
+
+def _source_signature(filepath):
+    stat = os.stat(filepath)
+    return np.array([CACHE_VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+def _save_cache(data, path, signature):
+    arrays = {"__signature__": signature, "__columns__": np.array(list(data.columns))}
+    for column in data.columns:
+        values = data[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            arrays[f"{column}.codes"] = values.cat.codes.to_numpy()
+            arrays[f"{column}.categories"] = values.cat.categories.to_numpy().astype(str)
+            arrays[f"{column}.ordered"] = np.array(values.cat.ordered)
+        elif pd.api.types.is_numeric_dtype(values.dtype):
+            arrays[column] = values.to_numpy()
+        else:
+            arrays[column] = values.to_numpy().astype(str)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _load_cache(path, signature):
+    with np.load(path, allow_pickle=False) as arrays:
+        if not np.array_equal(arrays["__signature__"], signature):
+            return None
+        columns = {}
+        for column in arrays["__columns__"]:
+            column = str(column)
+            if f"{column}.codes" in arrays.files:
+                columns[column] = pd.Categorical.from_codes(
+                    arrays[f"{column}.codes"],
+                    categories=arrays[f"{column}.categories"].astype(object),
+                    ordered=bool(arrays[f"{column}.ordered"]),
+                )
+            elif arrays[column].dtype.kind == "U":
+                columns[column] = arrays[column].astype(object)
+            else:
+                columns[column] = arrays[column]
+    return pd.DataFrame(columns)
+
+
+# Typed REVIEWS.csv: numeric counts, categorical Industry/Company_Size, cached as .npz
+def load_reviews(filepath, use_cache=True):
+    signature = _source_signature(filepath)
+    path = _cache_path(filepath)
+    if use_cache and os.path.exists(path):
+        try:
+            data = _load_cache(path, signature)
+            if data is not None:
+                return data
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache %s: %s", path, e)
+
+    data = parse_reviews(pd.read_csv(filepath))
+    if use_cache:
+        try:
+            _save_cache(data, path, signature)
+        except OSError as e:
+            logger.warning("Could not write cache %s: %s", path, e)
+    return data
@@ -0,0 +1,59 @@
+import argparse
+import numpy as np
+import pandas as pd
+from reviews_loader import load_reviews, format_count
+
+SENTIMENTS = ["Negative", "Neutral", "Positive", "Exceptional"]
+
+
+# One vectorized pass over every rating:
+#   rating > 4 -> Exceptional, 3.5 < rating <= 4 -> Positive, 3 <= rating <= 3.5 -> Neutral, else Negative
+# (the old per-request if/elif chain sent 3.4 <= rating <= 3.5 to Negative)
+def sentiment_buckets(ratings):
+    ratings = ratings.to_numpy(dtype=float)
+    labels = np.select(
+        [ratings > 4, ratings > 3.5, ratings >= 3, ratings < 3],
+        ["Exceptional", "Positive", "Neutral", "Negative"],
+        default="Unknown",
+    )
+    return pd.Categorical(labels, categories=SENTIMENTS + ["Unknown"])
+
+
+# Adds the Sentiment and Summary columns for all companies so a request only has to look them up
+def add_sentiment_columns(data):
+    data = data.copy()
+    data["Sentiment"] = sentiment_buckets(data["Rating"])
+
+    ratings = data["Rating"].map(lambda r: f"{r:g}")
+    salaries = data["Salaries"].map(format_count)
+    sizes = data["Company_Size"].astype(object).fillna("an unknown number of").astype(str)
+    companies = data["Company"].astype(str)
+    data["Summary"] = (
+        "**" + companies + "** has a rating of " + ratings + ", indicating a "
+        + data["Sentiment"].astype(str) + " sentiment. The average salary at "
+        + companies + " is $" + salaries + ", and the company employs around "
+        + sizes + " individuals."
+    )
+    return data
+
+
+def build_sentiment_table(filepath):
+    data = add_sentiment_columns(load_reviews(filepath))
+    return data[["Company", "Rating", "Salaries", "Company_Size", "Industry", "Sentiment", "Summary"]]
+
+
+# The apps compute the table when they load REVIEWS.csv (load_data in test.py and main.py), so
+# nothing is written to disk; this prints how the companies fall into the sentiment buckets:
+#   python sentiment_table.py --csv REVIEWS.csv --show 5
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentiment buckets and summaries for every company.")
+    parser.add_argument("--csv", default="REVIEWS.csv")
+    parser.add_argument("--show", type=int, default=0, help="sample summaries printed per sentiment")
+    args = parser.parse_args()
+
+    table = build_sentiment_table(args.csv)
+    print(f"{len(table)} companies")
+    print(table["Sentiment"].value_counts().to_string())
+    for sentiment, group in table.groupby("Sentiment", observed=True):
+        for summary in group["Summary"].head(args.show):
+            print(f"[{sentiment}] {summary}")
@@ -0,0 +1,358 @@
+# Embedded SQLite storage, selected with DB_BACKEND=sqlite: db_pool then opens connections to
+# one SQLite file per database (SQLITE_DIR/job_database.sqlite3, SQLITE_DIR/resume_db.sqlite3)
+# instead of MySQL, for single-node deployments, tests and offline load tests.
+#
+# The connections speak the part of the mysql.connector API the apps use (cursor(dictionary=),
+# lastrowid, rowcount, ping, in_transaction), so every module keeps its queries:
+#   - statements are rewritten once from the MySQL dialect (%s placeholders, INSERT IGNORE,
+#     ON DUPLICATE KEY UPDATE, LEFT(), LIKE with backslash escapes) and the rewrite is memoized;
+#     sqlite3 keeps the compiled statement per connection (cached_statements), so a repeated
+#     query is prepared once
+#   - the apps' DDL creates the tables here as on MySQL: it is translated (AUTO_INCREMENT keys,
+#     inline KEY clauses, multi-clause ALTER TABLE) and run; a statement the translation does not
+#     know raises NotSupportedError. information_schema checks are answered from the catalog.
+#   - a FULLTEXT index becomes an FTS5 table, <table>_fts, kept in sync by triggers; job search
+#     runs on it (job_search.py checks cursor.dialect)
+#   - errors are raised as mysql.connector errors, which the apps already catch
+# WAL mode lets readers run alongside the single writer; busy writers wait up to SQLITE_TIMEOUT.
+import functools
+import os
+import re
+import sqlite3
+import threading
+import mysql.connector
+
+SQLITE_DIR = os.getenv("SQLITE_DIR", ".data")
+SQLITE_TIMEOUT = float(os.getenv("SQLITE_TIMEOUT", "30"))
+# NORMAL: in WAL mode a commit is not fsynced (a power cut can lose the last commits, never
+# corrupt the file); FULL fsyncs every commit
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+# Compiled statements kept per connection
+SQLITE_STATEMENT_CACHE = 256
+
+_DUPLICATE = re.compile(r"ON\s+DUPLICATE\s+KEY\s+UPDATE", re.I)
+_VALUES_REF = re.compile(r"VALUES\((\w+)\)", re.I)
+_INSERT_IGNORE = re.compile(r"INSERT\s+IGNORE", re.I)
+_LEFT = re.compile(r"\bLEFT\((\w+),", re.I)
+_LIKE = re.compile(r"LIKE\s+%s", re.I)
+_DDL = re.compile(r"^\s*(CREATE|ALTER|DROP)\b", re.I)
+_CREATE_TABLE = re.compile(r"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*)\)[^)]*$", re.I | re.S)
+_CREATE_INDEX = re.compile(r"^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(\w+)\s*\((.*)\)\s*$",
+                           re.I | re.S)
+_ALTER_TABLE = re.compile(r"^\s*ALTER\s+TABLE\s+(\w+)\s+(.*?)\s*$", re.I | re.S)
+_DROP_TABLE = re.compile(r"^\s*DROP\s+TABLE\b", re.I)
+# KEY / UNIQUE KEY / FULLTEXT INDEX name (columns), inline in CREATE TABLE or after ALTER TABLE ADD
+_INDEX_DEFINITION = re.compile(r"^(?:ADD\s+)?(UNIQUE\s+|FULLTEXT\s+)?(?:KEY|INDEX)\s+(\w+)\s*\((.*)\)$", re.I | re.S)
+_ADD_COLUMN = re.compile(
+    r"^ADD\s+(?:COLUMN\s+)?(?!(?:CONSTRAINT|PRIMARY|FOREIGN|UNIQUE|FULLTEXT|SPATIAL|KEY|INDEX|CHECK)\b)(\w+\s+.*)$",
+    re.I | re.S)
+_MODIFY_COLUMN = re.compile(r"^MODIFY\s", re.I)
+_COLUMN_CHANGE = re.compile(r"^(DROP|RENAME)\s+COLUMN\s", re.I)
+# CHANGE [COLUMN] old new definition: a rename, the definition is kept as SQLite stored it
+_CHANGE_COLUMN = re.compile(r"^CHANGE\s+(?:COLUMN\s+)?(\w+)\s+(\w+)\s", re.I)
+_AUTO_PRIMARY_KEY = re.compile(r"\bINT(?:EGER)?\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.I)
+_ON_UPDATE = re.compile(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", re.I)
+_DATA_TYPE = {"integer": "int"}
+_CATALOG = re.compile(r"information_schema\.(columns|statistics)", re.I)
+_INSERT_INTO = re.compile(r"\s*INSERT\s+(?:IGNORE\s+)?INTO\s+(\w+)", re.I)
+
+
+# MySQL statement -> SQLite statement; the apps build a bounded set of statements, so each is
+# rewritten once
+@functools.lru_cache(maxsize=1024)
+def translate(sql):
+    match = _DUPLICATE.search(sql)
+    if match:
+        sql = sql[:match.start()] + "ON CONFLICT DO UPDATE SET" + _VALUES_REF.sub(r"excluded.\1", sql[match.end():])
+    sql = _INSERT_IGNORE.sub("INSERT OR IGNORE", sql)
+    sql = _LEFT.sub(r"substr(\1, 1,", sql)
+    sql = _LIKE.sub("LIKE %s ESCAPE '\\\\'", sql)
+    return sql.replace("%s", "?")
+
+
+# Top-level comma-separated parts of a column list or ALTER TABLE clause list
+def _split(text):
+    parts, depth, start = [], 0, 0
+    for index, ch in enumerate(text):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[start:index].strip())
+            start = index + 1
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def _unsupported(sql):
+    return mysql.connector.NotSupportedError(msg=f"DDL not supported on SQLite: {' '.join(sql.split())}")
+
+
+def _index(table, kind, name, columns):
+    if kind and kind.strip().upper() == "FULLTEXT":
+        return ("fulltext", table, [column.strip() for column in columns.split(",")])
+    unique = "UNIQUE " if kind else ""
+    return ("sql", f"CREATE {unique}INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+# MySQL DDL -> [("sql", statement) or ("fulltext", table, columns)]; SQLite has no inline
+# indexes, so KEY clauses become CREATE INDEX statements after the table. A CREATE TABLE IF NOT
+# EXISTS starts with ("table", name): like MySQL, nothing is run when the table exists.
+@functools.lru_cache(maxsize=256)
+def translate_ddl(sql):
+    create = _CREATE_TABLE.match(sql)
+    if create:
+        exists, table, body = create.groups()
+        columns, actions = [], []
+        for part in _split(body):
+            index = _INDEX_DEFINITION.match(part)
+            if index:
+                actions.append(_index(table, *index.groups()))
+                continue
+            part = _ON_UPDATE.sub("", _AUTO_PRIMARY_KEY.sub("INTEGER PRIMARY KEY AUTOINCREMENT", part))
+            if "AUTO_INCREMENT" in part.upper():
+                raise _unsupported(sql)
+            columns.append(part)
+        statement = f"CREATE TABLE {exists or ''}{table} (\n    " + ",\n    ".join(columns) + "\n)"
+        return (*([("table", table)] if exists else []), ("sql", statement), *actions)
+
+    index = _CREATE_INDEX.match(sql)
+    if index:
+        unique, name, table, columns = index.groups()
+        return (_index(table, unique, name, columns),)
+
+    alter = _ALTER_TABLE.match(sql)
+    if alter:
+        table, clauses = alter.groups()
+        actions = []
+        for clause in _split(clauses):
+            index = _INDEX_DEFINITION.match(clause)
+            if index:
+                actions.append(_index(table, *index.groups()))
+            elif _COLUMN_CHANGE.match(clause):
+                actions.append(("sql", f"ALTER TABLE {table} {clause}"))
+            elif _CHANGE_COLUMN.match(clause):
+                old, new = _CHANGE_COLUMN.match(clause).groups()
+                if old != new:
+                    actions.append(("sql", f"ALTER TABLE {table} RENAME COLUMN {old} TO {new}"))
+            elif _MODIFY_COLUMN.match(clause):
+                # SQLite stores any value in any column and keeps what it stored: changing the
+                # declared type would only rebuild the table for the catalog's sake
+                continue
+            elif _ADD_COLUMN.match(clause):
+                actions.append(("sql", f"ALTER TABLE {table} ADD COLUMN {_ADD_COLUMN.match(clause).group(1)}"))
+            else:
+                raise _unsupported(sql)
+        return tuple(actions)
+
+    if _DROP_TABLE.match(sql):
+        return (("sql", sql),)
+    raise _unsupported(sql)
+
+
+def _error(e):
+    if isinstance(e, sqlite3.IntegrityError):
+        return mysql.connector.IntegrityError(msg=str(e))
+    if isinstance(e, sqlite3.OperationalError):
+        return mysql.connector.OperationalError(msg=str(e))
+    return mysql.connector.DatabaseError(msg=str(e))
+
+
+# FULLTEXT index on `columns` of `table`: <table>_fts covers every column any FULLTEXT index of
+# the table asked for, in the order they were first asked for (job_search.py weighs them in that
+# order), and is rebuilt from the table when a column is added
+def _ensure_fulltext(connection, table, columns):
+    fts = f"{table}_fts"
+    existing = [row[1] for row in connection.execute(f"PRAGMA table_info({fts})")]
+    if set(columns) <= set(existing):
+        return
+    columns = existing + [column for column in columns if column not in existing]
+    listed = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    for event in ("insert", "delete", "update"):
+        connection.execute(f"DROP TRIGGER IF EXISTS {fts}_{event}")
+    connection.execute(f"DROP TABLE IF EXISTS {fts}")
+    connection.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({listed}, content='{table}', content_rowid='id')")
+    connection.execute(f"""CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {fts} (rowid, {listed}) VALUES (new.id, {new_values});
+    END""")
+    connection.execute(f"""CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {fts} ({fts}, rowid, {listed}) VALUES ('delete', old.id, {old_values});
+    END""")
+    connection.execute(f"""CREATE TRIGGER {fts}_update AFTER UPDATE ON {table} BEGIN
+        INSERT INTO {fts} ({fts}, rowid, {listed}) VALUES ('delete', old.id, {old_values});
+        INSERT INTO {fts} (rowid, {listed}) VALUES (new.id, {new_values});
+    END""")
+    # Index the rows stored before the FTS table existed
+    connection.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+class SQLiteCursor:
+    dialect = "sqlite"
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection.cursor()
+        self._dictionary = dictionary
+        self._rows = None
+        self._lastrowid = None
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid if self._lastrowid is None else self._lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def _catalog(self, sql, params):
+        table = params[-1]
+        if "statistics" in sql.lower():
+            rows = [(row[1],) for row in self._connection.execute(f"PRAGMA index_list({table})")]
+            return rows + [("PRIMARY",)]
+        # Declared type as MySQL's DATA_TYPE reports it: "varchar(255)" -> "varchar", "integer" -> "int"
+        columns = [(row[1], _DATA_TYPE.get(row[2].split("(")[0].strip().lower(), row[2].split("(")[0].strip().lower()))
+                   for row in self._connection.execute(f"PRAGMA table_info({table})")]
+        return columns if "data_type" in sql.lower() else [(name,) for name, _ in columns]
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        params = tuple(params or ())
+        self._rows = None
+        self._lastrowid = None
+        if _DDL.match(operation):
+            self._ddl(operation)
+            return
+        if _CATALOG.search(operation):
+            self._rows = self._catalog(operation, params)
+            return
+        try:
+            self._cursor.execute(translate(operation), params)
+        except sqlite3.Error as e:
+            raise _error(e) from e
+
+    def _ddl(self, operation):
+        try:
+            for action in translate_ddl(operation):
+                if action[0] == "table":
+                    if self._connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                                (action[1],)).fetchone():
+                        return
+                elif action[0] == "fulltext":
+                    _ensure_fulltext(self._connection, action[1], action[2])
+                else:
+                    self._cursor.execute(action[1])
+        except sqlite3.Error as e:
+            raise _error(e) from e
+
+    # Like MySQL, lastrowid after a multi-row INSERT is the first new id (0 when none was inserted).
+    # The sequence is read inside the insert's transaction: outside one, BEGIN IMMEDIATE takes the
+    # write lock first, so no other writer can use the next ids in between. (Inside a transaction
+    # the read fixes the snapshot; a writer that committed since makes the insert fail instead.)
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._rows = None
+        self._lastrowid = None
+        insert = _INSERT_INTO.match(operation)
+        try:
+            if insert:
+                if not self._connection.in_transaction:
+                    self._connection.execute("BEGIN IMMEDIATE")
+                before = self._connection.total_changes
+                row = self._connection.execute("SELECT seq FROM sqlite_sequence WHERE name = ?",
+                                               (insert.group(1),)).fetchone()
+            self._cursor.executemany(translate(operation), [tuple(params) for params in seq_params])
+        except sqlite3.Error as e:
+            raise _error(e) from e
+        if insert:
+            self._lastrowid = (row[0] if row else 0) + 1 if self._connection.total_changes > before else 0
+
+    def _convert(self, rows):
+        if not self._dictionary or self._rows is not None:
+            return rows
+        names = [column[0] for column in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        row = self._cursor.fetchone()
+        return None if row is None else self._convert([row])[0]
+
+    def fetchmany(self, size=1):
+        if self._rows is not None:
+            rows, self._rows = self._rows[:size], self._rows[size:]
+            return rows
+        return self._convert(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+        return self._convert(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, path, timeout=SQLITE_TIMEOUT):
+        # Pooled connections move between request threads, one user at a time
+        self._connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False,
+                                           cached_statements=SQLITE_STATEMENT_CACHE)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._connection, dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        pass
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+
+# One SQLite file per database name; the apps' schema setup creates the tables, as on MySQL
+class SQLiteDatabases:
+    def __init__(self, directory=SQLITE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, database):
+        # MySQL connects without a default database instead (and fails on the first table)
+        if not database:
+            raise mysql.connector.ProgrammingError(msg="No database name given (is MYSQL_DATABASE set?)")
+        return os.path.join(self.directory, f"{database}.sqlite3")
+
+    def connect(self, database):
+        return SQLiteConnection(self.path(database))
+
+
+_default_databases = None
+_default_lock = threading.Lock()
+
+
+def get_databases():
+    global _default_databases
+    with _default_lock:
+        if _default_databases is None:
+            _default_databases = SQLiteDatabases()
+        return _default_databases
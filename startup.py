@@ -0,0 +1,57 @@
+# Startup helpers for the Flask apps (test.py, test1.py); the Streamlit pages use st.cache_resource
+# for the same purpose. Importing an entry point only defines things; schema setup and other work
+# that needs MySQL or a heavy library runs once, on first use, so a worker starts with the DB down.
+import threading
+
+_results = {}
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+# Runs fn() the first time `key` is asked for in this process and returns its result. A failure
+# is raised to the caller and retried on the next call rather than remembered. Keyed by name
+# so callers can pass a lambda.
+def run_once(key, fn):
+    if key in _results:
+        return _results[key]
+    with _locks_lock:
+        lock = _locks.setdefault(key, threading.Lock())
+    with lock:
+        if key not in _results:
+            _results[key] = fn()
+    return _results[key]
+
+
+# Views declared at import time and bound to an app by create_app(). Unlike a Blueprint the
+# endpoints keep their plain names, so url_for('job_details') in the templates is unchanged.
+class Routes:
+    def __init__(self):
+        self._routes = []
+
+    # cached=True serves the view through the app's ResponseCache (ETag / Last-Modified)
+    def route(self, rule, cached=False, **options):
+        def decorator(view):
+            self._routes.append((rule, view, cached, options))
+            return view
+        return decorator
+
+    def register(self, app, response_cache):
+        for rule, view, cached, options in self._routes:
+            app.add_url_rule(rule, view_func=response_cache.cached(view) if cached else view, **options)
+
+
+# Flask app with the given routes, its own response cache (app.extensions["response_cache"]) and
+# tracing (/metrics). ensure_schema runs before the first request instead of at import.
+def build_app(import_name, routes, ensure_schema=None):
+    from flask import Flask
+    from http_cache import ResponseCache
+    import tracing
+
+    app = Flask(import_name)
+    # First, so the request trace also covers ensure_schema and the cached views
+    tracing.install(app)
+    response_cache = app.extensions["response_cache"] = ResponseCache()
+    routes.register(app, response_cache)
+    if ensure_schema is not None:
+        app.before_request(ensure_schema)
+    return app
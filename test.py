@@ -1,174 +1,257 @@
-from flask import Flask, render_template, request
+from flask import render_template, request, jsonify, current_app
+import logging
+import uuid
 import mysql.connector
-import pandas as pd
-import os
 from dotenv import load_dotenv
-import google.generativeai as genai
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain_groq import ChatGroq
+import db_pool
+from company_index import CompanyIndex, EXACT, FUZZY
+from company_analytics import IndexedAnalytics, GROUPS, ANALYTICS_DEFAULT_LIMIT, ANALYTICS_MAX_LIMIT
+from job_search import ensure_job_details_schema
+from llm_gateway import get_llm_gateway, GROQ_MODEL
+from candidate_index import get_candidate_index, CandidateSync, RAG_TOP_K
+from candidate_ranking import MapReduceRanker, RANK_MODE, RANK_MAX_CANDIDATES
+from http_cache import bump_version
+from candidate_store import find_candidates, CANDIDATE_PAGE_SIZE
+from match_scores import (ensure_match_score_schema, score_jobs, start_catch_up,
+                          top_candidates as top_candidates_for_job, MATCH_PAGE_SIZE, MATCH_RERANK_TOP)
+from startup import Routes, build_app, run_once
+from tracing import fields
+from write_behind import WriteBehind
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Configure Google Generative AI and Langchain Groq
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Bound to the app (with its response cache) by create_app()
+routes = Routes()
 
-# Initialize ChatGroq with the correct method (assuming you configure the API key elsewhere)
-chat_groq_model = ChatGroq(model_name="llama3-8b-8192")
+# Gemini and Groq clients are built inside the gateway on their first call; plain-text responses
+# are cached by model + prompt (the sentiment prompt only has a handful of variants)
+llm_gateway = get_llm_gateway()
 
-app = Flask(__name__)
-
-# MySQL connection setup
+# MySQL connection setup (pooled, close() returns the connection to the pool)
 def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST"),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database="job_database"
-    )
+    return db_pool.get_connection("job_database")
 
 def get_resume_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST"),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database="resume_db"
-    )
+    return db_pool.get_connection("resume_db")
 
 # Initialize the database
 def initialize_database():
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            ensure_job_details_schema(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+
+    with get_resume_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            ensure_match_score_schema(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+
+# Once per process, before the first request rather than at import. The match score catch-up
+# (match_scores.py) starts once the tables exist.
+def ensure_schema():
+    run_once("employer_schema", initialize_database)
+    run_once("match_catch_up", lambda: start_catch_up(get_db_connection, get_resume_db_connection))
+
+INSERT_JOB = """
+    INSERT IGNORE INTO job_details (company_name, job_title, job_description, sentiment_analysis, write_key)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+# A batch of buffered job rows in one transaction; one id per row (not executemany, which only
+# reports the first id of the batch). Every row carries a write key, so a batch replayed from the
+# spill file after a crash finds the rows it already wrote instead of inserting them again.
+def flush_jobs(rows):
+    # Replayed rows can be flushed before the first request has created the write_key column
+    run_once("employer_schema", initialize_database)
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS job_details(
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            company_name VARCHAR(255),
-            job_title VARCHAR(255),
-            job_description TEXT, 
-            sentiment_analysis TEXT
-        )
-    ''')
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-initialize_database()
-
-# Save job details to the database
-def save_job_details(company_name, job_title, job_description, sentiment_analysis):
-    conn = get_db_connection()
+    try:
+        job_ids = []
+        for row in rows:
+            # Rows spilled before write keys existed have none
+            row = (list(row) + [None])[:5]
+            cursor.execute(INSERT_JOB, tuple(row))
+            if cursor.rowcount:
+                job_ids.append(cursor.lastrowid)
+            else:
+                cursor.execute("SELECT id FROM job_details WHERE write_key = %s", (row[4],))
+                job_ids.append(cursor.fetchone()[0])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return job_ids
+
+def jobs_flushed(rows, job_ids):
+    # Cached job pages in every app process go stale now
+    bump_version()
+    store_job_scores([(job_id, row[1], row[2]) for row, job_id in zip(rows, job_ids)])
+
+# Job inserts leave the request through the write-behind buffer (see write_behind.py)
+def get_job_writes():
+    return run_once("job_writes", lambda: WriteBehind(
+        "job_details", flush_jobs, on_flushed=jobs_flushed, retryable=db_pool.RETRYABLE_ERRORS
+    ))
+
+# Save job details to the database. wait=True returns the new id once the row is committed
+# (read-your-writes for the caller), wait=False returns None as soon as the row is buffered.
+def save_job_details(company_name, job_title, job_description, sentiment_analysis, wait=True):
+    pending = get_job_writes().submit([company_name, job_title, job_description, sentiment_analysis,
+                                       uuid.uuid4().hex])
+    if not wait:
+        return None
+    try:
+        return pending.result()
+    except (mysql.connector.Error, TimeoutError) as e:
+        logger.error("Error saving job", extra=fields(company_name=company_name, error=str(e)))
+        return None
+
+# Score only the new jobs against the stored candidates (candidate_job_scores); one candidate
+# scan covers the whole flushed batch of (id, title, description) rows
+def store_job_scores(jobs):
+    conn = get_resume_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("""
-            INSERT INTO job_details (company_name, job_title, job_description, sentiment_analysis)
-            VALUES (%s, %s, %s, %s)
-        """, (company_name, job_title, job_description, sentiment_analysis))
+        score_jobs(cursor, jobs)
         conn.commit()
     except mysql.connector.Error as e:
-        print(f"Error: {e}")
+        logger.error("Error scoring jobs", extra=fields(job_ids=[job[0] for job in jobs], error=str(e)))
     finally:
         cursor.close()
         conn.close()
 
-# Load CSV data
+# Load CSV data (typed columns, warm starts read the parsed .npz cache)
+# Sentiment and summary are precomputed for every company at load time
 def load_data(filepath):
-    return pd.read_csv(filepath)
+    # pandas comes in with these, on the first company lookup
+    from reviews_loader import load_reviews
+    from sentiment_table import add_sentiment_columns
+    return add_sentiment_columns(load_reviews(filepath))
 
-data = load_data("REVIEWS.csv")
+# Indexed on the first lookup, rebuilt automatically when REVIEWS.csv changes
+def get_company_index():
+    return run_once("company_index", lambda: CompanyIndex("REVIEWS.csv", loader=load_data))
 
-# Get company data from CSV
-def get_company_data(company_name, data):
-    company_data = data[data['Company'].str.lower() == company_name.lower()]
-    return company_data
+# One ranker per process: its RANK_PARALLELISM shard slots are shared by every request ranking
+# at the same time, so concurrent rankings never put more shard calls in flight than that
+def get_ranker():
+    return run_once("map_reduce_ranker", lambda: MapReduceRanker(llm_gateway))
 
-# Generate response based on company data
+# Get company data from CSV: (rows, match) with match "exact", "fuzzy" (closest name) or None
+def get_company_data(company_name):
+    return get_company_index().find(company_name)
+
+# Industry / size analytics, precomputed from the same DataFrame as the company index
+def get_company_analytics():
+    return run_once("company_analytics", lambda: IndexedAnalytics(get_company_index())).current()
+
+# Generate response based on company data (precomputed by add_sentiment_columns)
 def generate_response(company_data):
     if company_data.empty:
         return "Company not found.", None
 
-    company_name = company_data['Company'].values[0]
-    rating = company_data['Rating'].values[0]
-    avg_salary = company_data['Salaries'].values[0]
-    total_employees = company_data['Company_Size'].values[0]
-
-    # Sentiment Analysis
-    if rating > 4:
-        sentiment = "Exceptional"
-    elif 3.5 < rating <= 4:
-        sentiment = "Positive"
-    elif 3 <= rating < 3.4:
-        sentiment = "Neutral"
-    else:
-        sentiment = "Negative"
-
-    response = (f"**{company_name}** has a rating of {rating}, indicating a {sentiment} sentiment. "
-                f"The average salary at {company_name} is ${avg_salary}, "
-                f"and the company employs around {total_employees} individuals.")
-
+    response = company_data['Summary'].values[0]
+    sentiment = company_data['Sentiment'].values[0]
     return response, sentiment
 
-# Fetch top candidates using RAG (LLM to analyze and rank candidates)
-def fetch_top_candidates_using_rag(job_description):
-    conn = get_resume_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        # Fetch all candidate data from the database
-        query = """
-        SELECT name, email, skills, experience_years, retention_rate
-        FROM candidates
-        """
-        cursor.execute(query)
-        candidates = cursor.fetchall()
-
-        # Format the candidate data into a readable form for the LLM
-        formatted_candidates = ""
-        for candidate in candidates:
-            formatted_candidates += f"Name: {candidate['name']}, Skills: {candidate['skills']}, Experience: {candidate['experience_years']} years, Retention Rate: {candidate['retention_rate']}\n"
+# Index any candidates inserted without going through insert_resume (e.g. by app.py)
+def sync_candidate_index(cursor, candidate_index):
+    run_once("candidate_sync", lambda: CandidateSync(candidate_index)).sync(cursor)
 
-        # Use LLM (Langchain with ChatGroq) to rank and summarize the top 5 candidates based on job description
-        input_prompt = """
-        You are a recruitment AI assistant and you have knowledge of all technical domains. Based on the following job description:
+# Use the LLM (Groq through the gateway) to rank and summarize the top 5 of a candidate shortlist
+def rank_candidates_with_llm(job_description, candidates):
+    # Format the candidate data into a readable form for the LLM
+    formatted_candidates = ""
+    for candidate in candidates:
+        formatted_candidates += f"Name: {candidate['name']}, Skills: {candidate['skills']}, Experience: {candidate['experience_years']} years, Retention Rate: {candidate['retention_rate']}\n"
 
-        {job_description}
+    input_prompt = """
+    You are a recruitment AI assistant and you have knowledge of all technical domains. Based on the following job description:
 
-        Here is the data of the candidates in the database:
+    {job_description}
 
-        {formatted_candidates}
+    Here is the data of the candidates in the database:
 
-        Please select the top 5 most relevant candidates based on the job description, considering their skills, experience, and retention rate. Return the top 5 candidates in a summarized form, including their names, skills, experience and retention rate.
-        If you dont have enough candidates for the relevent job please dont mention other candidates whose profile did not match the job description. 
-        Accuracy is key first analyze the candidated and then fetch them.
-        """
+    {formatted_candidates}
 
-        # Define the LLM chain with Langchain and Groq
-        prompt = PromptTemplate(template=input_prompt, input_variables=["job_description", "formatted_candidates"])
-        groq_chain = LLMChain(llm=chat_groq_model, prompt=prompt)
+    Please select the top 5 most relevant candidates based on the job description, considering their skills, experience, and retention rate. Return the top 5 candidates in a summarized form, including their names, skills, experience and retention rate.
+    If you dont have enough candidates for the relevent job please dont mention other candidates whose profile did not match the job description. 
+    Accuracy is key first analyze the candidated and then fetch them.
+    """
 
-        # Generate response using Groq
-        result = groq_chain.run({"job_description": job_description, "formatted_candidates": formatted_candidates})
-        return result
+    # Generate response using Groq
+    prompt = input_prompt.format(job_description=job_description, formatted_candidates=formatted_candidates)
+    return llm_gateway.generate(prompt, model=GROQ_MODEL)
 
+# Rows for `ids` in the same order, in chunks so no IN list grows with the pool
+def fetch_candidate_rows(cursor, ids, chunk_size=1000):
+    rows = {}
+    for offset in range(0, len(ids), chunk_size):
+        chunk = ids[offset:offset + chunk_size]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"""
+        SELECT id, name, email, skills, experience_years, retention_rate
+        FROM candidates
+        WHERE id IN ({placeholders})
+        """, chunk)
+        rows.update((row['id'], row) for row in cursor.fetchall())
+    return [rows[candidate_id] for candidate_id in ids if candidate_id in rows]
+
+# Fetch top candidates using RAG (LLM to analyze and rank candidates). mode="shortlist" sends the
+# RAG_TOP_K nearest candidates to one call; mode="map_reduce" screens up to RANK_MAX_CANDIDATES
+# of them in parallel token-budgeted shards first (see candidate_ranking.py).
+def fetch_top_candidates_using_rag(job_description, mode=RANK_MODE):
+    conn = get_resume_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # Retrieve only the nearest candidates instead of the whole table
+        candidate_index = get_candidate_index()
+        sync_candidate_index(cursor, candidate_index)
+        k = RANK_MAX_CANDIDATES if mode == "map_reduce" else RAG_TOP_K
+        ranked_ids = [candidate_id for candidate_id, _ in candidate_index.search(job_description, k=k)]
+        if not ranked_ids:
+            return "No candidates match this job description."
+        candidates = fetch_candidate_rows(cursor, ranked_ids)
     except mysql.connector.Error as e:
-        print(f"Error fetching candidates: {e}")
+        logger.error("Error fetching candidates", extra=fields(error=str(e)))
         return "An error occurred while fetching candidates."
     finally:
         cursor.close()
         conn.close()
 
+    if mode == "map_reduce":
+        candidates = get_ranker().reduce(job_description, candidates)
+    return rank_candidates_with_llm(job_description, candidates)
+
 # Main routes
-@app.route('/')
+@routes.route('/', cached=True)
 def home():
     return render_template('home.html')
 
-@app.route('/submit', methods=['POST'])
+@routes.route('/submit', methods=['POST'])
 def submit():
     company_name = request.form['company_name']
     job_title = request.form['job_title']
     job_description = request.form['job_description']
     
     if company_name and job_title and job_description:
-        company_data = get_company_data(company_name, data)
+        company_data, match = get_company_data(company_name)
+        # The job is stored under the typed name, so a near miss must not borrow another company's reviews
+        if match != EXACT:
+            suggestion = f" Did you mean {company_data['Company'].values[0]}?" if match == FUZZY else ""
+            return render_template('home.html', error=f"Company '{company_name}' not found.{suggestion}")
         response, sentiment = generate_response(company_data)
 
         if response:
@@ -176,24 +259,159 @@ def submit():
             Don't build up positive, negative, and neutral sentiments, just show what the data tells you! Your sentiment should be a one-paragraph response:
             {sentiment}
             """
-            response1 = genai.GenerativeModel('gemini-pro').generate_content(input_prompt).text
-            save_job_details(company_name, job_title, job_description, response1)
+            response1 = llm_gateway.generate(input_prompt)
+            # The result page does not need the new row, so the request does not wait for MySQL
+            save_job_details(company_name, job_title, job_description, response1, wait=False)
             return render_template('result.html', response1=response1)
     return render_template('index.html', error="Please fill in all fields.")
 
-@app.route('/top_candidates', methods=['GET', 'POST'])
+def get_recent_jobs(limit=200):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT id, company_name, job_title FROM job_details ORDER BY id DESC LIMIT %s", (limit,))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+def get_job(job_id):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT id, company_name, job_title, job_description FROM job_details WHERE id = %s", (job_id,))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+# Precomputed ranking for a stored job: an indexed ORDER BY score DESC LIMIT query
+def get_scored_candidates(job_id, limit=MATCH_PAGE_SIZE):
+    conn = get_resume_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return top_candidates_for_job(cursor, job_id, limit)
+    finally:
+        cursor.close()
+        conn.close()
+
+@routes.route('/top_candidates', cached=True, methods=['GET', 'POST'])
 def top_candidates():
-    return render_template('top_candidates.html')
+    return render_template('top_candidates.html', jobs=get_recent_jobs())
 
-@app.route('/fetch_candidates', methods=['POST'])
+@routes.route('/fetch_candidates', methods=['POST'])
 def fetch_candidates():
-    job_description = request.form['job_description']
-    
+    job_id = request.form.get('job_id', type=int)
+    job_description = request.form.get('job_description')
+
+    # A stored job is ranked from candidate_job_scores; the LLM only re-ranks the top few on request
+    if job_id:
+        job = get_job(job_id)
+        if job is None:
+            return render_template('top_candidates.html', jobs=get_recent_jobs(), error="Job not found.")
+        candidates = get_scored_candidates(job_id)
+        candidate_response = None
+        if candidates and request.form.get('rerank'):
+            candidate_response = rank_candidates_with_llm(job['job_description'], candidates[:MATCH_RERANK_TOP])
+        return render_template('candidates_result.html', job=job, candidates=candidates,
+                               candidate_response=candidate_response)
+
     if job_description:
-        top_candidates = fetch_top_candidates_using_rag(job_description)
+        mode = request.form.get('mode') or RANK_MODE
+        top_candidates = fetch_top_candidates_using_rag(job_description, mode=mode)
         return render_template('candidates_result.html', candidate_response=top_candidates)
         
-    return render_template('top_candidates.html', error="Please enter a job description.")
+    return render_template('top_candidates.html', jobs=get_recent_jobs(),
+                           error="Please select a job or enter a job description.")
+
+# Candidates having every listed skill and at least the given retention, e.g.
+# /candidates/search?skills=Python,SQL&min_retention=2
+@routes.route('/candidates/search')
+def search_candidates():
+    skills = [skill for skill in request.args.get('skills', '').split(',') if skill.strip()]
+    min_retention = request.args.get('min_retention', type=float)
+    limit = max(1, min(request.args.get('limit', CANDIDATE_PAGE_SIZE, type=int), 200))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    conn = get_resume_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        candidates = find_candidates(cursor, skills, min_retention, limit=limit, offset=offset)
+    finally:
+        cursor.close()
+        conn.close()
+    return jsonify({"candidates": candidates, "limit": limit, "offset": offset})
+
+def analytics_filters():
+    return {group: request.args[group] for group in GROUPS if request.args.get(group)}
+
+def analytics_page_size():
+    return max(1, min(request.args.get('limit', ANALYTICS_DEFAULT_LIMIT, type=int), ANALYTICS_MAX_LIMIT))
+
+# Best companies by rating / reviews / salaries / jobs, optionally within an industry or size, e.g.
+# /analytics/top?metric=rating&industry=Accounting%20%26%20Tax&limit=20 (order=asc for the lowest)
+@routes.route('/analytics/top')
+def analytics_top():
+    try:
+        companies = get_company_analytics().top(request.args.get('metric', 'rating'), analytics_page_size(),
+                                                analytics_filters(), ascending=request.args.get('order') == 'asc')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"companies": companies})
+
+# Companies whose metric lies in [min, max], lowest first, e.g. /analytics/range?metric=rating&min=4&max=4.5
+@routes.route('/analytics/range')
+def analytics_range():
+    limit = analytics_page_size()
+    offset = max(0, request.args.get('offset', 0, type=int))
+    try:
+        total, companies = get_company_analytics().between(
+            request.args.get('metric', 'rating'), request.args.get('min', type=float),
+            request.args.get('max', type=float), limit=limit, offset=offset, filters=analytics_filters()
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"total": total, "companies": companies, "limit": limit, "offset": offset})
+
+# count / mean / median / min / max of every metric per industry or size bucket, e.g.
+# /analytics/groups?by=size&metric=salaries&stat=median (ordered by that statistic)
+@routes.route('/analytics/groups')
+def analytics_groups():
+    try:
+        groups = get_company_analytics().group_by(request.args.get('by', 'industry'), request.args.get('metric'),
+                                                  request.args.get('stat', 'mean'),
+                                                  descending=request.args.get('order') != 'asc')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"groups": groups})
+
+@routes.route('/http_cache_stats')
+def http_cache_stats():
+    return jsonify(current_app.extensions["response_cache"].stats())
+
+@routes.route('/pool_stats')
+def pool_stats():
+    return jsonify(db_pool.pool_stats())
+
+@routes.route('/llm_cache_stats')
+def llm_cache_stats():
+    return jsonify(llm_gateway.cache.stats())
+
+@routes.route('/llm_stats')
+def llm_stats():
+    return jsonify(llm_gateway.stats())
+
+@routes.route('/write_stats')
+def write_stats():
+    return jsonify(get_job_writes().stats())
+
+# The write-behind buffer starts with the app, so rows a crashed process left in its spill file
+# are written again without waiting for the next posting. Importing this module starts nothing;
+# `flask --app test run` and WSGI servers call this factory, which touches neither MySQL nor the
+# LLM SDKs (replayed rows are written by the buffer's own thread).
+def create_app():
+    app = build_app(__name__, routes, ensure_schema)
+    get_job_writes()
+    return app
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -1,176 +1,286 @@
 
-from flask import Flask, render_template, request, redirect, url_for
-import PyPDF2
-import re
-import google.generativeai as genai
-import os
-import mysql.connector
+from flask import render_template, request, redirect, url_for, jsonify, Response, stream_with_context, current_app
+import logging
 from dotenv import load_dotenv
+import db_pool
+from candidate_index import get_candidate_index, candidate_text
+from resume_jobs import ResumeJobQueue
+from pdf_extract import extract_text
+from candidate_store import ensure_candidate_schema, link_skills
+from match_scores import ensure_match_score_schema
+from resume_dedup import (ensure_dedup_schema, file_hash, text_hash, find_candidate, attach_application,
+                          existing_hashes)
+from llm_gateway import get_llm_gateway
+from resume_ingest import INSERT_CANDIDATE, candidate_row, extract_resume_data, store_candidate_scores
+from job_search import search_jobs_page, clamp_page_size, JOB_SEARCH_PAGE_SIZE
+from startup import Routes, build_app, run_once
+from tracing import fields
+from write_behind import WriteBehind
 
-app = Flask(__name__)
+logger = logging.getLogger(__name__)
+
+# Bound to the app by create_app(). Read-only pages are cached (cached=True); test.py and
+# main.py invalidate them on job inserts.
+routes = Routes()
+
+# Rendered jobs flushed together in streamed /find_jobs responses
+STREAM_BUFFER = 5
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+llm_gateway = get_llm_gateway()
 
-# Database Connection
+# Database Connection (pooled, close() returns the connection to the pool)
 def get_db_connection():
-    conn = mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST"),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database="job_database"
-    )
-    return conn
-
-@app.route("/upload", methods=["GET", "POST"])
+    return db_pool.get_connection("job_database")
+
+def get_resume_db_connection():
+    return db_pool.get_connection("resume_db")
+
+@routes.route("/upload", methods=["GET", "POST"])
 def upload_resume():
     if request.method == "POST":
         uploaded_file = request.files.get("resume")
         if uploaded_file and uploaded_file.filename.endswith('.pdf'):
-            resume_text = extract_text_from_pdf(uploaded_file)
-            if resume_text:
-                resume_data, response = extract_resume_data(resume_text)
-                insert_resume(resume_data)
-                return render_template("resume_analysis.html", data=resume_data, response=response)
-            else:
-                return "Failed to extract text from the resume.", 400
+            pdf_bytes = uploaded_file.read()
+            # The same file uploaded before: return the stored record without queueing anything
+            existing = lookup_candidate(file_hash=file_hash(pdf_bytes))
+            if existing is not None:
+                return jsonify({"candidate_id": existing["id"], "duplicate": True, "data": existing})
+            # Extraction, the Gemini call and the insert run on the resume queue workers
+            resume_job_id = get_resume_queue().enqueue(pdf_bytes, uploaded_file.filename, kind="upload")
+            return jsonify({
+                "job_id": resume_job_id,
+                "status_url": url_for('resume_job_status', resume_job_id=resume_job_id)
+            }), 202
         else:
             return "Invalid file format or no file uploaded.", 400
     return render_template("upload.html")
 
-# Extract text from PDF
+@routes.route("/resume_jobs/<resume_job_id>")
+def resume_job_status(resume_job_id):
+    status = get_resume_queue().status(resume_job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(status)
+
+# Extract text from PDF (accepts an uploaded FileStorage or any binary file object)
+# Size, page and time budgets come from pdf_extract (PDF_MAX_BYTES, PDF_MAX_PAGES, PDF_TIME_BUDGET)
 def extract_text_from_pdf(uploaded_file):
     try:
-        pdf_reader = PyPDF2.PdfReader(uploaded_file.stream)
-        text = "".join(page.extract_text() or "" for page in pdf_reader.pages)
+        text = extract_text(uploaded_file)
         if not text:
-            print("No text extracted from PDF.")
+            logger.warning("No text extracted from PDF")
         return text
     except Exception as e:
-        print(f"Error extracting text: {e}")
+        logger.error("Error extracting text", extra=fields(error=str(e)))
         return None
 
 
-def get_gemini_response(input_prompt):
-    model = genai.GenerativeModel('gemini-pro')
-    response = model.generate_content(input_prompt)
-    return response.text
-
-def extract_resume_data(resume_text):
-    input_prompt = f"""
-    Given the resume text below, please extract and format the key information as follows, ensuring high accuracy and adherence to the specified formats:
-
-    - Name: [Full Name in Title Case]
-    - Email: [Valid Email Address]
-    - Skills: Please list each skill separated by commas, with each skill starting with a capital letter and no trailing comma at the end.
-        Example Format: "Skill One, Skill Two, Skill Three"
-    - Work Experience: Provide a list of recent positions held, starting each position with a dash and including the position title, company name, and the inclusive years worked.
-        Example Format: 
-        - Position One Title, Company Name (Year Started - Year Ended)
-        - Position Two Title, Company Name (Year Started - Year Ended)
-    - Retention Rate: Calculate the retention rate as the average number of years on job (devide total years of experience by no of jobs), presented as a single decimal number followed by 'years'. Assume the current year is 2024 for ongoing positions.
-        Example Format: "X.Y years"
-
-
-    Please use the following resume content to extract the information:
-    {resume_text}
-
-    Note: Ensure all outputs strictly follow the provided formats for uniformity and ease of data processing.
-    """
-    response = get_gemini_response(input_prompt)
-    print(response)
-
-    # Extract data using regex
-    name_match = re.search(r"Name: (.+)", response)
-    email_match = re.search(r"Email: (.+)", response)
-    skills_match = re.search(r"Skills:(.*?)(?=- [A-Z]|\Z)", response, re.DOTALL)
-    work_experience_match = re.search(r"- Work Experience:\s*(.+?)(?=\n- [A-Z]|$)", response, re.DOTALL)
-    retention_rate_match = re.search(r"- Retention Rate: (\d+\.\d+) years", response)
-
-    data = {
-        "name": name_match.group(1).strip() if name_match else "Not found",
-        "email": email_match.group(1).strip() if email_match else "Not found",
-        "skills": [skill.strip() for skill in skills_match.group(1).strip().split(",")] if skills_match else [],
-        "work_experience": [work_exp.strip() for work_exp in work_experience_match.group(1).strip().split(",")] if work_experience_match else [],
-        "retention_rate": retention_rate_match.group(1) if retention_rate_match else 0.0
-    }
-
-    return data, response
-
-# Get unique job details
-def get_unique_job_details(job_role):
-    conn = get_db_connection()
-    jobs = []
+# Get unique job details (FULLTEXT-ranked, keyset-paginated, snippet-length descriptions).
+# `after` is the next_cursor of the previous page; returns (jobs, next_cursor).
+# Errors are logged and raised: an empty page built from a failed query must not be cached.
+def get_unique_job_details(job_role, limit=JOB_SEARCH_PAGE_SIZE, after=None):
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                page = search_jobs_page(cursor, job_role, limit=limit, after=after)
+                jobs, next_cursor = page.rows(), page.next_cursor
+            finally:
+                cursor.close()
+        logger.debug("Job search", extra=fields(job_role=job_role, jobs=len(jobs)))
+    except Exception as e:
+        logger.error("Job search failed", extra=fields(job_role=job_role, error=str(e)))
+        raise
+    return jobs, next_cursor
+
+# Streaming variant: yields (job, page) per row as it is read from MySQL; page.next_cursor is
+# set once the last row has been yielded. The connection stays checked out until then.
+def iter_job_details(job_role, limit=JOB_SEARCH_PAGE_SIZE, after=None):
     try:
-        cursor = conn.cursor(dictionary=True)
-        query = """
-        SELECT DISTINCT id, company_name, job_title, job_description, sentiment_analysis
-        FROM job_details
-        WHERE job_title LIKE %s;
-        """
-        print("Searching for job role:", job_role)
-        cursor.execute(query, (f"%{job_role}%",))
-        jobs = cursor.fetchall()
-        print("Jobs found:", len(jobs))
+        with get_db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                page = search_jobs_page(cursor, job_role, limit=limit, after=after)
+                for job in page:
+                    yield job, page
+            finally:
+                cursor.close()
     except Exception as e:
-        print("SQL Error:", e)
+        logger.error("Job search failed", extra=fields(job_role=job_role, error=str(e)))
+
+
+# Candidates are written to resume_db (see get_resume_db_connection), so the table lives there
+def initialize_database():
+    with get_resume_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # Typed table plus skills / candidate_skills (run candidate_store.py once to migrate old rows)
+            ensure_candidate_schema(cursor)
+            ensure_dedup_schema(cursor)
+            ensure_match_score_schema(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+
+# Stored candidate with the same file or text hash, or None
+def lookup_candidate(file_hash=None, text_hash=None):
+    conn = get_resume_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return find_candidate(cursor, file_hash=file_hash, text_hash=text_hash)
     finally:
         cursor.close()
         conn.close()
-    return jobs
 
-
-def initialize_database():
-    conn = get_db_connection()
+def save_application(job_id, candidate_id):
+    conn = get_resume_db_connection()
     cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS candidates (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    name VARCHAR(255),
-    email VARCHAR(255),
-    skills TEXT,
-    experience_years TEXT,
-    retention_rate TEXT
-    )
-    ''')
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-# Insert resume data into the database
-def insert_resume(data):
-    conn = mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST"),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database="resume_db"
-    )
+    try:
+        attach_application(cursor, job_id, candidate_id)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+# A batch of buffered resumes in one transaction, one (candidate id, created) per row. A resume
+# whose hashes are already stored (an earlier upload, the same file twice in the batch or a
+# replayed write) gets the existing id instead of a new row.
+def flush_candidates(batch):
+    # Replayed rows can be flushed before the first request has run ensure_schema
+    run_once("employee_schema", initialize_database)
+    conn = get_resume_db_connection()
     cursor = conn.cursor()
-    cursor.execute('''
-    INSERT INTO candidates (name, email, skills, experience_years, retention_rate)
-    VALUES (%s, %s, %s, %s, %s)
-    ''', (
-        data["name"],
-        data["email"],
-        ', '.join(data["skills"]),
-        ', '.join(data["work_experience"]),
-        data.get("retention_rate")
+    try:
+        results, links, duplicates = [], [], []
+        for data in batch:
+            cursor.execute(INSERT_CANDIDATE.replace("INSERT", "INSERT IGNORE", 1), candidate_row(data))
+            if cursor.rowcount:
+                results.append((cursor.lastrowid, True))
+                links.append((cursor.lastrowid, data["skills"]))
+            else:
+                results.append((None, False))
+                duplicates.extend([data.get("file_hash"), data.get("text_hash")])
+        link_skills(cursor, links)
+        if duplicates:
+            stored = existing_hashes(cursor, duplicates)
+            results = [
+                result if result[1] else (stored.get(data.get("file_hash")) or stored.get(data.get("text_hash")), False)
+                for data, result in zip(batch, results)
+            ]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return results
+
+# Vectorize and score the new rows now so ranking only has to search the index
+def candidates_flushed(batch, results):
+    rows = [(candidate_id, *candidate_row(data)[2:4])
+            for data, (candidate_id, created) in zip(batch, results) if created]
+    get_candidate_index().add_many((candidate_id, candidate_text(skills, experience))
+                                   for candidate_id, skills, experience in rows)
+    store_candidate_scores(rows)
+
+# Resume inserts are grouped by the write-behind buffer (see write_behind.py)
+def get_candidate_writes():
+    return run_once("candidate_writes", lambda: WriteBehind(
+        "candidates", flush_candidates, on_flushed=candidates_flushed, retryable=db_pool.RETRYABLE_ERRORS
     ))
-    conn.commit()
-    cursor.close()
-    conn.close()
 
-@app.route("/")
+# Insert resume data into the database; returns the id of the stored row once it is committed
+# (the existing one when a resume with the same hashes was stored first)
+def insert_resume(data):
+    candidate_id, created = get_candidate_writes().submit(data).result()
+    return candidate_id
+
+# Runs on a resume queue worker for every /upload and /apply submission.
+# A stored resume with the same bytes or the same extracted text skips the LLM (and, for
+# identical bytes, the PDF parsing too).
+def process_resume_job(job, progress):
+    progress("checking_duplicates")
+    with open(job["pdf_path"], "rb") as pdf_file:
+        pdf_bytes = pdf_file.read()
+    hashes = {"file_hash": file_hash(pdf_bytes)}
+    existing = lookup_candidate(file_hash=hashes["file_hash"])
+    if existing is None:
+        progress("extracting_text")
+        resume_text = extract_text_from_pdf(pdf_bytes)
+        if not resume_text:
+            raise ValueError("Failed to extract text from the resume.")
+        hashes["text_hash"] = text_hash(resume_text)
+        existing = lookup_candidate(text_hash=hashes["text_hash"])
+
+    if existing is not None:
+        candidate_id, data, duplicate = existing["id"], existing, True
+    else:
+        progress("analyzing")
+        data, response = extract_resume_data(resume_text)
+        data.update(hashes)
+        progress("saving")
+        candidate_id = insert_resume(data)
+        duplicate = False
+    if job["kind"] == "apply":
+        save_application(job["job_id"], candidate_id)
+    return {"candidate_id": candidate_id, "job_id": job["job_id"], "data": data, "duplicate": duplicate}
+
+# Built by create_app() (or the first enqueue), not at import: it opens the queue database
+def get_resume_queue():
+    return run_once("resume_queue", lambda: ResumeJobQueue(process_resume_job))
+
+@routes.route("/", cached=True)
 def home():
     return render_template('index.html')
 
-@app.route("/find_jobs", methods=["POST"])
+def job_search_args():
+    job_title = request.values.get('job_title', '')
+    limit = clamp_page_size(request.values.get('limit', JOB_SEARCH_PAGE_SIZE))
+    return job_title, limit, request.values.get('cursor')
+
+# ?stream=1 sends the page with stream_with_context so the first jobs reach the browser
+# before the rest are read
+@routes.route("/find_jobs", cached=True, methods=["GET", "POST"])
 def find_jobs():
-    job_title = request.form.get('job_title')
-    jobs = get_unique_job_details(job_title)
-    return render_template('jobs.html', jobs=jobs)
+    job_title, limit, after = job_search_args()
+
+    def next_page_url(next_cursor):
+        if not next_cursor:
+            return None
+        return url_for('find_jobs', job_title=job_title, limit=limit, cursor=next_cursor,
+                       stream=request.values.get('stream'))
+
+    if request.values.get('stream'):
+        state = {}
+
+        def jobs():
+            for job, page in iter_job_details(job_title, limit, after):
+                state['page'] = page
+                yield job
+
+        template = current_app.jinja_env.get_template('jobs.html')
+        context = {"jobs": jobs(), "job_title": job_title,
+                   "next_page_url": lambda: next_page_url(state['page'].next_cursor if state else None)}
+        current_app.update_template_context(context)
+        stream = template.stream(context)
+        stream.enable_buffering(STREAM_BUFFER)
+        return Response(stream_with_context(stream), mimetype='text/html')
 
-@app.route("/job/<int:job_id>")
+    jobs, next_cursor = get_unique_job_details(job_title, limit=limit, after=after)
+    return render_template('jobs.html', jobs=jobs, job_title=job_title,
+                           next_page_url=lambda: next_page_url(next_cursor))
+
+# JSON variant of /find_jobs: {"jobs": [...], "next_cursor": ..., "next_url": ...}
+@routes.route("/api/find_jobs", cached=True)
+def find_jobs_api():
+    job_title, limit, after = job_search_args()
+    jobs, next_cursor = get_unique_job_details(job_title, limit=limit, after=after)
+    next_url = url_for('find_jobs_api', job_title=job_title, limit=limit, cursor=next_cursor) if next_cursor else None
+    return jsonify({"jobs": jobs, "next_cursor": next_cursor, "next_url": next_url})
+
+@routes.route("/job/<int:job_id>", cached=True)
 def job_details(job_id):
     job = get_job_by_id(job_id)
     if job:
@@ -178,31 +288,68 @@ def job_details(job_id):
     else:
         return "Job not found", 404
 
-@app.route('/apply/<int:job_id>', methods=['POST'])
+@routes.route('/apply/<int:job_id>', methods=['POST'])
 def apply(job_id):
     uploaded_file = request.files['resume']
     if uploaded_file and uploaded_file.filename.endswith('.pdf'):
-        resume_text = extract_text_from_pdf(uploaded_file)
-        data, response = extract_resume_data(resume_text)
-        insert_resume(data)
-        return "Resume submitted successfully! Thank you for applying."
+        pdf_bytes = uploaded_file.read()
+        existing = lookup_candidate(file_hash=file_hash(pdf_bytes))
+        if existing is not None:
+            save_application(job_id, existing["id"])
+            return "Resume submitted successfully! Thank you for applying."
+        resume_job_id = get_resume_queue().enqueue(pdf_bytes, uploaded_file.filename, kind="apply", job_id=job_id)
+        status_url = url_for('resume_job_status', resume_job_id=resume_job_id)
+        return f"Resume submitted successfully! Thank you for applying. Track processing at {status_url}"
     return redirect(url_for('job_details', job_id=job_id))
 
+# Raises on errors like get_unique_job_details, so an outage is not answered with "Job not found"
 def get_job_by_id(job_id):
-    conn = get_db_connection()
-    job = None
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM job_details WHERE id = %s", (job_id,))
-        job = cursor.fetchone()
+        with get_db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute("SELECT * FROM job_details WHERE id = %s", (job_id,))
+                job = cursor.fetchone()
+            finally:
+                cursor.close()
     except Exception as e:
-        print(f"Error retrieving job by ID: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+        logger.error("Error retrieving job", extra=fields(job_id=job_id, error=str(e)))
+        raise
     return job
 
+@routes.route("/pool_stats")
+def pool_stats():
+    return jsonify(db_pool.pool_stats())
+
+@routes.route("/resume_queue_stats")
+def resume_queue_stats():
+    return jsonify(get_resume_queue().stats())
+
+@routes.route("/http_cache_stats")
+def http_cache_stats():
+    return jsonify(current_app.extensions["response_cache"].stats())
+
+@routes.route("/write_stats")
+def write_stats():
+    return jsonify(get_candidate_writes().stats())
+
+@routes.route("/llm_stats")
+def llm_stats():
+    return jsonify(llm_gateway.stats())
+
+# Once per process, before the first request rather than at import
+def ensure_schema():
+    run_once("employee_schema", initialize_database)
+
+# The resume workers and the write-behind buffer start with the app, so jobs queued or retrying
+# and rows a crashed process left in its spill file are picked up without waiting for the next upload.
+# Importing this module starts nothing; `flask --app test1 run` and WSGI servers call this factory.
+def create_app():
+    app = build_app(__name__, routes, ensure_schema)
+    get_resume_queue().start()
+    get_candidate_writes()
+    return app
+
 if __name__ == "__main__":
-    initialize_database()  # Initialize the database when the app starts
-    app.run(debug=True)
+    create_app().run(debug=True)
 
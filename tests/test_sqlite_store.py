@@ -0,0 +1,120 @@
+# MySQL -> SQLite statement and DDL rewriting (sqlite_store.translate / translate_ddl)
+import threading
+import pytest
+
+mysql_connector = pytest.importorskip("mysql.connector")
+from sqlite_store import SQLiteDatabases, translate, translate_ddl
+
+
+def test_on_duplicate_key_update_becomes_on_conflict():
+    sql = translate("INSERT INTO scores (job_id, score) VALUES (%s, %s) ON DUPLICATE KEY UPDATE score = VALUES(score)")
+    assert sql == "INSERT INTO scores (job_id, score) VALUES (?, ?) ON CONFLICT DO UPDATE SET score = excluded.score"
+
+
+def test_insert_ignore_becomes_insert_or_ignore():
+    assert translate("INSERT IGNORE INTO skills (name) VALUES (%s)") == "INSERT OR IGNORE INTO skills (name) VALUES (?)"
+
+
+def test_left_becomes_substr():
+    assert translate("SELECT LEFT(job_description, 200) FROM job_details") == \
+        "SELECT substr(job_description, 1, 200) FROM job_details"
+
+
+def test_like_gets_mysql_backslash_escape():
+    assert translate("SELECT id FROM job_details WHERE job_title LIKE %s") == \
+        "SELECT id FROM job_details WHERE job_title LIKE ? ESCAPE '\\'"
+
+
+def test_inline_keys_become_indexes_and_fulltext_becomes_fts5():
+    actions = translate_ddl("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(255),
+            body TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            KEY idx_title (title),
+            UNIQUE KEY uq_title_body (title, body),
+            FULLTEXT INDEX ft_jobs (title, body)
+        ) ENGINE=InnoDB
+    """)
+    assert actions[0] == ("table", "jobs")
+    assert actions[1][0] == "sql"
+    assert "id INTEGER PRIMARY KEY AUTOINCREMENT" in actions[1][1]
+    assert "ON UPDATE" not in actions[1][1] and "KEY idx_title" not in actions[1][1]
+    assert actions[2:] == (
+        ("sql", "CREATE INDEX IF NOT EXISTS idx_title ON jobs (title)"),
+        ("sql", "CREATE UNIQUE INDEX IF NOT EXISTS uq_title_body ON jobs (title, body)"),
+        ("fulltext", "jobs", ["title", "body"]),
+    )
+
+
+def test_alter_table_skips_modify():
+    actions = translate_ddl("ALTER TABLE jobs MODIFY retention_rate DECIMAL(4, 1), ADD COLUMN score INT, "
+                            "ADD INDEX idx_score (score)")
+    assert actions == (
+        ("sql", "ALTER TABLE jobs ADD COLUMN score INT"),
+        ("sql", "CREATE INDEX IF NOT EXISTS idx_score ON jobs (score)"),
+    )
+
+
+def test_change_column_becomes_a_rename():
+    assert translate_ddl("ALTER TABLE candidates CHANGE COLUMN retention_rate_num retention_rate FLOAT NULL") == (
+        ("sql", "ALTER TABLE candidates RENAME COLUMN retention_rate_num TO retention_rate"),
+    )
+
+
+def test_unknown_ddl_is_not_supported():
+    with pytest.raises(mysql_connector.NotSupportedError):
+        translate_ddl("ALTER TABLE jobs ADD SPATIAL INDEX idx_location (location)")
+
+
+def test_translated_statements_run(tmp_path):
+    conn = SQLiteDatabases(str(tmp_path)).connect("job_database")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(255),
+            score INT,
+            UNIQUE KEY uq_title (title),
+            FULLTEXT INDEX ft_jobs (title)
+        )
+    """)
+    upsert = "INSERT INTO jobs (title, score) VALUES (%s, %s) ON DUPLICATE KEY UPDATE score = VALUES(score)"
+    cursor.execute(upsert, ("Data Engineer", 1))
+    cursor.execute(upsert, ("Data Engineer", 2))
+    cursor.execute("SELECT id, score FROM jobs WHERE title LIKE %s", ("Data%",))
+    assert cursor.fetchall() == [{"id": 1, "score": 2}]
+    cursor.execute("SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH %s", ("engineer",))
+    assert cursor.fetchall() == [{"rowid": 1}]
+    cursor.close()
+    conn.close()
+
+
+# Writers racing on one table: each batch's lastrowid is the id of its own first row
+def test_executemany_lastrowid_with_concurrent_writers(tmp_path):
+    databases = SQLiteDatabases(str(tmp_path))
+    setup = databases.connect("resume_db")
+    setup.cursor().execute("CREATE TABLE IF NOT EXISTS items (id INT AUTO_INCREMENT PRIMARY KEY, label VARCHAR(32))")
+    setup.close()
+    mismatches = []
+
+    def writer(number):
+        conn = databases.connect("resume_db")
+        cursor = conn.cursor()
+        for batch in range(30):
+            labels = [f"{number}-{batch}-{row}" for row in range(5)]
+            cursor.executemany("INSERT INTO items (label) VALUES (%s)", [(label,) for label in labels])
+            first_id = cursor.lastrowid
+            conn.commit()
+            cursor.execute("SELECT id FROM items WHERE label = %s", (labels[0],))
+            if cursor.fetchone()[0] != first_id:
+                mismatches.append(labels[0])
+        conn.close()
+
+    threads = [threading.Thread(target=writer, args=(number,)) for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert mismatches == []
@@ -0,0 +1,225 @@
+# Behaviour every DB_BACKEND must share, run through the apps' own SQL (db_pool, job_search,
+# candidate_store, resume_dedup) after the apps' schema setup. SQLite runs in a temporary
+# directory; MySQL runs against the server in .env (MYSQL_HOST) and is skipped without one.
+# Rows written to MySQL are deleted afterwards. Timings: benchmarks/bench_storage.py.
+import os
+import uuid
+import pytest
+
+db_pool = pytest.importorskip("db_pool")
+
+INSERT_JOB = """
+    INSERT INTO job_details (company_name, job_title, job_description, sentiment_analysis)
+    VALUES (%s, %s, %s, %s)
+"""
+INSERT_CANDIDATE = """
+    INSERT IGNORE INTO candidates (name, email, skills, experience_years, retention_rate, file_hash, text_hash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+class Store:
+    def __init__(self, tag):
+        self.tag = tag
+        self.job_ids = []
+        self.candidate_ids = []
+
+    # One pooled connection per operation, as the request handlers do
+    def run(self, database, fn, dictionary=True):
+        with db_pool.get_connection(database) as conn:
+            cursor = conn.cursor(dictionary=dictionary)
+            try:
+                return fn(conn, cursor)
+            finally:
+                cursor.close()
+
+    # The schema setup initialize_database runs in test.py and test1.py
+    def prepare(self):
+        from job_search import ensure_job_details_schema
+        from candidate_store import ensure_candidate_schema
+        from resume_dedup import ensure_dedup_schema
+        from match_scores import ensure_match_score_schema
+
+        def setup(*steps):
+            def run(conn, cursor):
+                for step in steps:
+                    step(cursor)
+                conn.commit()
+            return run
+        self.run("job_database", setup(ensure_job_details_schema), dictionary=False)
+        self.run("resume_db", setup(ensure_candidate_schema, ensure_dedup_schema, ensure_match_score_schema),
+                 dictionary=False)
+
+    def insert_job(self, title, description):
+        def insert(conn, cursor):
+            cursor.execute(INSERT_JOB, (f"{self.tag} Company", title, description, "test"))
+            conn.commit()
+            return cursor.lastrowid
+        job_id = self.run("job_database", insert, dictionary=False)
+        self.job_ids.append(job_id)
+        return job_id
+
+    def insert_candidate(self, skills, file_hash):
+        from candidate_store import link_skills
+
+        def insert(conn, cursor):
+            cursor.execute(INSERT_CANDIDATE, (f"{self.tag} candidate", "test@example.com", ", ".join(skills),
+                                              "Software Engineer, Test (2019 - 2024)", 2.5, file_hash, None))
+            candidate_id = cursor.lastrowid if cursor.rowcount else None
+            if candidate_id:
+                link_skills(cursor, [(candidate_id, skills)])
+            conn.commit()
+            return candidate_id
+        candidate_id = self.run("resume_db", insert, dictionary=False)
+        if candidate_id:
+            self.candidate_ids.append(candidate_id)
+        return candidate_id
+
+    def get_job(self, job_id):
+        def select(conn, cursor):
+            cursor.execute("SELECT * FROM job_details WHERE id = %s", (job_id,))
+            return cursor.fetchone()
+        return self.run("job_database", select)
+
+    def search(self, query, limit=20, after=None):
+        from job_search import search_jobs_page
+
+        def select(conn, cursor):
+            page = search_jobs_page(cursor, query, limit=limit, after=after)
+            return page.rows(), page.next_cursor
+        return self.run("job_database", select)
+
+    def lookup(self, file_hash):
+        from resume_dedup import find_candidate
+        return self.run("resume_db", lambda conn, cursor: find_candidate(cursor, file_hash=file_hash))
+
+    def find(self, skills):
+        from candidate_store import find_candidates
+        return self.run("resume_db", lambda conn, cursor: find_candidates(cursor, skills, limit=50))
+
+    def cleanup(self):
+        def delete(ids, table):
+            def run(conn, cursor):
+                for offset in range(0, len(ids), 500):
+                    chunk = ids[offset:offset + 500]
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    if table == "candidates":
+                        cursor.execute(f"DELETE FROM candidate_skills WHERE candidate_id IN ({placeholders})", chunk)
+                    cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", chunk)
+                conn.commit()
+            return run
+        self.run("job_database", delete(self.job_ids, "job_details"), dictionary=False)
+        self.run("resume_db", delete(self.candidate_ids, "candidates"), dictionary=False)
+
+
+@pytest.fixture(scope="module", params=["sqlite", "mysql"])
+def store(request, tmp_path_factory):
+    if request.param == "mysql":
+        if not os.getenv("MYSQL_HOST"):
+            pytest.skip("MySQL is not configured (MYSQL_HOST)")
+        db_pool.set_connector(db_pool.connect_mysql)
+    else:
+        from sqlite_store import SQLiteDatabases
+        db_pool.set_connector(SQLiteDatabases(str(tmp_path_factory.mktemp("sqlite"))).connect)
+    store = Store(tag=f"test{uuid.uuid4().hex[:6]}")
+    try:
+        store.prepare()
+        # Enough rows for two full pages of the tag's search
+        for number in range(12):
+            store.insert_job(f"Software Engineer {number}", f"{store.tag} role building services.")
+        yield store
+    finally:
+        if request.param == "mysql":
+            store.cleanup()
+        db_pool.close_pools()
+        db_pool.set_connector(None)
+
+
+@pytest.fixture
+def marker():
+    return f"zq{uuid.uuid4().hex[:10]}"
+
+
+def test_insert_returns_the_new_id(store, marker):
+    job_id = store.insert_job(f"Principal {marker} Engineer", "Owns the test platform.")
+    assert store.get_job(job_id)["job_title"] == f"Principal {marker} Engineer"
+
+
+def test_missing_id_gives_none(store):
+    assert store.get_job(-1) is None
+
+
+def test_ranked_search_finds_a_unique_title_word(store, marker):
+    job_id = store.insert_job(f"Principal {marker} Engineer", "Owns the test platform.")
+    rows, _ = store.search(marker)
+    assert [row["id"] for row in rows] == [job_id]
+    assert rows[0]["job_snippet"] == "Owns the test platform."
+
+
+def test_word_inside_a_title_word_falls_back_to_a_substring_match(store, marker):
+    job_id = store.insert_job(f"Principal {marker} Engineer", "Substring.")
+    rows, _ = store.search(marker[1:])
+    assert [row["id"] for row in rows] == [job_id]
+
+
+def test_query_words_match_as_prefixes(store, marker):
+    job_id = store.insert_job(f"Principal {marker} Engineer", "Exact word.")
+    longer_id = store.insert_job(f"{marker}ing Lead", "Longer word.")
+    rows, _ = store.search(marker)
+    assert {row["id"] for row in rows} == {job_id, longer_id}
+
+
+def test_keyset_pages_are_full_and_disjoint(store):
+    first, after = store.search(f"{store.tag} engineer", limit=5)
+    second, _ = store.search(f"{store.tag} engineer", limit=5, after=after)
+    assert len(first) == 5 and after
+    assert second and not {row["id"] for row in first} & {row["id"] for row in second}
+
+
+def test_short_words_match_title_prefixes(store, marker):
+    job_id = store.insert_job(f"AI {marker}", "Short-word title.")
+    rows, _ = store.search("AI", limit=100)
+    assert rows and all(row["job_title"].startswith("AI") for row in rows)
+    assert job_id in {row["id"] for row in rows}
+
+
+def test_duplicate_hash_is_ignored_and_found(store):
+    file_hash = uuid.uuid4().hex
+    candidate_id = store.insert_candidate(["Python", "SQL"], file_hash)
+    assert candidate_id
+    assert store.insert_candidate(["Python"], file_hash) is None
+    assert (store.lookup(file_hash) or {}).get("id") == candidate_id
+
+
+def test_skill_filter_requires_every_skill(store):
+    store.insert_candidate(["Python", "SQL"], uuid.uuid4().hex)
+    store.insert_candidate(["Python"], uuid.uuid4().hex)
+    found = store.find(["python", "sql"])
+    assert found
+    assert all({"python", "sql"} <= {skill.strip().lower() for skill in row["skills"].split(",")} for row in found)
+
+
+def test_executemany_lastrowid_is_the_first_new_id(store):
+    hashes = [uuid.uuid4().hex for _ in range(3)]
+
+    def batch(conn, cursor):
+        cursor.executemany(INSERT_CANDIDATE, [(f"{store.tag} batch", "b@example.com", "Go", "", 1.0, value, None)
+                                              for value in hashes])
+        first_id = cursor.lastrowid
+        conn.commit()
+        cursor.execute("SELECT id FROM candidates WHERE file_hash = %s", (hashes[0],))
+        return first_id, cursor.fetchone()[0]
+    first_id, stored_id = store.run("resume_db", batch, dictionary=False)
+    store.candidate_ids.extend(range(first_id, first_id + 3))
+    assert first_id == stored_id
+
+
+def test_executemany_lastrowid_is_zero_when_every_row_is_skipped(store):
+    file_hash = uuid.uuid4().hex
+    store.insert_candidate(["Go"], file_hash)
+
+    def batch(conn, cursor):
+        cursor.executemany(INSERT_CANDIDATE, [(f"{store.tag} batch", "b@example.com", "Go", "", 1.0, file_hash, None)])
+        conn.commit()
+        return cursor.lastrowid
+    assert not store.run("resume_db", batch, dictionary=False)
@@ -0,0 +1,314 @@
+# Request tracing, latency histograms and structured logging for the apps and the modules they
+# call (db_pool, llm_gateway, pdf_extract, resume_jobs). Every span feeds a histogram; the spans
+# of one request (or resume job) are logged together as a single JSON line when it finishes.
+# The Flask apps expose the histograms on /metrics in the Prometheus text format.
+#
+# TRACING=0 turns spans off: span() returns a shared no-op object and db_pool hands out plain
+# cursors, so an instrumented call costs one global lookup.
+import bisect
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+TRACING = os.getenv("TRACING", "1") != "0"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Traces slower than this (seconds) are logged at INFO with their spans, the others at DEBUG
+TRACE_SLOW_SECONDS = float(os.getenv("TRACE_SLOW_SECONDS", "1.0"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    "app_request_duration_seconds": ("histogram", "Flask request latency by route, method and status."),
+    "app_span_duration_seconds": ("histogram", "Latency of instrumented operations (db, llm, pdf, template)."),
+    "app_span_errors_total": ("counter", "Instrumented operations that raised."),
+    "app_llm_tokens_total": ("counter", "LLM tokens by model and kind (prompt / completion)."),
+}
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+# Process-wide histograms and counters, keyed by (metric name, sorted labels)
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    # Prometheus text exposition format (version 0.0.4)
+    def render(self):
+        with self._lock:
+            histograms = {key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described:
+                described.add(name)
+                kind, text = METRIC_HELP.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            describe(name)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels, [('le', repr(float(bound)))])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters.items()):
+            describe(name)
+            lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Registry()
+
+# The trace (request / resume job) and the innermost span of the running code
+_trace = contextvars.ContextVar("trace", default=None)
+_span = contextvars.ContextVar("span", default=None)
+
+
+class Trace:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.spans = []
+        self.token = None
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "token")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, name, amount):
+        self.attrs[name] = self.attrs.get(name, 0) + amount
+
+    def __enter__(self):
+        self.token = _span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _span.reset(self.token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+            metrics.inc("app_span_errors_total", span=self.name)
+        record(self.name, duration, **self.attrs)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, name, amount):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+# with span("db.query", op="SELECT") as s: ...; s.set(rows=n)
+def span(name, **attrs):
+    if not TRACING:
+        return _NOOP_SPAN
+    return Span(name, attrs)
+
+
+# A finished operation timed by the caller (e.g. template rendering through Flask signals)
+def record(name, duration, **attrs):
+    metrics.observe("app_span_duration_seconds", duration, span=name)
+    trace = _trace.get()
+    if trace is not None:
+        trace.spans.append({"span": name, "ms": round(duration * 1000, 2), **attrs})
+
+
+# Counted on the innermost span too, so a request's log line shows the tokens of each call
+def add_tokens(model, prompt_tokens, completion_tokens):
+    if not TRACING:
+        return
+    metrics.inc("app_llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+    metrics.inc("app_llm_tokens_total", completion_tokens, model=model, kind="completion")
+    current = _span.get()
+    if current is not None:
+        current.add("prompt_tokens", prompt_tokens)
+        current.add("completion_tokens", completion_tokens)
+
+
+def begin_trace(name, **attrs):
+    if not TRACING:
+        return None
+    trace = Trace(name, attrs)
+    trace.token = _trace.set(trace)
+    return trace
+
+
+# Logs the trace (at INFO when slower than TRACE_SLOW_SECONDS) and returns its duration
+def end_trace(trace, **attrs):
+    if trace is None:
+        return None
+    duration = time.perf_counter() - trace.start
+    try:
+        _trace.reset(trace.token)
+    except ValueError:
+        # Finished from another context (e.g. the end of a streamed response)
+        _trace.set(None)
+    trace.attrs.update(attrs)
+    level = logging.INFO if duration >= TRACE_SLOW_SECONDS else logging.DEBUG
+    if logger.isEnabledFor(level):
+        logger.log(level, trace.name, extra=fields(ms=round(duration * 1000, 2), spans=trace.spans, **trace.attrs))
+    return duration
+
+
+# logger.info("...", extra=fields(job_id=3, rows=10)) -> keys of the JSON log line
+def fields(**values):
+    return {"fields": values}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_logging_configured = False
+_logging_lock = threading.Lock()
+
+
+# Idempotent; called by the entry points. LOG_FORMAT=text gives plain lines for a terminal.
+def configure_logging(level=LOG_LEVEL, log_format=LOG_FORMAT):
+    global _logging_configured
+    with _logging_lock:
+        if _logging_configured:
+            return
+        _logging_configured = True
+    handler = logging.StreamHandler(sys.stderr)
+    if log_format == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+# Per-route latency histograms, request traces, template spans and the /metrics endpoint
+def install(app):
+    from flask import Response, g, request, before_render_template, template_rendered
+
+    configure_logging()
+
+    def metrics_view():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+    if not TRACING:
+        return
+
+    @app.before_request
+    def begin_request_trace():
+        g.trace = begin_trace("request", method=request.method, path=request.path)
+
+    @app.after_request
+    def note_status(response):
+        trace = g.get("trace")
+        if trace is not None:
+            trace.attrs["status"] = response.status_code
+        return response
+
+    @app.teardown_request
+    def end_request_trace(exc):
+        trace = g.pop("trace", None)
+        if trace is None:
+            return
+        status = 500 if exc is not None else trace.attrs.get("status", 200)
+        # The rule ("/job/<int:job_id>"), not the path, keeps the label set bounded
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        duration = end_trace(trace, route=route, status=status)
+        metrics.observe("app_request_duration_seconds", duration, route=route, method=request.method,
+                        status=str(status))
+
+    def template_started(sender, template, context, **extra):
+        g.setdefault("template_starts", []).append(time.perf_counter())
+
+    def template_finished(sender, template, context, **extra):
+        starts = g.get("template_starts")
+        if starts:
+            record("template.render", time.perf_counter() - starts.pop(), template=template.name)
+
+    before_render_template.connect(template_started, app, weak=False)
+    template_rendered.connect(template_finished, app, weak=False)
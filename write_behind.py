@@ -0,0 +1,351 @@
+# Write-behind buffer for inserts a request does not have to wait for (job postings, resumes).
+#
+# submit(row) appends the row to a local spill file and to an in-memory buffer and returns a
+# PendingWrite at once. A background thread hands the buffered rows to flush(rows) in batches of
+# up to WRITE_BATCH_SIZE, after waiting at most WRITE_FLUSH_INTERVAL for a batch to fill; flush
+# writes them in one transaction and returns one result per row (e.g. the new id). The request
+# that produced a row can still read its own write: pending.result() blocks until the batch
+# holding the row is committed.
+#
+# Buffered rows survive a crash: rows in the spill file not yet marked as flushed are replayed by
+# the next WriteBehind with the same name, in this process or another one. Replay is at least
+# once (a crash between the commit and the flushed marker writes the batch again), so flush
+# must tolerate repeats, e.g. with a unique key per row and INSERT IGNORE. close(), also run at
+# exit, drains the buffer first.
+#
+# Concurrent submits share fsyncs: a submit appends its row under the lock, then syncs outside it,
+# and one fsync covers every row appended before it started (group commit).
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# WRITE_BEHIND=0 writes every row on the calling thread, as before
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "1") != "0"
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "50"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("WRITE_FLUSH_INTERVAL", "0.02"))
+WRITE_SPILL_DIR = os.getenv("WRITE_SPILL_DIR", ".cache/write_spill")
+# fsync spilled rows before submit returns; 0 trades crash safety (rows lost with the OS, not the process) for latency
+WRITE_SPILL_FSYNC = os.getenv("WRITE_SPILL_FSYNC", "1") != "0"
+# How long pending.result() waits by default, and close() at exit, while the database is unreachable
+WRITE_WAIT_TIMEOUT = float(os.getenv("WRITE_WAIT_TIMEOUT", "30"))
+WRITE_DRAIN_TIMEOUT = float(os.getenv("WRITE_DRAIN_TIMEOUT", "10"))
+WRITE_RETRY_BACKOFF = float(os.getenv("WRITE_RETRY_BACKOFF", "0.5"))
+MAX_RETRY_BACKOFF = 30.0
+# Flushed markers kept in the spill file before it is rewritten with just the pending rows
+COMPACT_AFTER = 1000
+
+
+class PendingWrite:
+    __slots__ = ("_done", "_result", "_error")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def _finish(self, result=None, error=None):
+        self._result = result
+        self._error = error
+        self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    # The value flush returned for this row; raises what failed it, or TimeoutError while the
+    # row is still buffered (it is written later all the same)
+    def result(self, timeout=WRITE_WAIT_TIMEOUT):
+        if not self._done.wait(timeout):
+            raise TimeoutError("Write still buffered, the database has not accepted it yet.")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# flush(rows) -> one result per row, all rows in one transaction (raise to roll the batch back).
+# on_flushed(rows, results) runs after the commit (cache invalidation, scoring); its errors are
+# logged, never retried. Errors of a class in `retryable` (database down, pool exhausted) keep
+# the batch buffered and retry it with backoff; any other error is narrowed down to the failing
+# row by flushing the batch row by row, and only that row is dropped.
+class WriteBehind:
+    def __init__(self, name, flush, on_flushed=None, retryable=(), batch_size=WRITE_BATCH_SIZE,
+                 interval=WRITE_FLUSH_INTERVAL, spill_dir=WRITE_SPILL_DIR, enabled=WRITE_BEHIND):
+        self.name = name
+        self.flush = flush
+        self.on_flushed = on_flushed
+        self.retryable = tuple(retryable)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.spill_dir = spill_dir
+        self.enabled = enabled
+        self._cond = threading.Condition()
+        # (seq, row, PendingWrite), oldest first; rows stay here until committed or dropped
+        self._buffer = []
+        self._seq = 0
+        # Rows up to this seq are on disk; one thread at a time syncs the spill file
+        self._synced = 0
+        self._sync_lock = threading.Lock()
+        self._markers = 0
+        self._closing = False
+        self._abandoned = False
+        self._thread = None
+        self._stats = {"submitted": 0, "written": 0, "failed": 0, "batches": 0, "retries": 0, "replayed": 0}
+        self._last_error = None
+        if not enabled:
+            return
+
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_path = os.path.join(spill_dir, f"{name}.{os.getpid()}.jsonl")
+        orphans = self._claim_orphans()
+        self._spill = open(self.spill_path, "a", encoding="utf-8")
+        for path in orphans:
+            self._replay(path)
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{name}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # Spill files left by processes that are gone, renamed to this process first so two
+    # starting processes never replay the same file
+    def _claim_orphans(self):
+        claimed = []
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, f"{self.name}.*.jsonl"))):
+            owner = os.path.basename(path)[len(self.name) + 1:-len(".jsonl")].split("-")[0]
+            if not owner.isdigit():
+                continue
+            # Our own pid here means a previous run that had it (pid reuse after a restart)
+            if int(owner) != os.getpid() and _pid_alive(int(owner)):
+                continue
+            target = os.path.join(self.spill_dir, f"{self.name}.{os.getpid()}-{len(claimed)}.claim.jsonl")
+            try:
+                os.replace(path, target)
+            except OSError:
+                continue
+            claimed.append(target)
+        return claimed
+
+    @staticmethod
+    def _unflushed(path):
+        rows, flushed = [], 0
+        with open(path, encoding="utf-8") as spill:
+            for line in spill:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn last line of a process killed mid-write: that row was never acknowledged
+                    continue
+                if "flushed" in entry:
+                    flushed = max(flushed, entry["flushed"])
+                else:
+                    rows.append((entry["seq"], entry["row"]))
+        return [row for seq, row in rows if seq > flushed]
+
+    def _replay(self, path):
+        rows = self._unflushed(path)
+        for row in rows:
+            self.submit(row)
+        self._count("replayed", len(rows))
+        if rows:
+            logger.warning("Replaying buffered writes", extra=tracing.fields(
+                buffer=self.name, rows=len(rows), spill=os.path.basename(path)))
+        os.remove(path)
+
+    # Flushed markers are not synced: a lost one only replays rows that are already written
+    def _append(self, entry):
+        self._spill.write(json.dumps(entry, default=str) + "\n")
+        self._spill.flush()
+
+    # Returns once the rows up to `seq` are on disk. Whoever holds the sync lock fsyncs every row
+    # appended so far; submits that waited for it find their row already covered.
+    def _sync(self, seq):
+        if not WRITE_SPILL_FSYNC:
+            return
+        with self._sync_lock:
+            if self._synced >= seq:
+                return
+            with self._cond:
+                if self._spill.closed:
+                    return
+                target = self._seq
+                # A duplicate, as _compact may replace the file meanwhile (it syncs the new one itself)
+                fd = os.dup(self._spill.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._synced = target
+
+    def submit(self, row):
+        pending = PendingWrite()
+        if not self.enabled:
+            self._write_now(row, pending)
+            return pending
+        with self._cond:
+            if self._closing:
+                raise RuntimeError(f"Write-behind buffer '{self.name}' is closed.")
+            self._seq += 1
+            seq = self._seq
+            self._append({"seq": seq, "row": row})
+            self._buffer.append((seq, row, pending))
+            self._stats["submitted"] += 1
+            self._cond.notify_all()
+        self._sync(seq)
+        return pending
+
+    def _count(self, name, amount=1):
+        with self._cond:
+            self._stats[name] += amount
+
+    def _write_now(self, row, pending):
+        self._count("submitted")
+        try:
+            result = self.flush([row])[0]
+        except Exception as e:
+            self._count("failed")
+            pending._finish(error=e)
+            return
+        self._count("written")
+        pending._finish(result)
+        self._after([row], [result])
+
+    def _after(self, rows, results):
+        if self.on_flushed is None:
+            return
+        try:
+            self.on_flushed(rows, results)
+        except Exception as e:
+            logger.error("Post-write step failed", extra=tracing.fields(buffer=self.name, error=str(e)))
+
+    # Rows up to the batch size, once the batch is full, the interval ran out or we are closing
+    def _next_batch(self):
+        with self._cond:
+            while not self._buffer and not self._closing:
+                self._cond.wait()
+            deadline = time.monotonic() + self.interval
+            while len(self._buffer) < self.batch_size and not self._closing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._buffer[:self.batch_size]
+
+    def _run(self):
+        backoff = WRITE_RETRY_BACKOFF
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            if self._write(batch):
+                backoff = WRITE_RETRY_BACKOFF
+                continue
+            with self._cond:
+                self._stats["retries"] += 1
+                if self._abandoned:
+                    return
+                self._cond.wait(backoff)
+            backoff = min(backoff * 2, MAX_RETRY_BACKOFF)
+
+    # True once every row of the batch is committed or dropped; False to retry it later
+    def _write(self, batch):
+        rows = [row for _, row, _ in batch]
+        with tracing.span("db.write_behind", buffer=self.name, rows=len(rows)):
+            try:
+                results = self.flush(rows)
+            except self.retryable as e:
+                self._last_error = str(e)
+                logger.warning("Buffered writes not accepted, retrying", extra=tracing.fields(
+                    buffer=self.name, rows=len(rows), error=str(e)))
+                return False
+            except Exception as e:
+                if len(batch) > 1:
+                    return self._write_each(batch)
+                self._last_error = str(e)
+                logger.error("Dropping buffered write", extra=tracing.fields(
+                    buffer=self.name, row=rows[0], error=str(e)))
+                self._done(batch, [None], error=e)
+                return True
+        self._done(batch, results)
+        self._after(rows, results)
+        return True
+
+    def _write_each(self, batch):
+        for entry in batch:
+            if not self._write([entry]):
+                return False
+        return True
+
+    def _done(self, batch, results, error=None):
+        with self._cond:
+            del self._buffer[:len(batch)]
+            # Once close() has given up, the spill file keeps listing these rows (written again
+            # on the next start)
+            if not self._abandoned:
+                self._record_flushed(batch[-1][0])
+            self._stats["batches"] += 1
+            self._stats["failed" if error else "written"] += len(batch)
+        for (_, _, pending), result in zip(batch, results):
+            pending._finish(result, error)
+
+    def _record_flushed(self, seq):
+        self._append({"flushed": seq})
+        self._markers += 1
+        if not self._buffer:
+            self._spill.truncate(0)
+            self._markers = 0
+        elif self._markers >= COMPACT_AFTER:
+            self._compact()
+
+    # Rewrite the spill file with only the pending rows (new file, then an atomic rename)
+    def _compact(self):
+        temporary = self.spill_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as spill:
+            for seq, row, _ in self._buffer:
+                spill.write(json.dumps({"seq": seq, "row": row}, default=str) + "\n")
+            spill.flush()
+            os.fsync(spill.fileno())
+        os.replace(temporary, self.spill_path)
+        self._spill.close()
+        self._spill = open(self.spill_path, "a", encoding="utf-8")
+        self._markers = 0
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats, buffered=len(self._buffer), enabled=self.enabled,
+                         batch_size=self.batch_size, last_error=self._last_error)
+        return stats
+
+    # Writes everything still buffered, waiting up to `timeout` while the database is down;
+    # what is left then stays in the spill file for the next start
+    def close(self, timeout=WRITE_DRAIN_TIMEOUT):
+        if self._thread is None:
+            return
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            self._abandoned = True
+            if self._buffer:
+                logger.warning("Buffered writes left in the spill file", extra=tracing.fields(
+                    buffer=self.name, rows=len(self._buffer), spill=self.spill_path))
+                self._spill.close()
+                return
+            self._spill.close()
+        os.remove(self.spill_path)